@@ -0,0 +1,209 @@
+"""
+Headless batch export of .omar projects to PDF.
+
+Projects are read with OmarFormat.open_project and their stored elements
+are converted straight into writer input (no Qt scenes), so this runs on
+machines without a display or a Qt binding. Several projects are exported
+in parallel by a process pool and a JSON summary with per-project timings
+is written at the end.
+
+Usage:
+    python main.py batch PROJECT_OR_DIR [...] -o OUTPUT_DIR
+        [--writer pikepdf|fitz] [--profile print|screen|archive]
+        [--workers N] [--summary summary.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from omar_format import OmarFormat
+from export.profiles import PROFILES
+from export.project_elements import project_pages_data, project_page_refs
+
+WRITERS = ("pikepdf", "fitz")
+
+
+def find_projects(paths: List[str]) -> List[str]:
+    """
+    Expands the command line paths into a sorted list of .omar files.
+    Directories contribute the .omar files directly inside them.
+    """
+    projects = []
+    for path in paths:
+        if os.path.isdir(path):
+            projects.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.lower().endswith(".omar")
+            )
+        else:
+            projects.append(path)
+    return projects
+
+
+def resolve_source_pdf(project_data: Dict[str, Any], project_path: str) -> str:
+    """
+    Finds the linked source PDF of a project (embedded PDFs are read from
+    the project itself, see export_project).
+
+    Relative or moved paths are looked up next to the project file.
+
+    Raises:
+        FileNotFoundError: If the source PDF can't be found
+    """
+    source = project_data.get("source_pdf", {})
+    pdf_path = source.get("path") or ""
+    project_dir = os.path.dirname(os.path.abspath(project_path))
+    candidates = [pdf_path]
+    if not os.path.isabs(pdf_path):
+        candidates.append(os.path.join(project_dir, pdf_path))
+    candidates.append(os.path.join(project_dir, os.path.basename(pdf_path)))
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate):
+            return candidate
+    raise FileNotFoundError(f"Source PDF not found: {pdf_path}")
+
+
+def export_project(project_path: str, output_path: str, writer: str = "pikepdf",
+                   profile: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Exports one project to PDF. Runs in a worker process.
+
+    Args:
+        project_path: .omar file to export
+        output_path: PDF file to write
+        writer: "pikepdf" or "fitz"
+        profile: Optional export profile name
+
+    Returns:
+        Result dict for the summary ("status" is "ok" or "error")
+    """
+    started = time.perf_counter()
+    result = {"project": project_path, "output": output_path, "status": "ok"}
+    try:
+        reader = OmarFormat.open_project(project_path)
+        try:
+            project_data = reader.to_dict()
+            # Embedded PDFs are read in place from the project file
+            source = reader.open_embedded_pdf()
+        finally:
+            reader.close()
+        result["load_seconds"] = round(time.perf_counter() - started, 4)
+
+        if source is None:
+            source = resolve_source_pdf(project_data, project_path)
+        pages_data = project_pages_data(project_data)
+        # PDFs pages were inserted from
+        page_sources = project_data.get("page_sources")
+        result["edited_pages"] = len(pages_data)
+
+        try:
+            if writer == "fitz":
+                from export.pdf_writer import PDFWriter
+                pdf_writer = PDFWriter(source, output_path, page_sources=page_sources)
+                page_order = project_page_refs(project_data, len(pdf_writer.doc))
+                report = pdf_writer.save(pages_data, page_order, incremental=False, profile=profile)
+            else:
+                from export.pikepdf_writer import PikePDFWriter
+                pdf_writer = PikePDFWriter(source, page_sources=page_sources)
+                try:
+                    page_order = project_page_refs(project_data, len(pdf_writer.pdf.pages))
+                    report = pdf_writer.save(output_path, pages_data, page_order, profile=profile)
+                finally:
+                    pdf_writer.close()
+        finally:
+            if hasattr(source, "close"):
+                source.close()
+
+        result["pages"] = len(page_order)
+        result["report"] = report.to_dict()
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def batch_export(project_paths: List[str], output_dir: str, writer: str = "pikepdf",
+                 profile: Optional[str] = None, workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Exports several projects, in parallel when workers > 1.
+
+    Args:
+        project_paths: .omar files to export
+        output_dir: Directory receiving one <project name>.pdf per project
+        writer: "pikepdf" or "fitz"
+        profile: Optional export profile name
+        workers: Number of worker processes (None = CPU count)
+
+    Returns:
+        Summary dict with one result per project, in input order
+    """
+    started = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(project_paths) or 1))
+
+    jobs = []
+    for project_path in project_paths:
+        name = os.path.splitext(os.path.basename(project_path))[0]
+        jobs.append((project_path, os.path.join(output_dir, name + ".pdf"), writer, profile))
+
+    if workers == 1:
+        results = [export_project(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(export_project, *job) for job in jobs]
+            results = [future.result() for future in futures]
+
+    failed = sum(1 for result in results if result["status"] != "ok")
+    return {
+        "writer": writer,
+        "profile": profile,
+        "workers": workers,
+        "projects": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "total_seconds": round(time.perf_counter() - started, 4),
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="main.py batch",
+        description="Export .omar projects to PDF without opening the editor.")
+    parser.add_argument("paths", nargs="+", help=".omar files or directories containing them")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for the exported PDFs")
+    parser.add_argument("--writer", choices=WRITERS, default="pikepdf",
+                        help="PDF backend (default: pikepdf)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=None,
+                        help="Export optimization profile")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--summary", default=None,
+                        help="Write the JSON summary to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    project_paths = find_projects(args.paths)
+    if not project_paths:
+        parser.error("no .omar projects found")
+
+    summary = batch_export(project_paths, args.output_dir, args.writer,
+                           args.profile, args.workers)
+
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    else:
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
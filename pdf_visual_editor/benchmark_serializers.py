@@ -0,0 +1,107 @@
+"""
+Compares the page entry serializers of .omar projects.
+
+Generates projects of the given element counts and reports, per backend,
+the time to encode and compress every page entry (save), to decompress and
+decode them again (load) and the stored size. "json-indent" is the v1
+layout (one indented JSON document) for reference.
+
+Usage:
+    python benchmark_serializers.py
+    python benchmark_serializers.py --elements 10000 100000 500000 --per-page 200
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import zlib
+
+from omar_serializer import HAS_MSGPACK, JSONSerializer, MsgpackSerializer
+
+
+def generate_project(element_count, per_page=200, seed=0):
+    """Project dict in the save_project layout with text and image elements."""
+    rng = random.Random(seed)
+    pages = []
+    for page_num in range((element_count + per_page - 1) // per_page):
+        elements = []
+        for index in range(min(per_page, element_count - page_num * per_page)):
+            x, y = rng.uniform(0, 600), rng.uniform(0, 800)
+            element = {
+                "id": f"{page_num:05d}-{index:05d}",
+                "x": x, "y": y, "z_value": index,
+                "transform_matrix": [1.0, 0.0, 0.0, 1.0, x, y],
+                "opacity": 1.0, "visible": True,
+            }
+            if index % 10 == 0:
+                element.update({"type": "image", "width": rng.uniform(20, 300),
+                                "height": rng.uniform(20, 300),
+                                "image_ref": "images/%064x" % rng.getrandbits(256)})
+            else:
+                element.update({"type": "text", "font_family": "Helvetica",
+                                "font_size": rng.choice([9, 10, 11, 12, 14]),
+                                "color": "#000000",
+                                "text": " ".join(rng.choice(["lorem", "ipsum", "dolor", "sit",
+                                                             "amet", "pagina", "texto"])
+                                                 for _ in range(rng.randint(1, 12)))})
+            elements.append(element)
+        pages.append({"page_num": page_num, "background_opacity": 0.5, "elements": elements})
+    return {"version": "2.0", "app": "PDF Visual Editor", "source_pdf": {}, "settings": {},
+            "page_order": [], "pages": pages}
+
+
+def bench_entries(serializer, pages):
+    start = time.perf_counter()
+    stored = [zlib.compress(serializer.dumps(page), 6) for page in pages]
+    save = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in stored:
+        serializer.loads(zlib.decompress(data))
+    load = time.perf_counter() - start
+    return save, load, sum(len(data) for data in stored)
+
+
+def bench_indented(project):
+    start = time.perf_counter()
+    data = json.dumps(project, indent=2, ensure_ascii=False).encode('utf-8')
+    save = time.perf_counter() - start
+
+    start = time.perf_counter()
+    json.loads(data.decode('utf-8'))
+    load = time.perf_counter() - start
+    return save, load, len(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark .omar page entry serializers.")
+    parser.add_argument("--elements", type=int, nargs="+", default=[10000, 100000],
+                        help="Element counts of the generated projects (default: 10000 100000)")
+    parser.add_argument("--per-page", type=int, default=200, help="Elements per page")
+    parser.add_argument("--skip-pure", action="store_true",
+                        help="Skip the pure-Python MessagePack codec (slow on large projects)")
+    args = parser.parse_args(argv)
+
+    backends = [("json", JSONSerializer())]
+    if HAS_MSGPACK:
+        backends.append(("msgpack", MsgpackSerializer()))
+    else:
+        print("msgpack package not installed; only the pure-Python codec is measured")
+    if not args.skip_pure:
+        backends.append(("msgpack-pure", MsgpackSerializer(pure=True)))
+
+    print(f"{'elements':>9} {'backend':<13} {'save s':>8} {'load s':>8} {'size MB':>9}")
+    for element_count in args.elements:
+        project = generate_project(element_count, args.per_page)
+        results = [("json-indent", bench_indented(project))]
+        results += [(name, bench_entries(serializer, project["pages"]))
+                    for name, serializer in backends]
+        for name, (save, load, size) in results:
+            print(f"{element_count:>9} {name:<13} {save:>8.3f} {load:>8.3f} {size / 1e6:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
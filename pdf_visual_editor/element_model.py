@@ -0,0 +1,149 @@
+"""
+Element model of the pages — the editor's source of truth for edited pages.
+
+Each edited page keeps a PageModel: a compact list of Element records
+(id, type, geometry, transform, style and a reference to its image). The
+scene shown in the canvas is a view built from the model and edits made in
+the scene are applied back to it (see gui/page_manager.py), so a scene can
+be dropped from the cache at any time without losing anything, and saves,
+exports and the autosave journal read the model without touching Qt.
+
+Element.to_dict() / from_dict() use the .omar project element format.
+"""
+
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+_IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+class Element:
+    """One element of a page, in scene coordinates."""
+    __slots__ = ("id", "type", "x", "y", "transform", "opacity", "visible", "z",
+                 "width", "height", "text", "font", "image_data", "image_ref")
+
+    def __init__(self, element_id: str, element_type: str, x: float = 0.0, y: float = 0.0,
+                 transform=_IDENTITY, opacity: float = 1.0, visible: bool = True,
+                 z: float = 0.0, width: float = 0.0, height: float = 0.0,
+                 text: Optional[str] = None, font=None, image_data=None,
+                 image_ref: Optional[str] = None):
+        self.id = element_id
+        self.type = element_type  # "text", "image" or "shape"
+        self.x = x
+        self.y = y
+        self.transform = transform  # (m11, m12, m21, m22, dx, dy)
+        self.opacity = opacity
+        self.visible = visible
+        self.z = z
+        self.width = width  # Local size of images and shapes
+        self.height = height
+        self.text = text
+        self.font = font  # (family, point size, bold, italic) of text elements
+        self.image_data = image_data  # Encoded image (bytes; base64 text from v1 projects)
+        self.image_ref = image_ref  # Content hash of image_data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Element":
+        """Element from a project element dict (an id is assigned if it has none)."""
+        matrix = data.get("transform_matrix") or _IDENTITY
+        transform = tuple(float(v) for v in matrix) if len(matrix) == 6 else _IDENTITY
+        element = cls(data.get("id") or uuid.uuid4().hex, data.get("type", "shape"),
+                      float(data.get("x", 0)), float(data.get("y", 0)), transform,
+                      float(data.get("opacity", 1.0)), bool(data.get("visible", True)),
+                      float(data.get("z_value", 0)))
+        if element.type == "text":
+            element.text = data.get("text", "")
+            element.font = (data.get("font_family", "Arial"), data.get("font_size", 12),
+                            bool(data.get("font_bold", False)), bool(data.get("font_italic", False)))
+        else:
+            element.width = data.get("width", 100)
+            element.height = data.get("height", 100)
+            if element.type == "image":
+                element.image_data = data.get("image_data")
+                element.image_ref = data.get("image_ref")
+        return element
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Project element dict, as OmarFormat.serialize_graphics_item() makes it."""
+        data = {
+            "id": self.id,
+            "x": self.x,
+            "y": self.y,
+            "transform_matrix": list(self.transform),
+            "opacity": self.opacity,
+            "visible": self.visible,
+            "z_value": self.z,
+            "type": self.type,
+        }
+        if self.type == "text":
+            family, size, bold, italic = self.font
+            data.update(text=self.text, font_family=family, font_size=size,
+                        font_bold=bold, font_italic=italic)
+        else:
+            if self.type == "image":
+                data["image_data"] = self.image_data
+                if self.image_ref:
+                    data["image_ref"] = self.image_ref
+            data["width"] = self.width
+            data["height"] = self.height
+        return data
+
+
+class PageModel:
+    """
+    Elements of one page by id, in the order they were first added.
+
+    version is bumped by every change, so views can tell whether they are
+    up to date.
+    """
+    __slots__ = ("page_num", "_elements", "version")
+
+    def __init__(self, page_num: int, elements: Iterable[Element] = ()):
+        self.page_num = page_num
+        self._elements = {element.id: element for element in elements}
+        self.version = 0
+
+    @classmethod
+    def from_dicts(cls, page_num: int, elements: Iterable[Dict[str, Any]]) -> "PageModel":
+        return cls(page_num, (Element.from_dict(data) for data in elements))
+
+    def __len__(self) -> int:
+        return len(self._elements)
+
+    def __iter__(self):
+        return iter(self._elements.values())
+
+    def __contains__(self, element_id) -> bool:
+        return element_id in self._elements
+
+    def get(self, element_id: str) -> Optional[Element]:
+        return self._elements.get(element_id)
+
+    def upsert(self, data: Dict[str, Any]) -> Element:
+        """Add an element or replace the one with the same id (keeping its place)."""
+        element = Element.from_dict(data)
+        self._elements[element.id] = element
+        self.version += 1
+        return element
+
+    def remove(self, element_id: str) -> bool:
+        """Remove an element; False if the page has no element with that id."""
+        if self._elements.pop(element_id, None) is None:
+            return False
+        self.version += 1
+        return True
+
+    def replace(self, elements: Iterable[Dict[str, Any]]):
+        """Replace every element (e.g. with the whole content of a scene)."""
+        self._elements = {}
+        for data in elements:
+            element = Element.from_dict(data)
+            self._elements[element.id] = element
+        self.version += 1
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Project element dicts of the page. They are new dicts, so a
+        snapshot taken for a save or the journal is not changed by later edits.
+        """
+        return [element.to_dict() for element in self._elements.values()]
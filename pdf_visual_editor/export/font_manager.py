@@ -0,0 +1,444 @@
+"""
+Font management for PDF export.
+
+Text overlays used to reference fonts that were never defined (pikepdf) or
+re-resolve font resources for every element (fitz). The managers here create
+each font once per output document, share it across all pages and encode
+text for it:
+
+- Text that fits WinAnsiEncoding uses one of the standard 14 PDF fonts,
+  which need no embedding.
+- Anything else goes through an embedded TrueType font (Type0 / Identity-H),
+  subset to the glyphs actually used. The most recent subset programs are
+  cached by (font, glyph set), so repeated exports of the same text don't
+  subset the same data again.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Standard 14 font families, indexed by (bold, italic)
+_STANDARD_FAMILIES = {
+    "helvetica": {
+        (False, False): "Helvetica",
+        (True, False): "Helvetica-Bold",
+        (False, True): "Helvetica-Oblique",
+        (True, True): "Helvetica-BoldOblique",
+    },
+    "times": {
+        (False, False): "Times-Roman",
+        (True, False): "Times-Bold",
+        (False, True): "Times-Italic",
+        (True, True): "Times-BoldItalic",
+    },
+    "courier": {
+        (False, False): "Courier",
+        (True, False): "Courier-Bold",
+        (False, True): "Courier-Oblique",
+        (True, True): "Courier-BoldOblique",
+    },
+}
+
+# PyMuPDF short names for the same standard fonts
+_FITZ_STANDARD_NAMES = {
+    "Helvetica": "helv", "Helvetica-Bold": "hebo",
+    "Helvetica-Oblique": "heit", "Helvetica-BoldOblique": "hebi",
+    "Times-Roman": "tiro", "Times-Bold": "tibo",
+    "Times-Italic": "tiit", "Times-BoldItalic": "tibi",
+    "Courier": "cour", "Courier-Bold": "cobo",
+    "Courier-Oblique": "coit", "Courier-BoldOblique": "cobi",
+}
+
+# Built-in PyMuPDF font with wide Unicode coverage (Latin, Greek, Cyrillic, CJK)
+FALLBACK_UNICODE_FONT = "cjk"
+
+# Line spacing used for multi-line text, as a multiple of the font size
+LINE_SPACING = 1.2
+
+# Subset programs kept for reuse, least recently used dropped first
+SUBSET_CACHE_SIZE = 32
+
+# (font id, frozenset of glyph ids) -> (font program, whether it is a subset)
+_subset_cache: "OrderedDict[Tuple[str, frozenset], Tuple[bytes, bool]]" = OrderedDict()
+
+
+def standard_font_name(family: Optional[str], bold: bool = False, italic: bool = False) -> str:
+    """
+    Maps a Qt font family to the closest standard 14 PDF font.
+
+    Args:
+        family: Font family name as reported by QFont (may be None).
+        bold: Whether the font is bold.
+        italic: Whether the font is italic.
+
+    Returns:
+        BaseFont name, e.g. "Helvetica-Bold".
+    """
+    name = (family or "").lower()
+    if any(key in name for key in ("courier", "mono", "consol")):
+        base = "courier"
+    elif "sans" not in name and any(key in name for key in ("times", "serif", "roman", "georgia", "garamond")):
+        base = "times"
+    else:
+        base = "helvetica"
+    return _STANDARD_FAMILIES[base][(bool(bold), bool(italic))]
+
+
+def font_key(element) -> Tuple[str, bool, bool]:
+    """Returns the (family, bold, italic) key of a text element."""
+    return (element.get('font_family') or "Helvetica",
+            bool(element.get('font_bold', False)),
+            bool(element.get('font_italic', False)))
+
+
+def is_winansi(text: str) -> bool:
+    """True if the text can be written with a standard font's WinAnsiEncoding."""
+    try:
+        text.encode('cp1252')
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+def subset_font(font_id: str, font_buffer: bytes, glyph_ids) -> bytes:
+    """
+    Subsets a TrueType program to the given glyphs, keeping glyph ids stable.
+
+    Results are cached by (font_id, glyph set). If fontTools is not installed
+    the full program is returned and embedded as is.
+    """
+    return subset_font_program(font_id, font_buffer, glyph_ids)[0]
+
+
+def subset_font_program(font_id: str, font_buffer: bytes, glyph_ids,
+                        retain_gids: bool = True) -> Tuple[bytes, bool]:
+    """
+    Like subset_font(), but also tells whether the program returned is a
+    subset (False when the full font is embedded). Without retain_gids the
+    glyphs are renumbered, which makes subsets of large fonts much smaller;
+    text must then be encoded with the subset itself.
+    """
+    glyphs = frozenset(glyph_ids)
+    cache_key = (font_id, glyphs) if retain_gids else (font_id, glyphs, False)
+    if cache_key in _subset_cache:
+        _subset_cache.move_to_end(cache_key)
+        return _subset_cache[cache_key]
+
+    try:
+        import io
+        from fontTools import subset as ft_subset
+        from fontTools.ttLib import TTFont
+
+        options = ft_subset.Options()
+        options.retain_gids = retain_gids  # Content streams may already use original gids
+        options.notdef_outline = True
+        options.name_IDs = ["*"]
+        options.drop_tables += ["GSUB", "GPOS", "GDEF"]
+
+        tt_font = TTFont(io.BytesIO(font_buffer))
+        subsetter = ft_subset.Subsetter(options=options)
+        subsetter.populate(gids=sorted(glyphs | {0}))
+        subsetter.subset(tt_font)
+
+        out = io.BytesIO()
+        tt_font.save(out)
+        result = (out.getvalue(), True)
+    except ImportError:
+        result = (font_buffer, False)
+    except Exception as e:
+        print(f"Font subsetting failed for {font_id}, embedding full font: {e}")
+        result = (font_buffer, False)
+
+    _subset_cache[cache_key] = result
+    while len(_subset_cache) > SUBSET_CACHE_SIZE:
+        _subset_cache.popitem(last=False)
+    return result
+
+
+def _load_fitz_font(font_paths: Dict[str, str], family: str):
+    """Load the Unicode font for a family, falling back to the built-in one."""
+    import fitz
+
+    path = font_paths.get(family) if font_paths else None
+    if path:
+        try:
+            return path, fitz.Font(fontfile=path)
+        except Exception as e:
+            print(f"Failed to load font file {path}: {e}")
+    return FALLBACK_UNICODE_FONT, fitz.Font(FALLBACK_UNICODE_FONT)
+
+
+class _UnicodeFont:
+    """An embedded Type0 font whose program is written once, at finalize time."""
+    def __init__(self, font_id: str, fitz_font, pdf_obj):
+        self.font_id = font_id
+        self.fitz_font = fitz_font
+        self.pdf_obj = pdf_obj
+        self.used = {}  # glyph id -> (unicode codepoint, advance in 1/1000 em)
+
+    def encode(self, text: str) -> bytes:
+        """Encode text as a hex string of 2-byte glyph ids, recording used glyphs."""
+        gids = []
+        for char in text:
+            code = ord(char)
+            gid = self.fitz_font.has_glyph(code) or 0
+            if gid not in self.used:
+                width = self.fitz_font.glyph_advance(code) * 1000 if gid else 0
+                self.used[gid] = (code, width)
+            gids.append(gid)
+        return b"<" + "".join(f"{gid:04X}" for gid in gids).encode('ascii') + b">"
+
+
+class PikeFontManager:
+    """
+    Creates and shares font resources for a pikepdf output document.
+
+    Fonts are indirect objects created on first use and added by reference
+    to the /Resources of every page that needs them. Call finalize() once,
+    before saving, to embed the (subset) programs of Unicode fonts.
+    """
+    def __init__(self, pdf, font_paths: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            pdf: Output pikepdf.Pdf
+            font_paths: Optional mapping of font family to TrueType file, used
+                for text outside WinAnsiEncoding.
+        """
+        self.pdf = pdf
+        self.font_paths = font_paths or {}
+        self._standard_fonts = {}  # BaseFont name -> font object
+        self._unicode_fonts = {}   # font id -> _UnicodeFont
+        self._family_fonts = {}    # family -> _UnicodeFont
+        self._page_names = {}      # (page objgen, font objgen) -> resource name
+
+    def encode_text(self, page, text: str, key: Tuple[str, bool, bool]):
+        """
+        Selects a font for the text and encodes it.
+
+        Args:
+            page: pikepdf Page that will show the text
+            text: Text to encode (a single line)
+            key: (family, bold, italic) font key
+
+        Returns:
+            (resource name, encoded string operand) for use with Tf and Tj.
+        """
+        family, bold, italic = key
+        if is_winansi(text):
+            font_obj = self._standard_font(standard_font_name(family, bold, italic))
+            operand = b"(" + self._escape_bytes(text.encode('cp1252')) + b")"
+        else:
+            unicode_font = self._unicode_font(family)
+            font_obj = unicode_font.pdf_obj
+            operand = unicode_font.encode(text)
+        return self._resource_name(page, font_obj), operand
+
+    def finalize(self):
+        """Embed the subset program, widths and ToUnicode map of each Unicode font."""
+        import pikepdf
+
+        for unicode_font in self._unicode_fonts.values():
+            fitz_font = unicode_font.fitz_font
+            program, subset = subset_font_program(unicode_font.font_id, fitz_font.buffer,
+                                                  unicode_font.used)
+
+            font_file = self.pdf.make_stream(program)
+            font_file.Length1 = len(program)
+
+            bbox = fitz_font.bbox
+            base_font = self._base_font_name(fitz_font, subset)
+            descriptor = pikepdf.Dictionary(
+                Type=pikepdf.Name.FontDescriptor,
+                FontName=pikepdf.Name("/" + base_font),
+                Flags=4,
+                FontBBox=[bbox.x0 * 1000, bbox.y0 * 1000, bbox.x1 * 1000, bbox.y1 * 1000],
+                ItalicAngle=0,
+                Ascent=fitz_font.ascender * 1000,
+                Descent=fitz_font.descender * 1000,
+                CapHeight=fitz_font.ascender * 700,
+                StemV=80,
+                FontFile2=font_file,
+            )
+
+            widths = []
+            for gid in sorted(unicode_font.used):
+                widths.extend([gid, [unicode_font.used[gid][1]]])
+
+            cid_font = pikepdf.Dictionary(
+                Type=pikepdf.Name.Font,
+                Subtype=pikepdf.Name.CIDFontType2,
+                BaseFont=pikepdf.Name("/" + base_font),
+                CIDSystemInfo=pikepdf.Dictionary(
+                    Registry=pikepdf.String("Adobe"),
+                    Ordering=pikepdf.String("Identity"),
+                    Supplement=0,
+                ),
+                FontDescriptor=self.pdf.make_indirect(descriptor),
+                CIDToGIDMap=pikepdf.Name.Identity,
+                W=widths,
+            )
+
+            font_obj = unicode_font.pdf_obj
+            font_obj.BaseFont = pikepdf.Name("/" + base_font)
+            font_obj.DescendantFonts = [self.pdf.make_indirect(cid_font)]
+            font_obj.ToUnicode = self.pdf.make_stream(self._to_unicode_cmap(unicode_font.used))
+
+    def _standard_font(self, base_font: str):
+        if base_font not in self._standard_fonts:
+            import pikepdf
+            self._standard_fonts[base_font] = self.pdf.make_indirect(pikepdf.Dictionary(
+                Type=pikepdf.Name.Font,
+                Subtype=pikepdf.Name.Type1,
+                BaseFont=pikepdf.Name("/" + base_font),
+                Encoding=pikepdf.Name.WinAnsiEncoding,
+            ))
+        return self._standard_fonts[base_font]
+
+    def _unicode_font(self, family: str) -> _UnicodeFont:
+        if family not in self._family_fonts:
+            font_id, fitz_font = _load_fitz_font(self.font_paths, family)
+            if font_id not in self._unicode_fonts:
+                import pikepdf
+                # Completed by finalize() once all glyphs are known
+                pdf_obj = self.pdf.make_indirect(pikepdf.Dictionary(
+                    Type=pikepdf.Name.Font,
+                    Subtype=pikepdf.Name.Type0,
+                    Encoding=pikepdf.Name("/Identity-H"),
+                ))
+                self._unicode_fonts[font_id] = _UnicodeFont(font_id, fitz_font, pdf_obj)
+            self._family_fonts[family] = self._unicode_fonts[font_id]
+        return self._family_fonts[family]
+
+    def _resource_name(self, page, font_obj) -> str:
+        import pikepdf
+
+        key = (page.obj.objgen, font_obj.objgen)
+        if key not in self._page_names:
+            name = page.add_resource(font_obj, pikepdf.Name.Font, prefix="OvF",
+                                     replace_existing=False)
+            self._page_names[key] = str(name)
+        return self._page_names[key]
+
+    @staticmethod
+    def _base_font_name(fitz_font, subset: bool) -> str:
+        # Subset fonts are tagged with a six-letter prefix; full fonts aren't
+        name = "".join(ch for ch in fitz_font.name if ch.isalnum() or ch in "-_") or "Font"
+        return "PVEAAA+" + name if subset else name
+
+    @staticmethod
+    def _escape_bytes(data: bytes) -> bytes:
+        return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+    @staticmethod
+    def _to_unicode_cmap(used) -> bytes:
+        entries = []
+        for gid in sorted(used):
+            code = used[gid][0]
+            if gid == 0:
+                continue
+            utf16 = chr(code).encode('utf-16-be').hex().upper()
+            entries.append(f"<{gid:04X}> <{utf16}>")
+
+        lines = [
+            "/CIDInit /ProcSet findresource begin",
+            "12 dict begin",
+            "begincmap",
+            "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def",
+            "/CMapName /Adobe-Identity-UCS def",
+            "/CMapType 2 def",
+            "1 begincodespacerange",
+            "<0000> <FFFF>",
+            "endcodespacerange",
+        ]
+        # bfchar blocks are limited to 100 entries each
+        for start in range(0, len(entries), 100):
+            block = entries[start:start + 100]
+            lines.append(f"{len(block)} beginbfchar")
+            lines.extend(block)
+            lines.append("endbfchar")
+        lines += [
+            "endcmap",
+            "CMapName currentdict /CMap defineresource pop",
+            "end",
+            "end",
+        ]
+        return "\n".join(lines).encode('ascii')
+
+
+class FitzFontManager:
+    """
+    Shares fitz.Font objects across all pages of a PyMuPDF output document.
+
+    Text is written through one fitz.TextWriter per page, so each font is
+    resolved once per document instead of once per element. Call finalize()
+    with the output document before saving to subset all embedded fonts
+    in a single pass.
+
+    Incremental updates can't subset the document's fonts afterwards (that
+    rewrites every font of the document). They write WinAnsi text with
+    standard_name() fonts, which are not embedded, and other text with
+    unicode_font(), subset beforehand with subset_unicode_fonts().
+    """
+    def __init__(self, font_paths: Optional[Dict[str, str]] = None):
+        self.font_paths = font_paths or {}
+        self._fonts = {}
+        self._font_ids = {}  # ("unicode", family) -> font id of its program
+
+    def font_for(self, text: str, key: Tuple[str, bool, bool]):
+        """Returns the shared fitz.Font to use for the text."""
+        import fitz
+
+        family, bold, italic = key
+        short_name = _FITZ_STANDARD_NAMES[standard_font_name(family, bold, italic)]
+        if short_name not in self._fonts:
+            self._fonts[short_name] = fitz.Font(short_name)
+        font = self._fonts[short_name]
+
+        if all(font.has_glyph(ord(char)) for char in text if not char.isspace()):
+            return font
+
+        return self.unicode_font(key)
+
+    def standard_name(self, key: Tuple[str, bool, bool]) -> str:
+        """PyMuPDF name of the standard 14 font for a font key (for WinAnsi text)."""
+        return _FITZ_STANDARD_NAMES[standard_font_name(*key)]
+
+    def unicode_font(self, key: Tuple[str, bool, bool]):
+        """Returns the shared fitz.Font with wide Unicode coverage for a font key."""
+        unicode_key = ("unicode", key[0])
+        if unicode_key not in self._fonts:
+            font_id, font = _load_fitz_font(self.font_paths, key[0])
+            self._fonts[unicode_key] = font
+            self._font_ids[unicode_key] = font_id
+        return self._fonts[unicode_key]
+
+    def subset_unicode_fonts(self, lines):
+        """
+        Replace the Unicode fonts of (text, key) pairs by subsets holding
+        just the glyphs of that text, so writing them embeds only those
+        glyphs. Fonts stay complete if they can't be subset.
+        """
+        import fitz
+
+        codes = {}  # unicode key -> codepoints written with it
+        for text, key in lines:
+            self.unicode_font(key)
+            codes.setdefault(("unicode", key[0]), set()).update(map(ord, text))
+
+        for unicode_key, used in codes.items():
+            font = self._fonts[unicode_key]
+            # Text is encoded with the subset font itself, so its glyphs
+            # can be renumbered
+            gids = {font.has_glyph(code) for code in used}
+            program, subset = subset_font_program(self._font_ids[unicode_key], font.buffer, gids,
+                                                  retain_gids=False)
+            if subset:
+                self._fonts[unicode_key] = fitz.Font(fontbuffer=program)
+
+    def finalize(self, doc):
+        """Subset every font embedded in the output document, once."""
+        if hasattr(doc, 'subset_fonts'):
+            try:
+                doc.subset_fonts()
+            except Exception as e:
+                print(f"Font subsetting skipped: {e}")
@@ -0,0 +1,157 @@
+"""
+Downsampling of images drawn above a profile's target DPI (pikepdf writer).
+
+The displayed size of every image is read from the page content streams
+(the CTM at each Do operator), so an image's effective resolution is its
+pixel size over its largest placement. Decoding and writing back touch the
+pikepdf document and stay on the calling thread; resizing and encoding run
+in a thread pool (PIL releases the GIL while doing both).
+"""
+
+import io
+import math
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple
+
+import pikepdf
+
+from export.profiles import ExportProfile, ExportReport, downsample_size
+
+_IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+def _multiply(m, ctm):
+    """Returns m x ctm for PDF matrices given as (a, b, c, d, e, f)."""
+    a, b, c, d, e, f = m
+    A, B, C, D, E, F = ctm
+    return (a * A + b * C, a * B + b * D,
+            c * A + d * C, c * B + d * D,
+            e * A + f * C + E, e * B + f * D + F)
+
+
+def image_placements(page) -> Dict[str, Tuple[float, float]]:
+    """
+    Largest displayed size of each XObject drawn directly by a page.
+
+    Args:
+        page: pikepdf Page object
+
+    Returns:
+        Dict mapping XObject resource name to (width, height) in points
+    """
+    sizes = {}
+    stack = []
+    ctm = _IDENTITY
+    for operands, operator in pikepdf.parse_content_stream(page, "q Q cm Do"):
+        op = str(operator)
+        if op == "q":
+            stack.append(ctm)
+        elif op == "Q":
+            ctm = stack.pop() if stack else _IDENTITY
+        elif op == "cm" and len(operands) == 6:
+            ctm = _multiply(tuple(float(v) for v in operands), ctm)
+        elif op == "Do" and operands:
+            # The image's unit square is mapped through the CTM
+            w = math.hypot(ctm[0], ctm[1])
+            h = math.hypot(ctm[2], ctm[3])
+            name = str(operands[0])
+            old_w, old_h = sizes.get(name, (0.0, 0.0))
+            sizes[name] = (max(old_w, w), max(old_h, h))
+    return sizes
+
+
+def _collect_candidates(pdf: pikepdf.Pdf):
+    """Maps image objgen -> (image stream, largest display size) over all pages."""
+    candidates = {}
+    for page in pdf.pages:
+        try:
+            placements = image_placements(page)
+        except pikepdf.PdfError as e:
+            print(f"Failed to parse page content for images: {e}")
+            continue
+        resources = page.obj.get("/Resources")
+        xobjects = resources.get("/XObject") if resources is not None else None
+        if xobjects is None:
+            continue
+        for name, (w, h) in placements.items():
+            image = xobjects.get(name)
+            if image is None or image.get("/Subtype") != pikepdf.Name.Image:
+                continue
+            key = image.objgen
+            if key in candidates:
+                old_w, old_h = candidates[key][1]
+                candidates[key] = (image, (max(old_w, w), max(old_h, h)))
+            else:
+                candidates[key] = (image, (w, h))
+    return candidates.values()
+
+
+def _resample(pil_image, size, profile: ExportProfile):
+    """Resizes and encodes one image. Runs on a worker thread."""
+    from PIL import Image
+    resized = pil_image.resize(size, Image.LANCZOS)
+    if profile.image_format == "jpeg":
+        buffer = io.BytesIO()
+        resized.save(buffer, format="JPEG", quality=profile.jpeg_quality, optimize=True)
+        return resized, buffer.getvalue(), pikepdf.Name.DCTDecode
+    return resized, zlib.compress(resized.tobytes(), profile.compression_level), pikepdf.Name.FlateDecode
+
+
+def downsample_images(pdf: pikepdf.Pdf, profile: ExportProfile, report: ExportReport):
+    """
+    Resamples every image of a document shown above profile.image_dpi.
+
+    Images with color-key masks, stencil masks, 1-bit data or palette/CMYK
+    color spaces are kept as they are, as is any image whose resampled
+    encoding would not be smaller. Soft masks keep their own resolution.
+
+    Args:
+        pdf: Document to optimize in place
+        profile: Export profile with the target DPI and encoding
+        report: Report that receives the image counts and sizes
+    """
+    if not profile.image_dpi:
+        return
+
+    jobs = []
+    for image, display_size in _collect_candidates(pdf):
+        report.images_examined += 1
+        if image.get("/ImageMask", False) or "/Mask" in image:
+            continue
+        if int(image.get("/BitsPerComponent", 8)) < 8:
+            continue
+        size = downsample_size((int(image.Width), int(image.Height)), display_size, profile.image_dpi)
+        if size is None:
+            continue
+        try:
+            pil_image = pikepdf.PdfImage(image).as_pil_image()
+        except Exception as e:
+            print(f"Failed to decode image for downsampling: {e}")
+            continue
+        if pil_image.mode not in ("RGB", "L"):
+            continue
+        jobs.append((image, pil_image, size))
+
+    if not jobs:
+        return
+
+    with ThreadPoolExecutor(max_workers=profile.worker_count) as pool:
+        futures = [pool.submit(_resample, pil_image, size, profile)
+                   for _, pil_image, size in jobs]
+        results = [future.result() for future in futures]
+
+    for (image, _, _), (resized, data, filter_name) in zip(jobs, results):
+        old_size = len(image.read_raw_bytes())
+        if len(data) >= old_size:
+            continue
+        image.write(data, filter=filter_name)
+        image.Width, image.Height = resized.size
+        image.ColorSpace = pikepdf.Name.DeviceGray if resized.mode == "L" else pikepdf.Name.DeviceRGB
+        image.BitsPerComponent = 8
+        for key in ("/Decode", "/DecodeParms"):
+            if key in image:
+                del image[key]
+        report.images_downsampled += 1
+        report.image_bytes_before += old_size
+        report.image_bytes_after += len(data)
@@ -0,0 +1,56 @@
+from typing import Dict, Iterable, Iterator, Tuple, Union
+from utils.page_order import PageRef
+
+# A ref run is ("copy", source, first, last, rotation) for a block of
+# untouched pages of one source PDF, consecutive there and rotated alike,
+# or ("edit", ref) for a single page that needs overlays.
+RefRun = Union[Tuple[str, int, int, int, int], Tuple[str, PageRef]]
+
+
+def plan_ref_runs(refs: Iterable[PageRef], dirty_pages, page_counts: Dict[int, int]) -> Iterator[RefRun]:
+    """
+    Splits an output page order of PageRefs (see utils/page_order.py) into
+    bulk-copy runs and edited pages.
+
+    Consecutive clean refs merge into one copy run while they come from
+    the same source, follow each other there and share a rotation, so
+    writers can append them in one call with no per-page work, and
+    appending whole documents (a merge) costs one bulk copy each. Refs to
+    unknown sources or past the end of their source are skipped.
+
+    Args:
+        refs: Pages in output order.
+        dirty_pages: Container of page ids that have edits.
+        page_counts: Source number -> number of pages of that PDF.
+
+    Yields:
+        ("copy", source, first, last, rotation) or ("edit", ref) tuples.
+    """
+    run = None
+
+    for ref in refs:
+        if not 0 <= ref.index < page_counts.get(ref.source, 0):
+            continue
+
+        if ref.id in dirty_pages:
+            if run is not None:
+                yield tuple(run)
+                run = None
+            yield ("edit", ref)
+            continue
+
+        if (run is not None and ref.source == run[1] and ref.index == run[3] + 1
+                and ref.rotation == run[4]):
+            run[3] = ref.index
+        else:
+            if run is not None:
+                yield tuple(run)
+            run = ["copy", ref.source, ref.index, ref.index, ref.rotation]
+
+    if run is not None:
+        yield tuple(run)
+
+
+def dirty_pages_from_data(pages_data) -> set:
+    """Pages that carry at least one element in a writer's pages_data dict."""
+    return {page_num for page_num, elements in pages_data.items() if elements}
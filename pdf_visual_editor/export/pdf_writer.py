@@ -1,91 +1,328 @@
 import fitz
-from typing import List, Dict, Any
+import inspect
+import os
+import time
+from typing import List, Dict, Any, Optional, Union
 from utils.geometry import CoordinateConverter
+from export.page_runs import plan_ref_runs, dirty_pages_from_data
+from export.font_manager import FitzFontManager, font_key, is_winansi, LINE_SPACING
+from export.profiles import ExportProfile, ExportReport, get_profile, DPI_TOLERANCE
+from utils.pdf_source import is_pdf_path, open_fitz_document
+from utils.page_order import PageRef, normalize_refs
 
 class PDFWriter:
     """
     Handles saving the modified PDF using PyMuPDF (fitz).
     """
-    def __init__(self, source_path: str, output_path: str):
+    def __init__(self, source_path, output_path: str, font_paths: Optional[Dict[str, str]] = None,
+                 page_sources: Optional[List[str]] = None):
+        # source_path may also be a file object over an embedded PDF
         self.source_path = source_path
         self.output_path = output_path
-        self.doc = fitz.open(source_path)
+        self.doc = open_fitz_document(source_path)
+        # Fonts are shared by every page of the output document
+        self.fonts = FitzFontManager(font_paths)
+        # Paths of the PDFs pages were inserted from, by source number
+        # (see utils/page_order.py); opened when pages are copied from them
+        self.page_sources = list(page_sources or [None])
+        self._source_docs = {0: self.doc}
 
-    def save(self, pages_data: Dict[int, List[Dict[str, Any]]], page_order: List[int]):
+    def save(self, pages_data: Dict[int, List[Dict[str, Any]]], page_order: List[Union[int, PageRef]],
+             incremental: Optional[bool] = None, profile=None) -> ExportReport:
         """
         Saves the PDF with modifications.
         
         Args:
-            pages_data: Dict mapping page_num (int) to list of elements.
-            page_order: List of page numbers representing the new order.
+            pages_data: Dict mapping page id (int) to list of elements.
+                Pages without elements are copied verbatim from the source.
+            page_order: Pages in their new order: PageRefs (pages of any
+                source, rotated) or page numbers of the source PDF.
+            incremental: Append the changes to the source file as an
+                incremental update instead of rewriting it. None (default)
+                does so whenever the output path is the source file and
+                no profile is given (profiles rewrite the whole file).
+            profile: Optional export profile (name or ExportProfile) with
+                image downsampling and compression settings.
+                
+        Returns:
+            ExportReport with the output size and timings; its
+            `incremental` flag tells whether an incremental update was written.
+        """
+        profile = get_profile(profile)
+        report = ExportReport(profile, self.source_path, self.output_path)
+        if incremental is None:
+            incremental = profile is None and self._writes_to_source()
+        refs = normalize_refs(page_order, len(self.doc))
+        
+        try:
+            if incremental and self.can_save_incrementally(refs):
+                started = time.perf_counter()
+                self._save_incremental(pages_data, refs)
+                report.time_stage("write", started)
+                report.incremental = True
+            else:
+                self._save_full(pages_data, refs, profile, report)
+            return report.finish()
+        finally:
+            for doc in self._source_docs.values():
+                if not doc.is_closed:
+                    doc.close()
+    
+    def can_save_incrementally(self, page_order: List[Union[int, PageRef]]) -> bool:
+        """
+        An incremental update is possible when it targets the source file,
+        the page order is unchanged (the source's pages, in order, not
+        rotated) and the document allows it (e.g. it was not repaired on open).
+        """
+        if not self._writes_to_source():
+            return False
+        pages = [(ref.source, ref.index, ref.rotation)
+                 for ref in normalize_refs(page_order, len(self.doc))]
+        if pages != [(0, page_num, 0) for page_num in range(len(self.doc))]:
+            return False
+        if hasattr(self.doc, 'can_save_incrementally'):
+            return self.doc.can_save_incrementally()
+        return not self.doc.is_repaired
+    
+    def _writes_to_source(self) -> bool:
+        if not is_pdf_path(self.source_path):
+            return False
+        try:
+            return os.path.samefile(self.source_path, self.output_path)
+        except OSError:
+            return False
+    
+    def _save_incremental(self, pages_data: Dict[int, List[Dict[str, Any]]], refs: List[PageRef]):
         """
+        Appends overlays for the edited pages to the source file.
+        
+        Only the new and modified objects (overlay streams, images, fonts and
+        the touched page dictionaries) are written, after the existing bytes,
+        so the cost is proportional to the change, not to the document size.
+        """
+        dirty_pages = dirty_pages_from_data(pages_data)
+        edited = [ref for ref in refs if ref.id in dirty_pages]
+        
+        # The document's fonts can't be subset here: that would rewrite
+        # every font object, defeating the point of an append-only update.
+        # WinAnsi text uses standard fonts, which are not embedded; the
+        # fonts of other text are subset before they are written.
+        self.fonts.subset_unicode_fonts(
+            (line, key) for ref in edited
+            for line, key in self._text_lines(pages_data[ref.id]) if not is_winansi(line))
+        for ref in edited:
+            self._apply_overlays(self.doc[ref.index], pages_data[ref.id], incremental=True)
+        
+        self.doc.save(self.doc.name, incremental=True,
+                      encryption=fitz.PDF_ENCRYPT_KEEP)
+    
+    def _save_full(self, pages_data: Dict[int, List[Dict[str, Any]]], refs: List[PageRef],
+                   profile: Optional[ExportProfile], report: ExportReport):
+        """Writes a new document with the pages in the given order."""
+        started = time.perf_counter()
+        
         # Create a new PDF for output to handle reordering easily
         out_doc = fitz.open()
         
-        for page_num in page_order:
-            # Copy page from source
-            out_doc.insert_pdf(self.doc, from_page=page_num, to_page=page_num)
+        # Runs of untouched pages are inserted in one call (a whole merged
+        # document at a time); only pages with elements are visited
+        # individually to receive overlays.
+        dirty_pages = dirty_pages_from_data(pages_data)
+        page_counts = {source: len(self._source_doc(source))
+                       for source in {ref.source for ref in refs}
+                       if 0 <= source < len(self.page_sources)}
+        
+        for run in plan_ref_runs(refs, dirty_pages, page_counts):
+            if run[0] == "copy":
+                _, source, first, last, rotation = run
+                out_doc.insert_pdf(self._source_doc(source), from_page=first, to_page=last)
+                self._rotate_last_pages(out_doc, last - first + 1, rotation)
+                continue
             
-            # Get the new page (it's the last one added)
-            page = out_doc[-1]
-            page_height = page.rect.height
+            # Copy page from source
+            ref = run[1]
+            out_doc.insert_pdf(self._source_doc(ref.source), from_page=ref.index, to_page=ref.index)
             
-            # Get elements for this page
-            elements = pages_data.get(page_num, [])
+            # The new page is the last one added; overlays are drawn in
+            # the page's own coordinates, before it is turned
+            self._apply_overlays(out_doc[-1], pages_data[ref.id])
+            self._rotate_last_pages(out_doc, 1, ref.rotation)
+
+        # Subset the shared fonts once for the whole document
+        self.fonts.finalize(out_doc)
+        report.time_stage("pages", started)
+
+        if profile is not None and profile.image_dpi:
+            started = time.perf_counter()
+            self._downsample_images(out_doc, profile, report)
+            report.time_stage("images", started)
+
+        started = time.perf_counter()
+        options = self._save_options(out_doc, profile)
+        if self._writes_to_source():
+            # fitz can't rewrite the file it has open: write next to it and swap
+            tmp_path = self.output_path + ".tmp"
+            out_doc.save(tmp_path, **options)
+            out_doc.close()
+            self.doc.close()
+            os.replace(tmp_path, self.output_path)
+        else:
+            out_doc.save(self.output_path, **options)
+            out_doc.close()
+        report.time_stage("write", started)
+    
+    def _source_doc(self, source: int):
+        """Document of a source number (source 0 is the source PDF)."""
+        doc = self._source_docs.get(source)
+        if doc is None:
+            doc = self._source_docs[source] = fitz.open(self.page_sources[source])
+        return doc
+    
+    @staticmethod
+    def _rotate_last_pages(out_doc, count: int, rotation: int):
+        """Turns the last count pages by rotation degrees, on top of their own /Rotate."""
+        if not rotation:
+            return
+        for page_num in range(len(out_doc) - count, len(out_doc)):
+            page = out_doc[page_num]
+            page.set_rotation((page.rotation + rotation) % 360)
+    
+    def _downsample_images(self, out_doc, profile: ExportProfile, report: ExportReport):
+        """
+        Resamples images above the profile's DPI with MuPDF's own
+        image rewriter. Older PyMuPDF versions lack it;
+        the images are then kept as they are.
+        """
+        if not hasattr(out_doc, 'rewrite_images'):
+            print("Image downsampling needs PyMuPDF 1.25.5 or newer; skipped")
+            return
+        image_xrefs = {img[0] for page in out_doc for img in page.get_images(full=True)}
+        report.images_examined += len(image_xrefs)
+        before = {xref: out_doc.xref_stream_raw(xref) for xref in image_xrefs}
+        out_doc.rewrite_images(
+            dpi_threshold=int(profile.image_dpi * DPI_TOLERANCE),
+            dpi_target=int(profile.image_dpi),
+            quality=profile.jpeg_quality,
+            lossy=True,
+            lossless=profile.image_format != "jpeg",
+        )
+        for xref, raw in before.items():
+            after = out_doc.xref_stream_raw(xref)
+            if raw is not None and after is not None and after != raw:
+                report.images_downsampled += 1
+                report.image_bytes_before += len(raw)
+                report.image_bytes_after += len(after)
+    
+    def _save_options(self, out_doc, profile: Optional[ExportProfile]) -> Dict[str, Any]:
+        """
+        fitz save() keyword arguments for an export profile. Options the
+        installed PyMuPDF doesn't know (e.g. use_objstms before 1.24,
+        linear after MuPDF dropped linearization) are left out.
+        """
+        if profile is None:
+            return {}
+        options = {
+            'garbage': 3,
+            'deflate': profile.compression_level > 0,
+            'deflate_images': profile.recompress_streams,
+            'deflate_fonts': profile.recompress_streams,
+            'use_objstms': 1 if profile.object_streams else 0,
+            'compression_effort': profile.compression_level * 100 // 9,
+            'linear': profile.linearize,
+        }
+        try:
+            accepted = inspect.signature(out_doc.save).parameters
+        except (TypeError, ValueError):
+            return options
+        return {key: value for key, value in options.items() if key in accepted}
+    
+    @staticmethod
+    def _text_lines(elements: List[Dict[str, Any]]):
+        """(line, font key) of every non-blank line of the page's text elements."""
+        for el in elements:
+            if el.get('type') == 'text':
+                for line in el.get('text', '').rstrip('\n').split('\n'):
+                    if line.strip():
+                        yield line, font_key(el)
+    
+    def _apply_overlays(self, page, elements: List[Dict[str, Any]], incremental: bool = False):
+        """
+        Draws the elements of one page on top of its original content.
+        Incremental updates write WinAnsi text with unembedded standard
+        fonts and other text with the subset Unicode fonts.
+        """
+        page_height = page.rect.height
+        
+        # All text of the page goes through one TextWriter, written at the end
+        text_writer = fitz.TextWriter(page.rect)
+        has_text = False
+        
+        for el in elements:
+            el_type = el.get('type')
             
-            for el in elements:
-                el_type = el.get('type')
+            if el_type == 'text':
+                text = el.get('text', '')
+                x = el.get('x', 0)
+                y = el.get('y', 0)
+                font_size = el.get('font_size', 12)
                 
-                if el_type == 'text':
-                    text = el.get('text', '')
-                    x = el.get('x', 0)
-                    y = el.get('y', 0)
-                    font_size = el.get('font_size', 12)
-                    
-                    # Convert Qt (top-left) to PDF (bottom-left)
-                    # Qt (x, y) represents the top-left corner of the text bounding box
-                    # We need to convert this to the baseline position for fitz.insert_text
-                    
-                    # First, convert top-left from Qt to PDF coordinates
-                    pdf_x, pdf_y = CoordinateConverter.qt_to_pdf(x, y, page_height, scale=1.0)
-                    
-                    # pdf_y now represents the TOP of the text in PDF coordinates
-                    # insert_text expects the baseline position (bottom of the text)
-                    # In PDF coordinates, Y increases upward, so baseline = top - font_size
-                    # We use 0.85 * font_size as a better approximation for the baseline offset
-                    # (this accounts for typical font metrics where baseline is ~85% from top)
-                    baseline_offset = font_size * 0.85
-                    insert_pt = fitz.Point(pdf_x, pdf_y - baseline_offset)
-                    
-                    page.insert_text(insert_pt, text, fontsize=font_size, color=(0, 0, 0))
-                    
-                elif el_type == 'image':
-                    pixmap = el.get('pixmap') # Expecting QPixmap or bytes?
-                    # We will pass QPixmap from GUI, but we need bytes here.
-                    # Or we can save QPixmap to bytes in GUI.
-                    # Let's assume we get bytes or a path.
-                    
-                    # Actually, let's handle QPixmap in GUI and pass bytes here to keep logic pure?
-                    # Or just pass the bytes.
-                    image_data = el.get('image_data') # bytes
-                    
-                    x = el.get('x', 0)
-                    y = el.get('y', 0)
-                    w = el.get('w', 0)
-                    h = el.get('h', 0)
-                    
-                    # Convert Rect to PDF
-                    pdf_x0, pdf_y0, pdf_x1, pdf_y1 = CoordinateConverter.qt_rect_to_pdf_rect(x, y, w, h, page_height, scale=1.0)
-                    
-                    # fitz expects rect as (x0, y0, x1, y1)
-                    # But wait, our utility returns (x0, y0, x1, y1) where y0 is bottom, y1 is top.
-                    # fitz.Rect(x0, y0, x1, y1) works fine.
-                    
-                    rect = fitz.Rect(pdf_x0, pdf_y0, pdf_x1, pdf_y1)
-                    
-                    if image_data:
-                        page.insert_image(rect, stream=image_data)
-
-        out_doc.save(self.output_path)
-        out_doc.close()
-        self.doc.close()
+                # Convert Qt (top-left) to PDF (bottom-left)
+                # Qt (x, y) represents the top-left corner of the text bounding box
+                # We need to convert this to the baseline position for fitz.insert_text
+                
+                # First, convert top-left from Qt to PDF coordinates
+                pdf_x, pdf_y = CoordinateConverter.qt_to_pdf(x, y, page_height, scale=1.0)
+                
+                # pdf_y now represents the TOP of the text in PDF coordinates
+                # insert_text expects the baseline position (bottom of the text)
+                # In PDF coordinates, Y increases upward, so baseline = top - font_size
+                # We use 0.85 * font_size as a better approximation for the baseline offset
+                # (this accounts for typical font metrics where baseline is ~85% from top)
+                baseline_offset = font_size * 0.85
+                insert_pt = fitz.Point(pdf_x, pdf_y - baseline_offset)
+                
+                line_height = font_size * LINE_SPACING
+                for i, line in enumerate(text.rstrip('\n').split('\n')):
+                    if not line.strip():
+                        continue
+                    point = insert_pt + (0, i * line_height)
+                    if incremental and is_winansi(line):
+                        page.insert_text(point, line, fontsize=font_size, color=(0, 0, 0),
+                                         fontname=self.fonts.standard_name(font_key(el)))
+                        continue
+                    if incremental:
+                        font = self.fonts.unicode_font(font_key(el))
+                    else:
+                        font = self.fonts.font_for(line, font_key(el))
+                    text_writer.append(point, line, font=font, fontsize=font_size)
+                    has_text = True
+                
+            elif el_type == 'image':
+                pixmap = el.get('pixmap') # Expecting QPixmap or bytes?
+                # We will pass QPixmap from GUI, but we need bytes here.
+                # Or we can save QPixmap to bytes in GUI.
+                # Let's assume we get bytes or a path.
+                
+                # Actually, let's handle QPixmap in GUI and pass bytes here to keep logic pure?
+                # Or just pass the bytes.
+                image_data = el.get('image_data') # bytes
+                
+                x = el.get('x', 0)
+                y = el.get('y', 0)
+                w = el.get('w', 0)
+                h = el.get('h', 0)
+                
+                # Convert Rect to PDF
+                pdf_x0, pdf_y0, pdf_x1, pdf_y1 = CoordinateConverter.qt_rect_to_pdf_rect(x, y, w, h, page_height, scale=1.0)
+                
+                # fitz expects rect as (x0, y0, x1, y1)
+                # But wait, our utility returns (x0, y0, x1, y1) where y0 is bottom, y1 is top.
+                # fitz.Rect(x0, y0, x1, y1) works fine.
+                
+                rect = fitz.Rect(pdf_x0, pdf_y0, pdf_x1, pdf_y1)
+                
+                if image_data:
+                    page.insert_image(rect, stream=image_data)
+        
+        if has_text:
+            text_writer.write_text(page, color=(0, 0, 0))
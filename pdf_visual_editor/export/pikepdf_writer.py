@@ -1,91 +1,233 @@
 import pikepdf
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from utils.geometry import CoordinateConverter
-from qt_compat import QPixmap, QImage, QBuffer, QIODevice
+from export.page_runs import plan_ref_runs, dirty_pages_from_data
+from export.font_manager import PikeFontManager, font_key, LINE_SPACING
+from export.profiles import ExportReport, get_profile
+from utils.pdf_source import is_pdf_path
+from utils.page_order import PageRef, normalize_refs
+from collections import Counter
 import io
+import os
+import time
+import zlib
 
 class PikePDFWriter:
     """
     Handles saving modified PDFs using pikepdf to preserve all PDF features.
     This replaces the PyMuPDF-based PDFWriter for better PDF preservation.
     """
-    def __init__(self, source_path: str):
+    def __init__(self, source_path, font_paths: Optional[Dict[str, str]] = None,
+                 page_sources: Optional[List[str]] = None):
         """
         Initialize the writer with a source PDF.
         
         Args:
-            source_path: Path to the source PDF file
+            source_path: Path to the source PDF file, or a seekable binary
+                file object (embedded PDFs; pikepdf reads it on demand)
+            font_paths: Optional mapping of font family to TrueType file,
+                used for text that standard PDF fonts can't encode
+            page_sources: Paths of the PDFs pages were inserted from, by
+                source number (see utils/page_order.py); entry 0 is unused
         """
         self.source_path = source_path
+        self.font_paths = font_paths
         self.pdf = pikepdf.open(source_path)
+        self.page_sources = list(page_sources or [None])
+        self._source_pdfs = {0: self.pdf}
     
     def save(self, output_path: str, pages_data: Dict[int, List[Dict[str, Any]]], 
-             page_order: Optional[List[int]] = None):
+             page_order: Optional[List[Union[int, PageRef]]] = None, profile=None) -> ExportReport:
         """
         Saves the PDF with modifications.
         
         Args:
             output_path: Path where the output PDF should be saved
-            pages_data: Dict mapping page_num (int) to list of element modifications
-            page_order: Optional list of page numbers for reordering pages
+            pages_data: Dict mapping page id (int) to list of element modifications.
+                Pages without elements are copied verbatim from the source.
+            page_order: Optional page order: PageRefs (pages of any source,
+                rotated) or page numbers of the source PDF
+            profile: Optional export profile (name or ExportProfile) with
+                image downsampling and compression settings
+                
+        Returns:
+            ExportReport with the output size and timings
         """
+        profile = get_profile(profile)
+        report = ExportReport(profile, self.source_path, output_path)
+        started = time.perf_counter()
+        
         # Create a new PDF for output
         out_pdf = pikepdf.new()
         
         # Determine page order
-        if page_order is None:
-            page_order = list(range(len(self.pdf.pages)))
+        refs = normalize_refs(page_order, len(self.pdf.pages))
         
-        # Process each page in order
-        for page_num in page_order:
-            if page_num >= len(self.pdf.pages):
+        # Only pages with elements get overlays. Runs of untouched pages are
+        # appended in bulk (a whole merged document at a time), without
+        # reading their MediaBox or elements.
+        dirty_pages = dirty_pages_from_data(pages_data)
+        fonts = PikeFontManager(out_pdf, self.font_paths)
+        page_counts = {source: len(self._source_pdf(source).pages)
+                       for source in {ref.source for ref in refs}
+                       if 0 <= source < len(self.page_sources)}
+
+        # Source pages listed more than once (duplicates) are copied once
+        # per occurrence, see _append_page()
+        occurrences = Counter((ref.source, ref.index) for ref in refs)
+
+        for run in plan_ref_runs(refs, dirty_pages, page_counts):
+            if run[0] == "copy":
+                _, source, first, last, rotation = run
+                if all(occurrences[source, index] == 1 for index in range(first, last + 1)):
+                    out_pdf.pages.extend(self._source_pdf(source).pages[first:last + 1])
+                else:
+                    for index in range(first, last + 1):
+                        self._append_page(out_pdf, source, index, occurrences[source, index] > 1)
+                self._rotate_last_pages(out_pdf, last - first + 1, rotation)
                 continue
-                
+
             # Copy the original page
-            page = self.pdf.pages[page_num]
-            out_pdf.pages.append(page)
-            
+            ref = run[1]
+            self._append_page(out_pdf, ref.source, ref.index,
+                              occurrences[ref.source, ref.index] > 1)
+
             # Get the last added page to modify it
             current_page = out_pdf.pages[-1]
-            
+
             # Get page dimensions
             mediabox = current_page.MediaBox
-            page_width = float(mediabox[2] - mediabox[0])
             page_height = float(mediabox[3] - mediabox[1])
-            
-            # Get elements for this page
-            elements = pages_data.get(page_num, [])
-            
-            # Track elements to remove (by marking them)
+
             # pikepdf doesn't have a simple "remove element" API,
             # so we'll overlay new content on top
-            
-            # Apply modifications
-            for el in elements:
+            overlay = []
+            for el in pages_data[ref.id]:
                 el_type = el.get('type')
                 
                 if el_type == 'text':
-                    self._add_text_element(current_page, el, page_height)
+                    overlay.append(self._add_text_element(current_page, el, page_height, fonts))
                 elif el_type == 'image':
-                    self._add_image_element(current_page, el, page_height, out_pdf)
+                    overlay.append(self._add_image_element(current_page, el, page_height, out_pdf))
+            
+            self._append_overlay(current_page, overlay, out_pdf)
+            # Overlays are in the page's own coordinates; turn it last
+            self._rotate_last_pages(out_pdf, 1, ref.rotation)
+        
+        # Embed the fonts used by all pages, once
+        fonts.finalize()
+        report.time_stage("pages", started)
+        
+        if profile is not None:
+            from export.image_optimizer import downsample_images
+            started = time.perf_counter()
+            downsample_images(out_pdf, profile, report)
+            report.time_stage("images", started)
         
-        # Save the output PDF
-        out_pdf.save(output_path)
-        out_pdf.close()
+        started = time.perf_counter()
+        save_options = self._save_options(profile)
+        
+        # Save the output PDF. qpdf has no incremental (append-only) writer,
+        # so overwriting the source goes through a temporary file; use
+        # PDFWriter for incremental saves.
+        if self._writes_to_source(output_path):
+            tmp_path = output_path + ".tmp"
+            self._save_with_options(out_pdf, tmp_path, save_options, profile)
+            out_pdf.close()
+            self.pdf.close()
+            os.replace(tmp_path, output_path)
+        else:
+            self._save_with_options(out_pdf, output_path, save_options, profile)
+            out_pdf.close()
+        report.time_stage("write", started)
+        return report.finish()
+    
+    def _source_pdf(self, source: int) -> pikepdf.Pdf:
+        """Pdf of a source number (source 0 is the source PDF)."""
+        pdf = self._source_pdfs.get(source)
+        if pdf is None:
+            pdf = self._source_pdfs[source] = pikepdf.open(self.page_sources[source])
+        return pdf
+    
+    def _append_page(self, out_pdf: pikepdf.Pdf, source: int, index: int, separate: bool):
+        """
+        Appends a source page to the output. A separate copy gets a page
+        dictionary and resources of its own: qpdf copies a foreign object
+        once, so copies of one page would otherwise share their /Rotate and
+        the resources overlays are added to.
+        """
+        page = self._source_pdf(source).pages[index]
+        if not separate:
+            out_pdf.pages.append(page)
+            return
+        page_obj = pikepdf.Dictionary(out_pdf.copy_foreign(page.obj))
+        resources = page_obj.get(pikepdf.Name.Resources)
+        if isinstance(resources, pikepdf.Dictionary):
+            resources = pikepdf.Dictionary(resources)
+            for category in (pikepdf.Name.Font, pikepdf.Name.XObject):
+                if isinstance(resources.get(category), pikepdf.Dictionary):
+                    resources[category] = pikepdf.Dictionary(resources[category])
+            page_obj.Resources = resources
+        out_pdf.pages.append(pikepdf.Page(out_pdf.make_indirect(page_obj)))
+    
+    @staticmethod
+    def _rotate_last_pages(out_pdf: pikepdf.Pdf, count: int, rotation: int):
+        """Turns the last count pages by rotation degrees, on top of their own /Rotate."""
+        if not rotation:
+            return
+        for page_num in range(len(out_pdf.pages) - count, len(out_pdf.pages)):
+            out_pdf.pages[page_num].rotate(rotation, relative=True)
+    
+    def _save_options(self, profile) -> Dict[str, Any]:
+        """pikepdf save() keyword arguments for an export profile."""
+        if profile is None:
+            return {}
+        return {
+            'compress_streams': True,
+            'object_stream_mode': (pikepdf.ObjectStreamMode.generate if profile.object_streams
+                                   else pikepdf.ObjectStreamMode.disable),
+            'recompress_flate': profile.recompress_streams,
+            'linearize': profile.linearize,
+        }
+    
+    def _save_with_options(self, out_pdf: pikepdf.Pdf, path: str, options: Dict[str, Any], profile):
+        # The Flate level is a global qpdf setting, so it's restored right after
+        if profile is None:
+            out_pdf.save(path)
+            return
+        pikepdf.settings.set_flate_compression_level(profile.compression_level)
+        try:
+            out_pdf.save(path, **options)
+        finally:
+            pikepdf.settings.set_flate_compression_level(-1)
+    
+    def _writes_to_source(self, output_path: str) -> bool:
+        if not is_pdf_path(self.source_path):
+            return False
+        try:
+            return os.path.samefile(self.source_path, output_path)
+        except OSError:
+            return False
     
-    def _add_text_element(self, page, element: Dict[str, Any], page_height: float):
+    def _add_text_element(self, page, element: Dict[str, Any], page_height: float,
+                          fonts: PikeFontManager) -> bytes:
         """
-        Adds a text element to a page.
+        Builds the content for a text element on a page.
         
         Args:
             page: pikepdf Page object
             element: Element dictionary with text, position, and formatting
             page_height: Height of the page for coordinate conversion
+            fonts: Font manager shared by all pages of the output document
+            
+        Returns:
+            Content stream bytes showing the text
         """
         text = element.get('text', '')
         x = element.get('x', 0)
         y = element.get('y', 0)
         font_size = element.get('font_size', 12)
+        key = font_key(element)
         
         # Convert Qt coordinates to PDF coordinates
         pdf_x, pdf_y = CoordinateConverter.qt_to_pdf(x, y, page_height, scale=1.0)
@@ -94,28 +236,33 @@ class PikePDFWriter:
         baseline_offset = font_size * 0.85
         pdf_y_baseline = pdf_y - baseline_offset
         
-        # Create content stream for text
-        # This is a simplified version - for production, consider using reportlab or similar
-        content = f"""
-        BT
-        /F1 {font_size} Tf
-        {pdf_x} {pdf_y_baseline} Td
-        ({self._escape_pdf_string(text)}) Tj
-        ET
-        """.encode('latin-1')
-        
-        # Append to page content stream
-        if '/Contents' in page:
-            # Get existing content
-            existing_content = page.Contents.read_bytes()
-            # Append new content
-            new_content = existing_content + b'\n' + content
-            page.Contents = pikepdf.Stream(page.pdf, new_content)
-        else:
-            # Create new content stream
-            page.Contents = pikepdf.Stream(page.pdf, content)
+        parts = [
+            b"BT",
+            b"0 g",
+            f"{pdf_x:.2f} {pdf_y_baseline:.2f} Td".encode('ascii'),
+            f"{font_size * LINE_SPACING:.2f} TL".encode('ascii'),
+        ]
+        
+        # Each line may need a different font (standard vs. embedded Unicode),
+        # so Tf is emitted only when the selected font changes
+        current_font = None
+        for i, line in enumerate(text.rstrip('\n').split('\n')):
+            if i > 0:
+                parts.append(b"T*")
+            line = line.rstrip('\r')
+            if not line:
+                continue
+            font_name, operand = fonts.encode_text(page, line, key)
+            if font_name != current_font:
+                parts.append(f"{font_name} {font_size:.2f} Tf".encode('ascii'))
+                current_font = font_name
+            parts.append(operand + b" Tj")
+        
+        parts.append(b"ET")
+        return b"\n".join(parts)
     
-    def _add_image_element(self, page, element: Dict[str, Any], page_height: float, pdf: pikepdf.Pdf):
+    def _add_image_element(self, page, element: Dict[str, Any], page_height: float,
+                           pdf: pikepdf.Pdf) -> bytes:
         """
         Adds an image element to a page.
         
@@ -124,6 +271,9 @@ class PikePDFWriter:
             element: Element dictionary with image data and position
             page_height: Height of the page for coordinate conversion
             pdf: The output PDF document
+            
+        Returns:
+            Content stream bytes placing the image (empty on failure)
         """
         image_data = element.get('image_data')
         x = element.get('x', 0)
@@ -132,7 +282,7 @@ class PikePDFWriter:
         h = element.get('h', 100)
         
         if not image_data:
-            return
+            return b""
         
         # Convert Qt rect to PDF rect
         pdf_x0, pdf_y0, pdf_x1, pdf_y1 = CoordinateConverter.qt_rect_to_pdf_rect(
@@ -141,69 +291,86 @@ class PikePDFWriter:
         
         # Create image XObject from bytes
         try:
-            # Convert image bytes to PIL Image first
-            from PIL import Image
-            img_buffer = io.BytesIO(image_data)
-            pil_image = Image.open(img_buffer)
-            
-            # Convert to RGB if necessary
-            if pil_image.mode not in ('RGB', 'L'):
-                pil_image = pil_image.convert('RGB')
-            
-            # Create pikepdf image
-            img_obj = pikepdf.PdfImage(pil_image)
-            
-            # Generate a unique name for this image
-            img_name = f'/Im{len(page.get("/Resources", {}).get("/XObject", {}))}'
+            img_obj = self._make_image_xobject(pdf, image_data)
             
-            # Add to page resources
-            if '/Resources' not in page:
-                page.Resources = pikepdf.Dictionary()
-            if '/XObject' not in page.Resources:
-                page.Resources.XObject = pikepdf.Dictionary()
+            # Add to page resources under a name that can't clash with the
+            # source page's own XObjects (inherited resources are kept)
+            img_name = page.add_resource(img_obj, pikepdf.Name.XObject, prefix="OvIm",
+                                         replace_existing=False)
             
-            page.Resources.XObject[img_name] = img_obj
-            
-            # Create content stream to place the image
+            # Place the image
             # PDF uses: cm (concat matrix), Do (invoke XObject)
-            # [a b c d e f] cm: transformation matrix
             # For placing at (x, y) with size (w, h):
             # scale: w, 0, 0, h; translate: x, y
-            content = f"""
-            q
-            {pdf_x1 - pdf_x0} 0 0 {pdf_y1 - pdf_y0} {pdf_x0} {pdf_y0} cm
-            {img_name} Do
-            Q
-            """.encode('latin-1')
-            
-            # Append to page content
-            if '/Contents' in page:
-                existing_content = page.Contents.read_bytes()
-                new_content = existing_content + b'\n' + content
-                page.Contents = pikepdf.Stream(pdf, new_content)
-            else:
-                page.Contents = pikepdf.Stream(pdf, content)
+            return (
+                f"q\n{pdf_x1 - pdf_x0:.2f} 0 0 {pdf_y1 - pdf_y0:.2f} {pdf_x0:.2f} {pdf_y0:.2f} cm\n"
+                f"{img_name} Do\nQ"
+            ).encode('latin-1')
                 
         except Exception as e:
             print(f"Failed to add image: {e}")
+            return b""
     
-    def _escape_pdf_string(self, text: str) -> str:
+    def _make_image_xobject(self, pdf: pikepdf.Pdf, image_data: bytes):
         """
-        Escapes special characters in PDF strings.
+        Creates an image XObject from encoded image bytes (PNG, JPEG, ...).
         
         Args:
-            text: Input text
+            pdf: The output PDF document
+            image_data: Encoded image bytes
             
         Returns:
-            Escaped text suitable for PDF string literals
+            Indirect image XObject stream
         """
-        # Escape backslashes and parentheses
-        text = text.replace('\\', '\\\\')
-        text = text.replace('(', '\\(')
-        text = text.replace(')', '\\)')
-        return text
+        from PIL import Image
+        pil_image = Image.open(io.BytesIO(image_data))
+        
+        # Keep the alpha channel as a soft mask
+        smask = None
+        if pil_image.mode in ('RGBA', 'LA', 'P'):
+            pil_image = pil_image.convert('RGBA')
+            alpha = pil_image.getchannel('A')
+            if alpha.getextrema() != (255, 255):
+                smask = pikepdf.Stream(pdf, zlib.compress(alpha.tobytes()))
+                smask.Type = pikepdf.Name.XObject
+                smask.Subtype = pikepdf.Name.Image
+                smask.Width, smask.Height = alpha.size
+                smask.ColorSpace = pikepdf.Name.DeviceGray
+                smask.BitsPerComponent = 8
+                smask.Filter = pikepdf.Name.FlateDecode
+            pil_image = pil_image.convert('RGB')
+        elif pil_image.mode not in ('RGB', 'L'):
+            pil_image = pil_image.convert('RGB')
+        
+        image = pikepdf.Stream(pdf, zlib.compress(pil_image.tobytes()))
+        image.Type = pikepdf.Name.XObject
+        image.Subtype = pikepdf.Name.Image
+        image.Width, image.Height = pil_image.size
+        image.ColorSpace = pikepdf.Name.DeviceGray if pil_image.mode == 'L' else pikepdf.Name.DeviceRGB
+        image.BitsPerComponent = 8
+        image.Filter = pikepdf.Name.FlateDecode
+        if smask is not None:
+            image.SMask = smask
+        return pdf.make_indirect(image)
+    
+    def _append_overlay(self, page, chunks: List[bytes], pdf: pikepdf.Pdf):
+        """
+        Appends all overlay content of a page as a single new content stream.
+        
+        The original content is wrapped in q/Q so its graphics state can't
+        leak into the overlay, and is never read or rewritten.
+        """
+        chunks = [chunk for chunk in chunks if chunk]
+        if not chunks:
+            return
+        page.contents_add(pikepdf.Stream(pdf, b"q\n"), prepend=True)
+        page.contents_add(pikepdf.Stream(pdf, b"Q\n" + b"\n".join(chunks) + b"\n"))
     
     def close(self):
         """Close the PDF document."""
         if self.pdf:
             self.pdf.close()
+        # PDFs pages were inserted from
+        for source, pdf in self._source_pdfs.items():
+            if source:
+                pdf.close()
@@ -0,0 +1,217 @@
+"""
+Named export optimization profiles and the report produced by an export.
+
+A profile tells the writers how to trade size for fidelity when saving:
+image downsampling above a target DPI, how downsampled images are
+recompressed, object streams, Flate compression level and linearization
+(fast web view). Exports without a profile keep the default save() settings.
+"""
+
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from utils.pdf_source import is_pdf_path, source_size
+
+# Images within this factor of the target DPI are left alone: resampling them
+# costs quality for almost no size gain.
+DPI_TOLERANCE = 1.25
+
+
+class ExportProfile:
+    """Save settings applied by PDFWriter and PikePDFWriter."""
+    def __init__(self, name: str, description: str = "",
+                 image_dpi: Optional[float] = None,
+                 image_format: str = "jpeg",
+                 jpeg_quality: int = 85,
+                 object_streams: bool = True,
+                 compression_level: int = 6,
+                 recompress_streams: bool = False,
+                 linearize: bool = False,
+                 threads: Optional[int] = None):
+        """
+        Args:
+            name: Profile name ("print", "screen", "archive", ...)
+            description: Human readable summary
+            image_dpi: Downsample images shown above this resolution
+                (None keeps every image untouched)
+            image_format: "jpeg" (lossy) or "flate" (lossless) for
+                downsampled images
+            jpeg_quality: JPEG quality (1-95) when image_format is "jpeg"
+            object_streams: Pack objects into compressed object streams
+            compression_level: Flate level for streams (0-9)
+            recompress_streams: Recompress existing Flate streams at that level
+            linearize: Write a linearized file (fast web view)
+            threads: Worker threads for image recompression (None = CPU count)
+        """
+        self.name = name
+        self.description = description
+        self.image_dpi = image_dpi
+        self.image_format = image_format
+        self.jpeg_quality = jpeg_quality
+        self.object_streams = object_streams
+        self.compression_level = compression_level
+        self.recompress_streams = recompress_streams
+        self.linearize = linearize
+        self.threads = threads
+
+    @property
+    def worker_count(self) -> int:
+        return self.threads or os.cpu_count() or 1
+
+    def __repr__(self):
+        return f"ExportProfile({self.name!r})"
+
+
+PROFILES = {
+    "print": ExportProfile(
+        "print",
+        description="High quality for printing: 300 DPI images, object streams.",
+        image_dpi=300,
+        jpeg_quality=90,
+        compression_level=6,
+    ),
+    "screen": ExportProfile(
+        "screen",
+        description="Smallest file for on-screen reading: 150 DPI JPEG images, "
+                    "maximum compression, fast web view.",
+        image_dpi=150,
+        jpeg_quality=75,
+        compression_level=9,
+        recompress_streams=True,
+        linearize=True,
+    ),
+    "archive": ExportProfile(
+        "archive",
+        description="Lossless long-term storage: images untouched, "
+                    "no object streams, maximum compression.",
+        image_dpi=None,
+        image_format="flate",
+        object_streams=False,
+        compression_level=9,
+        recompress_streams=True,
+    ),
+}
+
+
+def get_profile(profile) -> Optional[ExportProfile]:
+    """
+    Resolves a profile name (or an ExportProfile) to an ExportProfile.
+
+    Raises:
+        ValueError: If the name is not a known profile
+    """
+    if profile is None or isinstance(profile, ExportProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown export profile: {profile!r} "
+                         f"(expected one of {', '.join(PROFILES)})")
+
+
+def downsample_size(pixel_size: Tuple[int, int], display_size: Tuple[float, float],
+                    dpi: float):
+    """
+    Pixel size an image should be resampled to, or None to keep it.
+
+    Args:
+        pixel_size: (width, height) of the image in pixels
+        display_size: Largest (width, height) it is drawn at, in points
+        dpi: Target resolution
+
+    Returns:
+        (width, height) in pixels, or None if the image is not above the target
+    """
+    px_w, px_h = pixel_size
+    pt_w, pt_h = display_size
+    if pt_w <= 0 or pt_h <= 0:
+        return None
+    effective_dpi = min(px_w / (pt_w / 72.0), px_h / (pt_h / 72.0))
+    if effective_dpi <= dpi * DPI_TOLERANCE:
+        return None
+    scale = dpi / effective_dpi
+    return max(1, round(px_w * scale)), max(1, round(px_h * scale))
+
+
+class ExportReport:
+    """Size and timing figures of one export, returned by the writers' save()."""
+    def __init__(self, profile: Optional[ExportProfile], source_path, output_path: str):
+        self.profile_name = profile.name if profile else None
+        # Embedded source PDFs are file objects; the summary only names them
+        self.source_path = source_path if is_pdf_path(source_path) else "<embedded>"
+        self.output_path = output_path
+        self.incremental = False
+        self.input_bytes = _file_size(source_path)
+        self.output_bytes = 0
+        self.images_examined = 0
+        self.images_downsampled = 0
+        self.image_bytes_before = 0
+        self.image_bytes_after = 0
+        self.timings = {}  # stage -> seconds
+        self._started = time.perf_counter()
+
+    def time_stage(self, stage: str, started: float):
+        """Record the duration of a stage that began at `started` (perf_counter)."""
+        self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - started
+
+    def finish(self):
+        """Stop the clock and read the size of the written file."""
+        self.timings["total"] = time.perf_counter() - self._started
+        self.output_bytes = _file_size(self.output_path)
+        return self
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.input_bytes - self.output_bytes
+
+    @property
+    def image_bytes_saved(self) -> int:
+        return self.image_bytes_before - self.image_bytes_after
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "profile": self.profile_name,
+            "source": self.source_path,
+            "output": self.output_path,
+            "incremental": self.incremental,
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "bytes_saved": self.bytes_saved,
+            "images_examined": self.images_examined,
+            "images_downsampled": self.images_downsampled,
+            "image_bytes_saved": self.image_bytes_saved,
+            "timings": {stage: round(seconds, 4) for stage, seconds in self.timings.items()},
+        }
+
+    def summary(self) -> str:
+        """One-paragraph description for status bars and message boxes."""
+        lines = [f"Profile: {self.profile_name or 'default'}"]
+        if self.incremental:
+            lines.append("Saved incrementally (changes appended to the source file)")
+        if self.input_bytes:
+            percent = 100.0 * self.bytes_saved / self.input_bytes
+            lines.append(f"Size: {_format_bytes(self.input_bytes)} -> "
+                         f"{_format_bytes(self.output_bytes)} ({percent:.1f}% saved)"
+                         if self.bytes_saved >= 0 else
+                         f"Size: {_format_bytes(self.input_bytes)} -> {_format_bytes(self.output_bytes)}")
+        if self.images_downsampled:
+            lines.append(f"Images downsampled: {self.images_downsampled}/{self.images_examined} "
+                         f"({_format_bytes(self.image_bytes_saved)} saved)")
+        lines.append(f"Time: {self.timings.get('total', 0.0):.2f}s")
+        return "\n".join(lines)
+
+
+def _file_size(source) -> int:
+    try:
+        return source_size(source)
+    except (OSError, ValueError):
+        return 0
+
+
+def _format_bytes(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(value) < 1024 or unit == "GB":
+            return f"{value:.1f} {unit}" if unit != "B" else f"{int(value)} B"
+        value /= 1024
@@ -0,0 +1,127 @@
+"""
+Conversion of .omar project element dicts into PDF writer input.
+
+Project files store each item as it was in the scene (position, transform
+matrix, base64 image data); the writers expect scene bounding boxes and raw
+image bytes. Doing the conversion here, without building Qt items, lets
+projects be exported headless.
+"""
+
+import base64
+from typing import Any, Dict, List, Optional
+
+from export.font_manager import LINE_SPACING
+from utils.page_order import PageOrder, PageRef
+
+_IDENTITY = [1, 0, 0, 1, 0, 0]
+
+
+def _scene_bounds(element: Dict[str, Any], width: float, height: float):
+    """
+    Scene bounding box (x, y, w, h) of an item with the given local size,
+    the same box QGraphicsItem.sceneBoundingRect() returns.
+    """
+    matrix = element.get("transform_matrix") or _IDENTITY
+    if len(matrix) != 6:
+        matrix = _IDENTITY
+    m11, m12, m21, m22, dx, dy = (float(v) for v in matrix)
+    pos_x = float(element.get("x", 0))
+    pos_y = float(element.get("y", 0))
+
+    xs = []
+    ys = []
+    for local_x, local_y in ((0, 0), (width, 0), (0, height), (width, height)):
+        xs.append(m11 * local_x + m21 * local_y + dx + pos_x)
+        ys.append(m12 * local_x + m22 * local_y + dy + pos_y)
+    return min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+
+
+def project_element_to_export(element: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Converts one project element into a writer element dict.
+
+    Elements that are not in project format (no transform matrix, e.g.
+    dicts already in writer format) are returned as is.
+
+    Args:
+        element: Element dict as stored in an .omar file
+
+    Returns:
+        Writer element dict, or None for hidden and unsupported elements
+    """
+    if "transform_matrix" not in element:
+        return element
+    if not element.get("visible", True):
+        return None
+
+    el_type = element.get("type")
+    if el_type == "text":
+        text = element.get("text", "")
+        font_size = float(element.get("font_size", 12))
+        # Only the top-left corner is used by the writers, so a rough text
+        # extent is enough for rotated or mirrored items
+        lines = text.split("\n") or [""]
+        width = max(len(line) for line in lines) * font_size * 0.5
+        height = len(lines) * font_size * LINE_SPACING
+        x, y, _, _ = _scene_bounds(element, width, height)
+        scale = float((element.get("transform_matrix") or _IDENTITY)[0])
+        return {
+            'type': 'text',
+            'text': text,
+            'x': x,
+            'y': y,
+            'font_size': font_size * scale,
+            'font_family': element.get("font_family"),
+            'font_bold': element.get("font_bold", False),
+            'font_italic': element.get("font_italic", False),
+        }
+
+    if el_type == "image":
+        image_data = element.get("image_data")
+        if not image_data:
+            return None
+        if isinstance(image_data, str):
+            image_data = base64.b64decode(image_data)
+        x, y, w, h = _scene_bounds(element, float(element.get("width", 100)),
+                                   float(element.get("height", 100)))
+        return {
+            'type': 'image',
+            'image_data': image_data,
+            'x': x,
+            'y': y,
+            'w': w,
+            'h': h,
+        }
+
+    # Shapes are editor guides only and are not exported
+    return None
+
+
+def project_elements_to_export(elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Converts the elements of one page, bottom-most first (by z value)."""
+    ordered = sorted(elements, key=lambda el: el.get("z_value", 0))
+    converted = (project_element_to_export(el) for el in ordered)
+    return [el for el in converted if el is not None]
+
+
+def project_pages_data(project_data: Dict[str, Any]) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Builds the writers' pages_data dict from a loaded project.
+
+    Pages without exportable elements are left out so the writers copy
+    them verbatim.
+    """
+    pages_data = {}
+    for page in project_data.get("pages", []):
+        elements = project_elements_to_export(page.get("elements") or [])
+        if elements:
+            pages_data[page.get("page_num", 0)] = elements
+    return pages_data
+
+
+def project_page_refs(project_data: Dict[str, Any], page_count: int) -> List[PageRef]:
+    """
+    Saved page order of a project as PageRefs, with its inserted,
+    duplicated and rotated pages (see utils/page_order.py).
+    """
+    return PageOrder.from_table(project_data, page_count).refs()
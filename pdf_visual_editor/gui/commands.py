@@ -5,20 +5,29 @@ Each command encapsulates a single operation that can be undone and redone.
 from qt_compat import QUndoCommand, QPointF, QGraphicsItem
 
 
+def _mark_edited(scene, items=(), op="update"):
+    """Tell the scene owning an item that its content changed (feeds the autosave journal)."""
+    if scene is not None and hasattr(scene, 'mark_edited'):
+        scene.mark_edited(items, op)
+
+
 class MoveItemCommand(QUndoCommand):
     """Command for moving graphics items."""
     
     def __init__(self, item: QGraphicsItem, old_pos: QPointF, new_pos: QPointF):
         super().__init__("Move Item")
         self.item = item
+        self.scene = item.scene()
         self.old_pos = old_pos
         self.new_pos = new_pos
     
     def undo(self):
         self.item.setPos(self.old_pos)
+        _mark_edited(self.scene, [self.item])
     
     def redo(self):
         self.item.setPos(self.new_pos)
+        _mark_edited(self.scene, [self.item])
 
 
 class ResizeItemCommand(QUndoCommand):
@@ -27,6 +36,7 @@ class ResizeItemCommand(QUndoCommand):
     def __init__(self, item: QGraphicsItem, old_rect, new_rect):
         super().__init__("Resize Item")
         self.item = item
+        self.scene = item.scene()
         self.old_rect = old_rect
         self.new_rect = new_rect
     
@@ -34,11 +44,13 @@ class ResizeItemCommand(QUndoCommand):
         from qt_compat import QGraphicsRectItem
         if isinstance(self.item, QGraphicsRectItem):
             self.item.setRect(self.old_rect)
+        _mark_edited(self.scene, [self.item])
     
     def redo(self):
         from PyQt6.QtWidgets import QGraphicsRectItem
         if isinstance(self.item, QGraphicsRectItem):
             self.item.setRect(self.new_rect)
+        _mark_edited(self.scene, [self.item])
 
 
 class AddItemCommand(QUndoCommand):
@@ -56,11 +68,13 @@ class AddItemCommand(QUndoCommand):
             self.was_added = False
     
             self.was_added = False
+        _mark_edited(self.scene, [self.item], "delete")
     
     def redo(self):
         if self.item not in self.scene.items():
             self.scene.addItem(self.item)
             self.was_added = True
+        _mark_edited(self.scene, [self.item])
 
 
 class DeleteItemCommand(QUndoCommand):
@@ -77,11 +91,13 @@ class DeleteItemCommand(QUndoCommand):
             if item not in self.scene.items():
                 self.scene.addItem(item)
                 item.setPos(pos)
+        _mark_edited(self.scene, self.items)
     
     def redo(self):
         for item in self.items:
             if item in self.scene.items():
                 self.scene.removeItem(item)
+        _mark_edited(self.scene, self.items, "delete")
 
 
 class EditTextCommand(QUndoCommand):
@@ -90,14 +106,17 @@ class EditTextCommand(QUndoCommand):
     def __init__(self, text_item, old_text: str, new_text: str):
         super().__init__("Edit Text")
         self.text_item = text_item
+        self.scene = text_item.scene()
         self.old_text = old_text
         self.new_text = new_text
     
     def undo(self):
         self.text_item.setPlainText(self.old_text)
+        _mark_edited(self.scene, [self.text_item])
     
     def redo(self):
         self.text_item.setPlainText(self.new_text)
+        _mark_edited(self.scene, [self.text_item])
 
 
 class RotateItemCommand(QUndoCommand):
@@ -106,14 +125,17 @@ class RotateItemCommand(QUndoCommand):
     def __init__(self, item: QGraphicsItem, old_rotation: float, new_rotation: float):
         super().__init__("Rotate Item")
         self.item = item
+        self.scene = item.scene()
         self.old_rotation = old_rotation
         self.new_rotation = new_rotation
     
     def undo(self):
         self.item.setRotation(self.old_rotation)
+        _mark_edited(self.scene, [self.item])
     
     def redo(self):
         self.item.setRotation(self.new_rotation)
+        _mark_edited(self.scene, [self.item])
 
 
 class ScaleItemCommand(QUndoCommand):
@@ -122,11 +144,30 @@ class ScaleItemCommand(QUndoCommand):
     def __init__(self, item: QGraphicsItem, old_transform, new_transform):
         super().__init__("Scale Item")
         self.item = item
+        self.scene = item.scene()
         self.old_transform = old_transform
         self.new_transform = new_transform
     
     def undo(self):
         self.item.setTransform(self.old_transform)
+        _mark_edited(self.scene, [self.item])
     
     def redo(self):
         self.item.setTransform(self.new_transform)
+        _mark_edited(self.scene, [self.item])
+
+
+class PageOrderCommand(QUndoCommand):
+    """Command for changing the pages of the document (insert, delete, duplicate, rotate, move)."""
+    
+    def __init__(self, window, old_order, new_order, description: str = "Change Pages"):
+        super().__init__(description)
+        self.window = window
+        self.old_order = old_order  # PageOrder snapshots
+        self.new_order = new_order
+    
+    def undo(self):
+        self.window.apply_page_order(self.old_order)
+    
+    def redo(self):
+        self.window.apply_page_order(self.new_order)
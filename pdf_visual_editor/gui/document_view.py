@@ -0,0 +1,285 @@
+"""
+DocumentView — continuous vertical view of all the pages of a document.
+
+Pages are laid out from their sizes (utils/page_layout.py) and drawn as
+placeholders. Only the pages in and around the viewport are materialized,
+with their background render and editable items, and pages scrolled away
+are dropped back to placeholders, so memory and frame times depend on the
+viewport, not on the length of the document.
+
+The items of a page are built by the main window from the page's element
+model (or its layout analysis), and edits are reported per page, so the
+models stay the source of truth (see PageManagerMixin).
+"""
+
+from qt_compat import (QGraphicsView, QGraphicsPixmapItem, QGraphicsItem, QPainter,
+                       QColor, QPen, QBrush, QPointF, QRectF, Qt,
+                       Signal, QTimer)
+from omar_format import OmarFormat, ELEMENT_ID_KEY
+from .editor_canvas import EditorScene
+
+# QGraphicsItem data key holding the page an item of the view belongs to
+PAGE_KEY = ELEMENT_ID_KEY + 1
+
+
+class DocumentScene(EditorScene):
+    """Scene of the continuous view; edits are reported for the page of each item."""
+
+    def mark_edited(self, items=(), op="update"):
+        pages = []
+        for item in items:
+            page_num = item.data(PAGE_KEY)
+            if page_num is not None and page_num not in pages:
+                pages.append(page_num)
+        for page_num in pages:
+            self.contentEdited.emit(page_num)
+        for item in items:
+            page_num = item.data(PAGE_KEY)
+            if page_num is not None:
+                self.itemEdited.emit(page_num, item, op)
+
+
+class DocumentView(QGraphicsView):
+    """
+    Scrolling view over a PageLayout.
+
+    Pages are materialized one per event loop turn, those in the viewport
+    first, so scrolling stays responsive while a screenful is being built.
+    """
+    pageActivated = Signal(int)  # Double click on a page outside its items
+
+    def __init__(self, build_page, page_version, prefetch=None, undo_stack=None,
+                 parent=None, margin=1.0, max_pages=12):
+        """
+        Args:
+            build_page: page_num -> (background pixmap, background opacity,
+                items in page coordinates, model version of the page)
+            page_version: page_num -> current model version (None if unedited)
+            prefetch: Called with the page numbers about to be materialized
+            undo_stack: Undo stack of the editor
+            margin: Viewport heights materialized above and below the viewport
+            max_pages: Pages materialized at most (when zoomed out)
+        """
+        super().__init__(parent)
+        self.scene = DocumentScene(self, undo_stack=undo_stack)
+        self.setScene(self.scene)
+        self.undo_stack = undo_stack
+        self._build_page = build_page
+        self._page_version = page_version
+        self._prefetch = prefetch
+        self.margin = margin
+        self.max_pages = max_pages
+
+        self.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        self.setDragMode(QGraphicsView.DragMode.RubberBandDrag)
+
+        self.page_layout = None  # PageLayout of the document
+        self._pages = {}  # page_num -> [items (background first), model version]
+        self._queue = []  # Pages waiting to be materialized, most wanted first
+
+        self._timer = None
+        if QTimer is not None:
+            self._timer = QTimer(self)
+            self._timer.setInterval(0)
+            self._timer.timeout.connect(self._materialize_next)
+
+    # ------------------------------------------------------------------
+    # Layout and materialization
+    # ------------------------------------------------------------------
+
+    def set_layout(self, layout):
+        """Show another document (or none, with layout None)."""
+        self.release()
+        self.page_layout = layout
+        if layout is not None:
+            self.scene.setSceneRect(QRectF(0, 0, layout.width, layout.height))
+        self.update_visible()
+
+    def release(self):
+        """Drop every materialized page (e.g. when the view is hidden)."""
+        self._queue = []
+        for page_num in list(self._pages):
+            self._drop(page_num)
+
+    def update_visible(self):
+        """Materialize the pages around the viewport and drop the others."""
+        if self.page_layout is None or not self.isVisible():
+            return
+        wanted = self._wanted_pages()
+        for page_num in list(self._pages):
+            # Pages scrolled away, and pages edited in the page editor
+            # since they were built
+            if page_num not in wanted or self._pages[page_num][1] != self._page_version(page_num):
+                self._drop(page_num)
+
+        self._queue = [page_num for page_num in wanted if page_num not in self._pages]
+        if self._prefetch is not None and len(self._queue) > 1:
+            self._prefetch(self._queue[1:])
+        if self._timer is None:
+            while self._queue:
+                self._materialize_next()
+        elif self._queue and not self._timer.isActive():
+            self._timer.start()
+
+    def _wanted_pages(self):
+        """Pages in the viewport, then those within the margin, at most max_pages."""
+        visible = self.visible_rect()
+        margin = visible.height() * self.margin
+        layout = self.page_layout
+        pages = layout.pages_between(visible.top(), visible.bottom())
+        pages += [page_num for page_num in layout.pages_between(visible.top() - margin,
+                                                                visible.bottom() + margin)
+                  if page_num not in pages]
+        return pages[:self.max_pages]
+
+    def _materialize_next(self):
+        if not self._queue:
+            if self._timer is not None:
+                self._timer.stop()
+            return
+        page_num = self._queue.pop(0)
+        try:
+            self._materialize(page_num)
+        except Exception as e:
+            print(f"Failed to show page {page_num}: {e}")
+
+    def _materialize(self, page_num):
+        pixmap, opacity, items, version = self._build_page(page_num)
+        x, y, _, _ = self.page_layout.rect(page_num)
+
+        background = QGraphicsPixmapItem(pixmap)
+        background.setZValue(-100)
+        background.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable, False)
+        background.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsMovable, False)
+        background.setOpacity(opacity)
+        background.setPos(x, y)
+        background.setData(PAGE_KEY, page_num)
+        self.scene.addItem(background)
+
+        offset = QPointF(x, y)
+        for item in items:
+            item.setPos(item.pos() + offset)
+            item.setData(PAGE_KEY, page_num)
+            self.scene.addItem(item)
+        self._pages[page_num] = [[background] + items, version]
+
+    def _drop(self, page_num):
+        items, _ = self._pages.pop(page_num)
+        for item in items:
+            # Items deleted by the user are already out of the scene
+            if item.scene() is self.scene:
+                self.scene.removeItem(item)
+
+    def scrollContentsBy(self, dx, dy):
+        super().scrollContentsBy(dx, dy)
+        self.update_visible()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_visible()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_visible()
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if self.page_layout is None:
+            return
+        # Placeholders of the pages that aren't materialized (yet)
+        painter.setPen(QPen(QColor("#b0b0b0")))
+        painter.setBrush(QBrush(QColor("#ffffff")))
+        for page_num in self.page_layout.pages_between(rect.top(), rect.bottom()):
+            if page_num in self._pages:
+                continue
+            page_rect = QRectF(*self.page_layout.rect(page_num))
+            painter.drawRect(page_rect)
+            painter.drawText(page_rect, Qt.AlignmentFlag.AlignCenter, f"Page {self.page_layout.position(page_num) + 1}")
+
+    # ------------------------------------------------------------------
+    # Pages and items
+    # ------------------------------------------------------------------
+
+    def visible_rect(self):
+        """Scene rectangle shown in the viewport."""
+        return self.mapToScene(self.viewport().rect()).boundingRect()
+
+    def current_page(self):
+        """Page at the centre of the viewport."""
+        if self.page_layout is None:
+            return None
+        return self.page_layout.page_at(self.visible_rect().center().y())
+
+    def scroll_to_page(self, page_num):
+        """Scroll so the top of a page is at the top of the viewport."""
+        if self.page_layout is None or page_num not in self.page_layout:
+            return
+        x, y, width, _ = self.page_layout.rect(page_num)
+        visible = self.visible_rect()
+        self.centerOn(x + width / 2, y + visible.height() / 2)
+
+    def serialize_item(self, item):
+        """Project element dict of an item, in the coordinates of its page."""
+        element = OmarFormat.serialize_graphics_item(item)
+        if element:
+            x, y, _, _ = self.page_layout.rect(item.data(PAGE_KEY))
+            element["x"] -= x
+            element["y"] -= y
+        return element
+
+    def page_elements(self, page_num):
+        """Element dicts of the items of a materialized page, in page coordinates."""
+        entry = self._pages.get(page_num)
+        if entry is None:
+            return []
+        elements = []
+        for item in entry[0][1:]:
+            if item.scene() is self.scene:
+                element = self.serialize_item(item)
+                if element:
+                    elements.append(element)
+        return elements
+
+    def note_edit(self, page_num, item):
+        """
+        An edit of item was applied to the page model. The page stays as it
+        is if the item is one of its current items; otherwise (an undo
+        reaching an item of an earlier materialization) it is rebuilt.
+        """
+        entry = self._pages.get(page_num)
+        if entry is not None and any(existing is item for existing in entry[0]):
+            entry[1] = self._page_version(page_num)
+        else:
+            self.update_visible()
+
+    # ------------------------------------------------------------------
+    # Interaction
+    # ------------------------------------------------------------------
+
+    def mouseDoubleClickEvent(self, event):
+        item = self.itemAt(event.pos())
+        if self.page_layout is not None and (item is None or item.zValue() == -100):
+            # Not on an element: open the page in the page editor
+            page_num = self.page_layout.page_at(self.mapToScene(event.pos()).y())
+            if page_num is not None:
+                self.pageActivated.emit(page_num)
+                return
+        super().mouseDoubleClickEvent(event)
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Delete and self.scene.selectedItems():
+            if self.undo_stack:
+                from gui.commands import DeleteItemCommand
+                self.undo_stack.push(DeleteItemCommand(self.scene, self.scene.selectedItems()))
+            return
+        super().keyPressEvent(event)
+
+    def wheelEvent(self, event):
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            zoom_in = event.angleDelta().y() > 0
+            scale_factor = 1.15 if zoom_in else 1 / 1.15
+            self.scale(scale_factor, scale_factor)
+            self.update_visible()
+        else:
+            super().wheelEvent(event)
@@ -1,8 +1,16 @@
 """
 EditableTextItem — editable text element with resize handles.
+
+While not being edited the text is drawn from a bitmap cached at the
+current zoom level (see utils/bitmap_lod.py), so panning a page with
+thousands of text blocks doesn't lay out and draw all their text again.
 """
 
-from qt_compat import (QGraphicsTextItem, QGraphicsItem, Qt, QPen, QColor)
+import math
+
+from qt_compat import (QGraphicsTextItem, QGraphicsItem, Qt, QPen, QColor,
+                       QPixmap, QPainter, QRectF)
+from utils.bitmap_lod import BitmapLodCache, device_scale
 from .resizable_mixin import ResizableMixin
 
 
@@ -15,6 +23,21 @@ class EditableTextItem(QGraphicsTextItem, ResizableMixin):
                       QGraphicsItem.GraphicsItemFlag.ItemIsFocusable)
         self.setTextInteractionFlags(Qt.TextInteractionFlag.NoTextInteraction)
         self.is_editing = False
+        self.bitmap_cache = BitmapLodCache()
+        if hasattr(self, 'document'):
+            self.document().contentsChanged.connect(self.bitmap_cache.invalidate)
+
+    def setFont(self, font):
+        super().setFont(font)
+        self.bitmap_cache.invalidate()
+
+    def setDefaultTextColor(self, color):
+        super().setDefaultTextColor(color)
+        self.bitmap_cache.invalidate()
+
+    def setTransform(self, transform, combine=False):
+        super().setTransform(transform, combine)
+        self.bitmap_cache.invalidate()
 
     def mouseDoubleClickEvent(self, event):
         if self.textInteractionFlags() == Qt.TextInteractionFlag.NoTextInteraction:
@@ -57,10 +80,53 @@ class EditableTextItem(QGraphicsTextItem, ResizableMixin):
 
     def paint(self, painter, option, widget):
         if self.is_editing:
+            # Edited text is painted live (cursor, selection)
             painter.save()
             pen = QPen(QColor(0, 120, 215), 2, Qt.PenStyle.SolidLine)
             painter.setPen(pen)
             painter.setBrush(Qt.BrushStyle.NoBrush)
             painter.drawRect(self.boundingRect().adjusted(1, 1, -1, -1))
             painter.restore()
+        elif self._paint_bitmap(painter, option, widget):
+            return
         super().paint(painter, option, widget)
+
+    def _paint_bitmap(self, painter, option, widget):
+        """Draw the text from its cached bitmap, rendered first if out of date; False to paint live."""
+        if not hasattr(painter, 'worldTransform'):
+            return False  # GameQt caches its rendered text surfaces itself
+
+        transform = painter.worldTransform()
+        scale = device_scale(transform.m11(), transform.m12(), transform.m21(), transform.m22())
+        device = painter.device()
+        if hasattr(device, 'devicePixelRatioF'):
+            scale *= device.devicePixelRatioF()
+        rect = self.boundingRect()
+        scale = self.bitmap_cache.scale_for(scale, rect.width(), rect.height())
+        if scale is None:
+            return False
+
+        # The selection outline is part of the bitmap
+        selected = self.isSelected()
+        bitmap = self.bitmap_cache.get(scale, selected)
+        if bitmap is None:
+            bitmap = QPixmap(max(1, math.ceil(rect.width() * scale)),
+                             max(1, math.ceil(rect.height() * scale)))
+            bitmap.fill(Qt.GlobalColor.transparent)
+            bitmap_painter = QPainter(bitmap)
+            bitmap_painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            bitmap_painter.scale(scale, scale)
+            bitmap_painter.translate(-rect.x(), -rect.y())
+            # Render all of the item, not only the part exposed now
+            exposed = option.exposedRect
+            option.exposedRect = rect
+            super().paint(bitmap_painter, option, widget)
+            option.exposedRect = exposed
+            bitmap_painter.end()
+            self.bitmap_cache.put(bitmap, scale, selected, bitmap.width() * bitmap.height() * 4)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.drawPixmap(rect, bitmap, QRectF(bitmap.rect()))
+        painter.restore()
+        return True
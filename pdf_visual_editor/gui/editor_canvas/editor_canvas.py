@@ -33,6 +33,7 @@ class EditorCanvas(QGraphicsView):
         self.setResizeAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
 
         self.current_page_item = None
+        self.page_rotation = 0  # Rotation of the page shown (see set_page_rotation)
 
         # Capture Mode State
         self.capture_mode = False
@@ -46,6 +47,16 @@ class EditorCanvas(QGraphicsView):
         self.scene = scene
         self.setScene(self.scene)
 
+    def set_page_rotation(self, degrees):
+        """
+        Show the page turned clockwise by degrees. The view turns, not the
+        scene, so items keep their page coordinates; zoom is kept.
+        """
+        if degrees == self.page_rotation or not hasattr(self, 'rotate'):
+            return
+        self.rotate(degrees - self.page_rotation)
+        self.page_rotation = degrees
+
     def start_capture_mode(self):
         self.capture_mode = True
         self.setDragMode(QGraphicsView.DragMode.NoDrag)
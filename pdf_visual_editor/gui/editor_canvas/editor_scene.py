@@ -7,12 +7,31 @@ from qt_compat import (QGraphicsScene, QGraphicsItem, QBrush, QColor, Signal)
 
 class EditorScene(QGraphicsScene):
     itemSelected = Signal(object)
+    contentEdited = Signal(int)  # Emits page_num whenever an edit touches this scene
+    itemEdited = Signal(int, object, str)  # page_num, item, "update" / "delete" (per item)
+    populated = Signal(int)  # Emits page_num once all the items of the page have been added
 
-    def __init__(self, parent=None, undo_stack=None):
+    def __init__(self, parent=None, undo_stack=None, page_num=None):
         super().__init__(parent)
         self.setBackgroundBrush(QBrush(QColor("#e0e0e0")))
         self.undo_stack = undo_stack
+        self.page_num = page_num  # PDF page this scene belongs to (None for scratch scenes)
         self.item_move_start_pos = {}  # Track initial positions for undo
+        self.serialized_items = {}  # item -> (state, project dict) from the last save
+        self.is_populated = True  # False while load_page is still adding items (time-sliced)
+
+    def mark_edited(self, items=(), op="update"):
+        """
+        Called by undo commands and panels after they change scene content.
+
+        Args:
+            items: The items that changed, if known
+            op: "update" for items added or changed, "delete" for items removed
+        """
+        if self.page_num is not None:
+            self.contentEdited.emit(self.page_num)
+            for item in items:
+                self.itemEdited.emit(self.page_num, item, op)
 
     def mousePressEvent(self, event):
         super().mousePressEvent(event)
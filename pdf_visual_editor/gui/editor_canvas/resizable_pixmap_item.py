@@ -2,14 +2,144 @@
 ResizablePixmapItem — pixmap element with resize handles.
 """
 
-from qt_compat import (QGraphicsPixmapItem, QGraphicsItem)
+from qt_compat import (QGraphicsPixmapItem, QGraphicsItem, QTransform, QColor, QRectF)
 from .resizable_mixin import ResizableMixin
 
+# Colour of an image that isn't loaded yet
+PLACEHOLDER_COLOR = "#d0d0d0"
+
 
 class ResizablePixmapItem(QGraphicsPixmapItem, ResizableMixin):
-    def __init__(self, pixmap, parent=None):
+    """
+    Pixmap element with resize handles.
+
+    Keeps the encoded bytes of its pixmap and their content hash, so saves,
+    exports and scene evictions don't PNG-encode an unchanged image again.
+    setPixmap() bumps pixmap_version, which invalidates them.
+
+    An item can start as a placeholder for an image that isn't extracted
+    or decoded yet (see gui/image_loader.py): a grey box of the image's
+    size. Its image is loaded in the background when the item is first
+    painted, and at once when it's selected, serialized or copied.
+    """
+    def __init__(self, pixmap, parent=None, encoded=None):
+        """
+        Args:
+            pixmap: Pixmap to show
+            parent: Parent item
+            encoded: (image bytes, image ref) the pixmap was decoded from,
+                reused instead of encoding the pixmap
+        """
         QGraphicsPixmapItem.__init__(self, pixmap, parent)
         ResizableMixin.__init__(self)
         self.setFlags(QGraphicsItem.GraphicsItemFlag.ItemIsMovable |
                       QGraphicsItem.GraphicsItemFlag.ItemIsSelectable)
         self.setShapeMode(QGraphicsPixmapItem.ShapeMode.BoundingRectShape)
+
+        self.pixmap_version = 0
+        self._encoded = None  # (pixmap_version, image bytes, image ref)
+        self.image_loader = None  # ImageLoader of a placeholder
+        self.image_source = None  # What the loader loads the placeholder's image from
+        self._placeholder_rect = None  # Size of a placeholder
+        self._image_requested = False
+        if encoded is not None:
+            self.set_encoded_image(*encoded)
+
+    def setPixmap(self, pixmap):
+        QGraphicsPixmapItem.setPixmap(self, pixmap)
+        self.pixmap_version += 1
+        self._encoded = None
+
+    def set_placeholder(self, loader, source, width, height):
+        """Show a width x height box until loader loads the image from source."""
+        self.image_loader = loader
+        self.image_source = source
+        self._placeholder_rect = QRectF(0, 0, width, height)
+
+    def is_placeholder(self):
+        """True until the real image of a placeholder is swapped in."""
+        return self.image_loader is not None
+
+    def boundingRect(self):
+        if self.image_loader is not None:
+            return self._placeholder_rect
+        return super().boundingRect()
+
+    def request_image(self):
+        """Have the image of a placeholder extracted in the background (once)."""
+        if self.image_loader is not None and not self._image_requested:
+            self._image_requested = True
+            self.image_loader.request(self)
+
+    def ensure_image(self):
+        """Extract the image of a placeholder now (before it's serialized or copied)."""
+        if self.image_loader is not None:
+            self.image_loader.load_now(self)
+
+    def swap_image(self, pixmap, encoded=None):
+        """
+        Replace the placeholder by its real pixmap, keeping the item's size
+        on the page. encoded is (image bytes, image ref) the pixmap was
+        decoded from, if it was.
+        """
+        if self.image_loader is None or pixmap.width() <= 0 or pixmap.height() <= 0:
+            return
+        shown = self.boundingRect()
+        self.prepareGeometryChange()
+        self.image_loader = None
+        self.setPixmap(pixmap)
+        if encoded is not None:
+            self.set_encoded_image(*encoded)
+        if (shown.width(), shown.height()) != (pixmap.width(), pixmap.height()):
+            self.setTransform(QTransform.fromScale(shown.width() / pixmap.width(),
+                                                   shown.height() / pixmap.height()), True)
+        for h in self.handles:
+            h.update_position()
+
+    def paint(self, painter, option, widget):
+        if self.image_loader is not None:
+            # A placeholder is painted only once it's in the viewport
+            self.request_image()
+            painter.fillRect(self._placeholder_rect, QColor(PLACEHOLDER_COLOR))
+            return
+        super().paint(painter, option, widget)
+
+    def itemChange(self, change, value):
+        # A selected item is about to be edited: swap its image in first, so
+        # the transforms recorded by undo commands are those of the image
+        if (self.image_loader is not None and value
+                and change == QGraphicsItem.GraphicsItemChange.ItemSelectedHasChanged):
+            self.ensure_image()
+        return super().itemChange(change, value)
+
+    def cached_image(self):
+        """(image bytes, image ref) of the current pixmap, or None if not encoded yet."""
+        encoded = self._encoded
+        if encoded is None or encoded[0] != self.pixmap_version:
+            return None
+        return encoded[1], encoded[2]
+
+    def encoded_image(self):
+        """(image bytes, image ref) of the current pixmap, PNG-encoded on first use."""
+        cached = self.cached_image()
+        if cached is None:
+            from omar_format import OmarFormat
+            self.set_encoded_image(OmarFormat.encode_image(self.pixmap()))
+            cached = self.cached_image()
+        return cached
+
+    def set_encoded_image(self, data, image_ref=None, version=None):
+        """
+        Store the encoded bytes of the pixmap.
+
+        Doesn't touch Qt, so a worker thread can store what it encoded for
+        the pixmap_version it was given; it's ignored if the pixmap changed
+        in the meantime.
+        """
+        from omar_container import image_member_name
+
+        if version is None:
+            version = self.pixmap_version
+        elif version != self.pixmap_version:
+            return
+        self._encoded = (version, data, image_ref or image_member_name(data))
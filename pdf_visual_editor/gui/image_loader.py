@@ -0,0 +1,171 @@
+"""
+Image loaders — images of image items, loaded when first needed.
+
+Image items of a page can start as placeholders of the image's size (see
+ResizablePixmapItem). The image of a placeholder is prepared on the
+prefetch worker once the item is first painted, so only images in the
+viewport are loaded, and swapped in on the UI thread when the runner's
+poll() delivers it. Selecting, saving, exporting or duplicating a
+placeholder loads its image at once.
+
+PageImageLoader extracts the images of layout analysis elements from the
+PDF; ProjectImageLoader decodes the images stored in a project.
+"""
+
+from qt_compat import QPixmap, QImage
+from .editor_canvas import ResizablePixmapItem
+
+
+class ImageLoader:
+    """
+    Creates placeholder items and loads their images. Items waiting for
+    the same image share one background job.
+    """
+
+    def __init__(self, runner, on_submit=None):
+        """
+        Args:
+            runner: TaskRunner of the prefetch worker
+            on_submit: Called after a job is submitted (to poll the runner)
+        """
+        self.runner = runner
+        self._on_submit = on_submit
+        self._waiting = {}  # Image key -> placeholder items waiting for it
+        self.closed = False
+
+    def placeholder_item(self, source, width, height):
+        """Image item shown as a width x height box until its image is loaded from source."""
+        item = ResizablePixmapItem(QPixmap())
+        item.set_placeholder(self, source, width, height)
+        return item
+
+    def request(self, item):
+        """Load the image of a placeholder item in the background."""
+        if self.closed:
+            return
+        source = item.image_source
+        key = self._key(source)
+        waiting = self._waiting.get(key)
+        if waiting is not None:
+            waiting.append(item)
+            return
+        self._waiting[key] = [item]
+        self.runner.submit(self._prepare, source,
+                           on_done=lambda image: self._deliver(source, image),
+                           on_error=lambda e: self._failed(key, e))
+        if self._on_submit is not None:
+            self._on_submit()
+
+    def load_now(self, item):
+        """Load the image of a placeholder item on the UI thread."""
+        if self.closed:
+            return
+        try:
+            pixmap = self._load(item.image_source)
+        except Exception as e:
+            print(f"Failed to load image: {e}")
+            return
+        self._swap(item, pixmap)
+
+    def close(self):
+        """Stop loading images (another document was opened)."""
+        self.closed = True
+        self._waiting.clear()
+
+    def _deliver(self, source, image):
+        items = self._waiting.pop(self._key(source), [])
+        if self.closed or not items:
+            return
+        pixmap = self._to_pixmap(source, image)
+        for item in items:
+            self._swap(item, pixmap)
+
+    def _failed(self, key, error):
+        self._waiting.pop(key, None)
+        print(f"Failed to load image: {error}")
+
+    def _swap(self, item, pixmap):
+        item.swap_image(pixmap)
+
+    # Implemented by the loaders of each kind of source
+
+    def _key(self, source):
+        """Key of the image loaded from source."""
+        return source
+
+    def _prepare(self, source):
+        """QImage of source (runs on the worker thread)."""
+        raise NotImplementedError
+
+    def _to_pixmap(self, source, image):
+        """Pixmap of an image prepared by _prepare()."""
+        return QPixmap.fromImage(image)
+
+    def _load(self, source):
+        """Pixmap of source, loaded on the UI thread."""
+        raise NotImplementedError
+
+
+class PageImageLoader(ImageLoader):
+    """
+    Images of layout analysis elements. Sources are (page_num, PDF bbox),
+    extracted at scale 2.0 like PDFLoader.get_image_from_rect().
+    """
+
+    def __init__(self, runner, preparer, pdf_loader, on_submit=None):
+        """
+        Args:
+            preparer: PagePreparer of the document (runs on the worker)
+            pdf_loader: PDFLoader of the document on the UI thread
+        """
+        super().__init__(runner, on_submit)
+        self.preparer = preparer
+        self.pdf_loader = pdf_loader
+
+    def _prepare(self, source):
+        page_num, bbox = source
+        return self.preparer.extract_image(page_num, bbox)
+
+    def _load(self, source):
+        page_num, bbox = source
+        return self.pdf_loader.get_image_from_rect(page_num, bbox, scale=2.0)
+
+
+class ProjectImageLoader(ImageLoader):
+    """
+    Images stored in a project. Sources are (image bytes, image ref);
+    pixmaps are shared by image ref, like PageManagerMixin._shared_pixmap().
+    """
+
+    def __init__(self, runner, pixmaps, on_submit=None):
+        """
+        Args:
+            pixmaps: Image ref -> decoded QPixmap, shared with the window
+        """
+        super().__init__(runner, on_submit)
+        self.pixmaps = pixmaps
+
+    def _key(self, source):
+        return source[1]
+
+    def _prepare(self, source):
+        return QImage.fromData(source[0])
+
+    def _to_pixmap(self, source, image):
+        pixmap = self.pixmaps.get(source[1])
+        if pixmap is None:
+            pixmap = self.pixmaps[source[1]] = QPixmap.fromImage(image)
+        return pixmap
+
+    def _load(self, source):
+        image_data, image_ref = source
+        pixmap = self.pixmaps.get(image_ref)
+        if pixmap is None:
+            pixmap = QPixmap()
+            pixmap.loadFromData(image_data)
+            self.pixmaps[image_ref] = pixmap
+        return pixmap
+
+    def _swap(self, item, pixmap):
+        # The item keeps the stored bytes, so saving doesn't encode them again
+        item.swap_image(pixmap, encoded=item.image_source)
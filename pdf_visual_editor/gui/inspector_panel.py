@@ -45,6 +45,7 @@ class OpacitySliderDelegate(QStyledItemDelegate):
 
 class InspectorTreeWidget(QTreeWidget):
     deleteKeyPressed = Signal()
+    zOrderChanged = Signal()
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_Delete:
@@ -108,6 +109,7 @@ class InspectorTreeWidget(QTreeWidget):
                 graphics_item = item.data(0, Qt.ItemDataRole.UserRole + 1)
                 if graphics_item:
                     graphics_item.setZValue(count - i)
+            self.zOrderChanged.emit()
                     
         event.accept()
 
@@ -119,6 +121,7 @@ class InspectorPanel(QWidget):
     itemChanged = Signal(object, int) # Item, Column
     backgroundOpacityChanged = Signal(float)
     duplicateRequested = Signal(list) # List of QGraphicsItems
+    itemsDeleted = Signal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -263,6 +266,13 @@ class InspectorPanel(QWidget):
 
     def add_graphics_item(self, graphics_item):
         """Add a single graphics item to the tree without rebuilding."""
+        self.add_graphics_items([graphics_item])
+
+    def add_graphics_items(self, graphics_items):
+        """
+        Add graphics items to the folders of their type without rebuilding
+        (used batch by batch while a page's scene is being populated).
+        """
         # Find appropriate folder based on type
         root = self.tree.invisibleRootItem()
         page_content = None
@@ -275,25 +285,28 @@ class InspectorPanel(QWidget):
             # Should not happen if initialized, but safety check
             return
 
-        target_folder = page_content # Default
+        folders = {page_content.child(i).text(0): page_content.child(i)
+                   for i in range(page_content.childCount())}
         
-        # Try to find specific folders
         from qt_compat import QGraphicsTextItem, QGraphicsPixmapItem
         
-        folder_name = "⬜ Shapes"
-        if isinstance(graphics_item, QGraphicsTextItem):
-            folder_name = "📝 Text"
-        elif isinstance(graphics_item, QGraphicsPixmapItem):
-            folder_name = "🖼️ Images"
-            
-        for i in range(page_content.childCount()):
-            if page_content.child(i).text(0) == folder_name:
-                target_folder = page_content.child(i)
-                break
-        
-        # Create item
-        tree_item = self._create_tree_item_for_graphics_item(graphics_item)
-        target_folder.addChild(tree_item)
+        batches = {}
+        for graphics_item in graphics_items:
+            folder_name = "⬜ Shapes"
+            if isinstance(graphics_item, QGraphicsTextItem):
+                folder_name = "📝 Text"
+            elif isinstance(graphics_item, QGraphicsPixmapItem):
+                folder_name = "🖼️ Images"
+            target_folder = folders.get(folder_name, page_content)
+            batch = batches.setdefault(folder_name, (target_folder, []))
+            batch[1].append(self._create_tree_item_for_graphics_item(graphics_item))
+        
+        for target_folder, tree_items in batches.values():
+            if hasattr(target_folder, "addChildren"):
+                target_folder.addChildren(tree_items)
+            else:
+                for tree_item in tree_items:
+                    target_folder.addChild(tree_item)
 
     def create_folder(self):
         """Create a new folder/group in the tree."""
@@ -339,6 +352,9 @@ class InspectorPanel(QWidget):
                 if index >= 0:
                     self.tree.takeTopLevelItem(index)
 
+        if selected:
+            self.itemsDeleted.emit()
+
     def set_all_visibility(self, visible: bool):
         root = self.tree.topLevelItem(0)
         if not root: return
@@ -390,9 +406,14 @@ class InspectorPanel(QWidget):
         Populate inspector with auto-organized folders by element type (PDF import).
         Creates folders for Text, Images, and Shapes.
         """
-        from .editor_canvas import ResizablePixmapItem, ResizerHandle
-        from qt_compat import QGraphicsTextItem, QGraphicsPixmapItem
+        from .editor_canvas import ResizerHandle
         
+        self.start_auto_organize()
+        self.add_graphics_items([item for item in scene.items()
+                                 if item.zValue() != -100 and not isinstance(item, ResizerHandle)])
+    
+    def start_auto_organize(self):
+        """Clear the tree and create the empty auto-organized folders (see add_graphics_items())."""
         self.clear()
         
         root = QTreeWidgetItem(self.tree)
@@ -411,20 +432,6 @@ class InspectorPanel(QWidget):
         shape_folder = QTreeWidgetItem(root)
         shape_folder.setText(0, "⬜ Shapes")
         shape_folder.setExpanded(True)
-        
-        # Sort items into folders
-        for item in scene.items():
-            if item.zValue() == -100: continue  # Skip background
-            if isinstance(item, ResizerHandle): continue
-            
-            tree_item = self._create_tree_item_for_graphics_item(item)
-            
-            if isinstance(item, QGraphicsTextItem):
-                text_folder.addChild(tree_item)
-            elif isinstance(item, QGraphicsPixmapItem):
-                image_folder.addChild(tree_item)
-            else:
-                shape_folder.addChild(tree_item)
     
     def _create_tree_item_for_graphics_item(self, graphics_item):
         """Create a tree widget item for a graphics item."""
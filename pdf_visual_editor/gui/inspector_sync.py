@@ -48,7 +48,11 @@ class InspectorSyncMixin:
                     new_item.setFont(item.font())
                     new_item.setDefaultTextColor(item.defaultTextColor())
                 elif isinstance(item, QGraphicsPixmapItem):
-                    new_item = ResizablePixmapItem(item.pixmap())
+                    if hasattr(item, "ensure_image"):
+                        item.ensure_image()
+                    new_item = ResizablePixmapItem(
+                        item.pixmap(),
+                        encoded=item.cached_image() if hasattr(item, "cached_image") else None)
                 elif isinstance(item, QGraphicsRectItem):
                     new_item = QGraphicsRectItem(item.rect())
                     new_item.setPen(item.pen())
@@ -77,6 +81,7 @@ class InspectorSyncMixin:
                 self.canvas.scene.clearSelection()
                 for item in new_items:
                     item.setSelected(True)
+                self.mark_page_dirty()
 
         finally:
             self.canvas.blockSignals(False)
@@ -192,14 +197,16 @@ class InspectorSyncMixin:
         if column == 2:
             visible = item.checkState(2) == Qt.CheckState.Checked
             graphics_item = item.data(0, Qt.ItemDataRole.UserRole + 1)
-            if graphics_item:
+            if graphics_item and graphics_item.isVisible() != visible:
                 graphics_item.setVisible(visible)
+                self.mark_page_dirty()
         # Handle Opacity change (Column 3)
         elif column == 3:
             try:
                 opacity = float(item.text(3))
                 graphics_item = item.data(0, Qt.ItemDataRole.UserRole + 1)
-                if graphics_item:
+                if graphics_item and graphics_item.opacity() != opacity:
                     graphics_item.setOpacity(opacity)
+                    self.mark_page_dirty()
             except ValueError:
                 pass  # Invalid float
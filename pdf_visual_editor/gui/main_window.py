@@ -2,8 +2,9 @@
 from qt_compat import (QMainWindow, QSplitter, QWidget, QVBoxLayout, QFileDialog, 
                        QMessageBox, QLabel, QTreeWidgetItem, QGraphicsPixmapItem, 
                        QGraphicsItem, QGraphicsRectItem, QGraphicsTextItem, QPixmap, 
-                       QTransform, QPen, QColor, QBrush, QUndoStack, Qt, QRectF, 
-                       QBuffer, QIODevice, QSettings, QUndoView, QPointF)
+                       QTransform, QPen, QColor, QBrush, Qt, QRectF, 
+                       QBuffer, QIODevice, QSettings, QUndoView, QPointF, QTimer,
+                       QTabWidget)
 from .editor_canvas import EditorCanvas, EditorScene, EditableTextItem, ResizablePixmapItem, ResizerHandle
 from .thumbnail_panel import ThumbnailPanel
 from .inspector_panel import InspectorPanel
@@ -12,30 +13,42 @@ from .about_dialog import AboutDialog
 from .project_io import ProjectIOMixin
 from .page_manager import PageManagerMixin
 from .inspector_sync import InspectorSyncMixin
+from .page_operations import PageOperationsMixin
+from .workspace import WorkspaceMixin
 from gui.commands import AddItemCommand, DeleteItemCommand, EditTextCommand
+from utils.task_runner import TaskRunner
 import os
 import sys
 
-class MainWindow(QMainWindow, ProjectIOMixin, PageManagerMixin, InspectorSyncMixin):
+class MainWindow(QMainWindow, ProjectIOMixin, PageManagerMixin, InspectorSyncMixin,
+                 PageOperationsMixin, WorkspaceMixin):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("PDF Visual Editor")
         self.resize(1200, 800)
         
-        # State
-        self.current_file = None  # Source PDF path or None
-        self.current_project_file = None  # Path to .omar file or None
-        self.source_pdf_path = None  # Original PDF for .omar projects
-        self.is_modified = False  # Track unsaved changes
-        self.pdf_loader = None
-        self.layout_analyzer = None
-        self.page_scenes = {} # Map page_num -> EditorScene
-        self.page_elements = {} # Map page_num -> elements list (for export)
-        self.scene_cache_order = [] # Track LRU order
-        self.MAX_CACHED_SCENES = 5 # Limit memory usage
-        
-        # Undo/Redo Stack
-        self.undo_stack = QUndoStack(self)
+        # State of the document shown (swapped on tab switches, see WorkspaceMixin)
+        self.documents = [] # OpenDocument of each tab
+        self.active_index = None # Tab of the document shown
+        self.scene_budget = self.create_scene_budget() # Memory budget for the scenes of all documents
+        self.init_document_state()
+        
+        # Shared by all open documents
+        self.saving_project = False # A background save is running
+        self.task_runner = TaskRunner() # Worker thread for saves
+        self.prefetch_runner = TaskRunner() # Worker thread preparing adjacent pages (render, analysis, images)
+        self.task_timer = None # Delivers finished background tasks on the UI thread
+        self.continuous_scroll = False # All pages in one scrolling view instead of the page editor
+        self.document_view = None # Continuous view (created when first shown)
+        self.scene_population = None # (scene, TimeSlicedJob) of the page whose items are being added
+        self.population_timer = None # Runs the population slices between events
+        if QTimer is not None:
+            self.task_timer = QTimer(self)
+            self.task_timer.setInterval(50)
+            self.task_timer.timeout.connect(self._poll_background_tasks)
+            self.population_timer = QTimer(self)
+            self.population_timer.setInterval(0)
+            self.population_timer.timeout.connect(self._populate_next_slice)
         
         # Theme
         self.current_theme = "light"
@@ -56,15 +69,26 @@ class MainWindow(QMainWindow, ProjectIOMixin, PageManagerMixin, InspectorSyncMix
         self.menu_bar.action_open.triggered.connect(self.open_pdf_dialog)
         self.menu_bar.action_save.triggered.connect(self.save_project)
         self.menu_bar.action_save_as.triggered.connect(self.save_project_as)
+        self.menu_bar.action_close_document.triggered.connect(lambda: self.close_document())
         self.menu_bar.action_export.triggered.connect(self.export_pdf_dialog)
+        self.menu_bar.action_embed_pdf.toggled.connect(self.toggle_embed_source_pdf)
+        self.menu_bar.action_store_previews.toggled.connect(self.toggle_store_previews)
         self.menu_bar.action_exit.triggered.connect(self.close)
         
         self.menu_bar.action_insert_text.triggered.connect(self.insert_text)
         self.menu_bar.action_insert_image.triggered.connect(self.insert_image)
         
-        # Connect Undo/Redo
-        self.menu_bar.action_undo.triggered.connect(self.undo_stack.undo)
-        self.menu_bar.action_redo.triggered.connect(self.undo_stack.redo)
+        # Connect Pages Actions
+        self.menu_bar.action_insert_pages.triggered.connect(self.insert_pages_dialog)
+        self.menu_bar.action_delete_pages.triggered.connect(self.delete_pages)
+        self.menu_bar.action_duplicate_pages.triggered.connect(self.duplicate_pages)
+        self.menu_bar.action_rotate_clockwise.triggered.connect(lambda: self.rotate_pages(90))
+        self.menu_bar.action_rotate_counterclockwise.triggered.connect(lambda: self.rotate_pages(-90))
+        self.menu_bar.action_extract_pages.triggered.connect(self.extract_pages_dialog)
+        
+        # Connect Undo/Redo (to the history of the document shown)
+        self.menu_bar.action_undo.triggered.connect(lambda: self.undo_stack.undo())
+        self.menu_bar.action_redo.triggered.connect(lambda: self.undo_stack.redo())
         
         self.menu_bar.action_copy.triggered.connect(lambda: self.canvas.copy_selection())
         self.menu_bar.action_paste.triggered.connect(lambda: self.canvas.paste_from_clipboard())
@@ -88,10 +112,31 @@ class MainWindow(QMainWindow, ProjectIOMixin, PageManagerMixin, InspectorSyncMix
         
         # Connect View Actions
         self.menu_bar.action_history.toggled.connect(self.toggle_history_panel)
+        self.menu_bar.action_next_page.triggered.connect(lambda: self.step_page(1))
+        self.menu_bar.action_previous_page.triggered.connect(lambda: self.step_page(-1))
+        self.menu_bar.action_continuous_scroll.toggled.connect(self.toggle_continuous_scroll)
+        
+        # Main Layout: document tabs above the editor and panels
+        central = QWidget()
+        central_layout = QVBoxLayout(central)
+        if hasattr(central_layout, 'setContentsMargins'):
+            central_layout.setContentsMargins(0, 0, 0, 0)
+        self.setCentralWidget(central)
+        
+        # The tabs only select the document; every document is shown in
+        # the same editor
+        self.document_tabs = QTabWidget()
+        if hasattr(self.document_tabs, 'setDocumentMode'):
+            self.document_tabs.setDocumentMode(True)
+            self.document_tabs.setTabsClosable(True)
+            self.document_tabs.setMaximumHeight(self.document_tabs.tabBar().sizeHint().height())
+            self.document_tabs.currentChanged.connect(self.switch_document)
+            self.document_tabs.tabCloseRequested.connect(self.close_document)
+        central_layout.addWidget(self.document_tabs)
         
-        # Main Layout
         main_splitter = QSplitter(Qt.Orientation.Horizontal)
-        self.setCentralWidget(main_splitter)
+        central_layout.addWidget(main_splitter)
+        self.main_splitter = main_splitter  # The continuous view is added when first shown
         
         # Left: Editor Canvas
         self.canvas = EditorCanvas(undo_stack=self.undo_stack)
@@ -104,6 +149,7 @@ class MainWindow(QMainWindow, ProjectIOMixin, PageManagerMixin, InspectorSyncMix
         # Thumbnail Panel
         self.thumbnail_panel = ThumbnailPanel()
         self.thumbnail_panel.pageSelected.connect(self.load_page)
+        self.thumbnail_panel.orderChanged.connect(self.reorder_pages)
         right_splitter.addWidget(self.thumbnail_panel)
         
         # Inspector Panel
@@ -131,6 +177,8 @@ class MainWindow(QMainWindow, ProjectIOMixin, PageManagerMixin, InspectorSyncMix
         self.inspector_panel.tree.itemSelectionChanged.connect(self.sync_selection_to_canvas)
         self.inspector_panel.backgroundOpacityChanged.connect(self.update_background_opacity)
         self.inspector_panel.duplicateRequested.connect(self.duplicate_items)
+        self.inspector_panel.itemsDeleted.connect(lambda: self.mark_page_dirty())
+        self.inspector_panel.tree.zOrderChanged.connect(lambda: self.mark_page_dirty())
         self.canvas.joinRequested.connect(self.inspector_panel.join_items)
         
         # We also need to connect the canvas selection changed signal.
@@ -140,6 +188,9 @@ class MainWindow(QMainWindow, ProjectIOMixin, PageManagerMixin, InspectorSyncMix
         # Recent Files
         self.recent_files = []
         self.load_recent_files()
+        
+        # First (empty) document
+        self.add_document_tab()
 
     # ------------------------------------------------------------------
     # Theme
@@ -257,6 +308,19 @@ class MainWindow(QMainWindow, ProjectIOMixin, PageManagerMixin, InspectorSyncMix
     # Drag and Drop
     # ------------------------------------------------------------------
 
+    def closeEvent(self, event):
+        # Let a running save finish and record it (_finish_save), then stop
+        # the worker
+        self.finish_background_tasks()
+        self.task_runner.shutdown()
+        self.stop_prefetcher()
+        self.prefetch_runner.shutdown()
+        # Write out queued journal records; the journal itself is kept
+        # until the edits are saved
+        self._close_journal()
+        self.close_background_documents()
+        super().closeEvent(event)
+
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
             event.accept()
@@ -273,7 +337,7 @@ class MainWindow(QMainWindow, ProjectIOMixin, PageManagerMixin, InspectorSyncMix
                 ext = os.path.splitext(file_path)[1].lower()
                 
                 if ext == '.pdf':
-                    self.load_pdf(file_path)
+                    self.open_document(file_path)
                     # Only load the first PDF if multiple dropped
                     break
                     
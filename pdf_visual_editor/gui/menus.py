@@ -13,11 +13,20 @@ class AppMenu(QMenuBar):
         self.action_save_as.setShortcut("Ctrl+Shift+S")
         self.menu_recent = self.addMenu("Open Recent") # Placeholder, will be populated by MainWindow
         file_menu.addMenu(self.menu_recent)
+        self.action_close_document = QAction("Close Document", self)
+        self.action_close_document.setShortcut("Ctrl+W")
+        self.action_embed_pdf = QAction("Embed Source PDF in Project", self)
+        self.action_embed_pdf.setCheckable(True)
+        self.action_store_previews = QAction("Store Previews in Project", self)
+        self.action_store_previews.setCheckable(True)
         self.action_export = QAction("Export PDF...", self)
         self.action_exit = QAction("Exit", self)
         file_menu.addAction(self.action_open)
         file_menu.addAction(self.action_save)
         file_menu.addAction(self.action_save_as)
+        file_menu.addAction(self.action_close_document)
+        file_menu.addAction(self.action_embed_pdf)
+        file_menu.addAction(self.action_store_previews)
         file_menu.addSeparator()
         file_menu.addAction(self.action_export)
         file_menu.addSeparator()
@@ -36,6 +45,7 @@ class AppMenu(QMenuBar):
         self.menu_edit.addSeparator()
         self.menu_edit.addAction(self.action_copy)
         self.menu_edit.addAction(self.action_paste)
+        self.menu_copy_to_document = self.menu_edit.addMenu("Copy to Document") # Populated by MainWindow
         
         # Insert Menu
         insert_menu = self.addMenu("Insert")
@@ -44,6 +54,23 @@ class AppMenu(QMenuBar):
         insert_menu.addAction(self.action_insert_text)
         insert_menu.addAction(self.action_insert_image)
         
+        # Pages Menu
+        pages_menu = self.addMenu("Pages")
+        self.action_insert_pages = QAction("Insert Pages from PDF...", self)
+        self.action_delete_pages = QAction("Delete Pages", self)
+        self.action_duplicate_pages = QAction("Duplicate Pages", self)
+        self.action_rotate_clockwise = QAction("Rotate Clockwise", self)
+        self.action_rotate_counterclockwise = QAction("Rotate Counterclockwise", self)
+        self.action_extract_pages = QAction("Extract Pages...", self)
+        pages_menu.addAction(self.action_insert_pages)
+        pages_menu.addAction(self.action_delete_pages)
+        pages_menu.addAction(self.action_duplicate_pages)
+        pages_menu.addSeparator()
+        pages_menu.addAction(self.action_rotate_clockwise)
+        pages_menu.addAction(self.action_rotate_counterclockwise)
+        pages_menu.addSeparator()
+        pages_menu.addAction(self.action_extract_pages)
+        
         # View Menu
         view_menu = self.addMenu("View")
         self.action_zoom_in = QAction("Zoom In", self)
@@ -51,6 +78,16 @@ class AppMenu(QMenuBar):
         view_menu.addAction(self.action_zoom_in)
         view_menu.addAction(self.action_zoom_out)
         view_menu.addSeparator()
+        self.action_next_page = QAction("Next Page", self)
+        self.action_next_page.setShortcut("PgDown")
+        self.action_previous_page = QAction("Previous Page", self)
+        self.action_previous_page.setShortcut("PgUp")
+        view_menu.addAction(self.action_next_page)
+        view_menu.addAction(self.action_previous_page)
+        self.action_continuous_scroll = QAction("Continuous Scroll", self)
+        self.action_continuous_scroll.setCheckable(True)
+        view_menu.addAction(self.action_continuous_scroll)
+        view_menu.addSeparator()
         self.action_history = QAction("History", self)
         self.action_history.setCheckable(True)
         self.action_history.setChecked(False)
@@ -66,6 +103,9 @@ class AppMenu(QMenuBar):
         theme_menu.addAction(self.action_theme_dark)
         theme_menu.addAction(self.action_theme_system)
         
+        # Documents Menu (open documents, populated by MainWindow)
+        self.menu_documents = self.addMenu("Documents")
+        
         # Help Menu
         help_menu = self.addMenu("Help")
         self.action_about = QAction("About", self)
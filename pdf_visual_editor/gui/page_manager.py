@@ -6,11 +6,52 @@ Se usa como mixin: class MainWindow(QMainWindow, ..., PageManagerMixin, ...)
 """
 
 from qt_compat import (QGraphicsPixmapItem, QGraphicsItem, QGraphicsRectItem,
-                       QPen, QTransform, QPixmap, Qt, QRectF, QSettings)
+                       QGraphicsTextItem, QPen, QTransform, QPixmap, Qt, QRectF, QSettings)
 from utils.geometry import CoordinateConverter
+from utils.scene_cache import SceneCache, SharedBudget, DEFAULT_BUDGET_MB
+from utils.prefetch import Prefetcher
+from .page_prefetch import PagePreparer
+from .document_view import DocumentView
+from .image_loader import PageImageLoader, ProjectImageLoader
+from utils.page_layout import PageLayout
+from utils.time_slicer import TimeSlicedJob, order_visible_first
+from omar_format import OmarFormat, ELEMENT_ID_KEY
+from element_model import PageModel
 import os
 
 
+# Rough memory of a graphics item and its Python wrapper, besides pixel data
+_ITEM_BYTES = 1024
+
+
+def estimate_scene_bytes(scene):
+    """
+    Rough memory held by a scene: pixel data of its pixmaps (a pixmap
+    shared by several items counted once), cached encodings of images, text
+    and its cached bitmaps, and a fixed overhead per item.
+    """
+    total = 0
+    seen_pixmaps = set()
+    for item in scene.items():
+        total += _ITEM_BYTES
+        if isinstance(item, QGraphicsPixmapItem):
+            pixmap = item.pixmap()
+            key = pixmap.cacheKey() if hasattr(pixmap, 'cacheKey') else id(pixmap)
+            if key not in seen_pixmaps:
+                seen_pixmaps.add(key)
+                depth = pixmap.depth() if hasattr(pixmap, 'depth') else 32
+                total += pixmap.width() * pixmap.height() * max(depth, 8) // 8
+            cached = item.cached_image() if hasattr(item, 'cached_image') else None
+            if cached is not None:
+                total += len(cached[0])
+        elif isinstance(item, QGraphicsTextItem):
+            total += 2 * len(item.toPlainText())
+            bitmap_cache = getattr(item, 'bitmap_cache', None)
+            if bitmap_cache is not None:
+                total += bitmap_cache.nbytes
+    return total
+
+
 class PageManagerMixin:
     """Mixin que añade a MainWindow la gestión de páginas del PDF y la caché de escenas."""
 
@@ -28,16 +69,334 @@ class PageManagerMixin:
             self.setWindowTitle("Untitled* - PDF Visual Editor")
         else:
             self.setWindowTitle("PDF Visual Editor")
+        if self.documents:
+            self.update_document_tabs()
 
     # ------------------------------------------------------------------
     # Scene cache helpers
     # ------------------------------------------------------------------
 
-    def save_scene_to_data(self, page_num):
-        """Serialize scene data before evicting from cache."""
-        if page_num in self.page_scenes:
-            scene = self.page_scenes[page_num]
-            self.page_elements[page_num] = self.get_elements_from_scene(scene)
+    def create_scene_budget(self):
+        """
+        Memory budget of this installation for the scenes of all open
+        documents together (QSettings "scene_cache_mb", DEFAULT_BUDGET_MB if unset).
+        """
+        settings = QSettings("Antigravity", "PDFVisualEditor")
+        budget_mb = settings.value("scene_cache_mb", DEFAULT_BUDGET_MB, type=int)
+        return SharedBudget(budget_mb * 1024 * 1024)
+
+    def create_scene_cache(self):
+        """Scene cache of a document, drawing on the window's shared budget."""
+        # Scenes are views of the page models (or of the layout analysis),
+        # so evicting one has nothing to save
+        return SceneCache(None, estimate_scene_bytes, shared_budget=self.scene_budget)
+
+    def scene_cache_stats(self):
+        """Entries, estimated bytes, budget and hit/miss/eviction counters."""
+        stats = self.page_scenes.stats()
+        # Scenes of every open document, all drawing on the budget
+        stats["shared_bytes"] = self.scene_budget.total_bytes
+        return stats
+
+    # ------------------------------------------------------------------
+    # Page element models
+    # ------------------------------------------------------------------
+
+    def page_model(self, page_num):
+        """
+        Element model of a page, or None for a page that was never edited
+        (its scene is built from the layout analysis).
+
+        Pages of an open project are read from it the first time they're
+        needed, so opening a project doesn't load every page.
+        """
+        model = self.page_models.get(page_num)
+        if model is None and self.project_reader is not None:
+            info = self.project_reader.page_info(page_num)
+            if info and info.get("element_count"):
+                model = PageModel.from_dicts(page_num, self.project_reader.page_elements(page_num))
+                self.page_models[page_num] = model
+        return model
+
+    def sync_page_model(self, page_num):
+        """Set the model of a page to the content of its scene (edits whose items aren't known)."""
+        scene = self.page_scenes.get(page_num)
+        if scene is None:
+            return self.page_model(page_num)
+        # Items still being added are part of the page
+        self.finish_population(scene)
+        model = self.page_models.get(page_num)
+        if model is None:
+            model = self.page_models[page_num] = PageModel(page_num)
+        model.replace(self._serialize_scene_elements(scene))
+        return model
+
+    def apply_item_edit(self, page_num, item, op, element=None):
+        """
+        Apply an edit of one item to its page model (connected to
+        EditorScene.itemEdited). element is the item's dict in page
+        coordinates, for views whose scene coordinates differ.
+        """
+        model = self.page_models.get(page_num)
+        if model is None:
+            model = self.sync_page_model(page_num)
+        elif op == "delete":
+            model.remove(OmarFormat.element_id(item))
+        else:
+            if element is None:
+                element = OmarFormat.serialize_graphics_item(item)
+            if element:
+                model.upsert(element)
+        self.journal_item_edit(page_num, item, op)
+
+    def _cached_preview(self, kind, page_num):
+        """Preview stored in the open project, if it was made from the loaded PDF."""
+        reader = self.project_reader
+        if reader is None or not reader.cache_matches(self.pdf_fingerprint):
+            return None
+        return reader.cached_preview(kind, page_num)
+
+    def _cached_pixmap(self, kind, page_num):
+        data = self._cached_preview(kind, page_num)
+        if not data:
+            return None
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(data):
+            return None
+        return pixmap
+
+    def _page_background(self, page_num, prepared=None):
+        """Background render of a page (scale 1.5)."""
+        pixmap = self.background_pixmaps.get(page_num)
+        if pixmap is None:
+            if prepared is not None and prepared.background is not None:
+                pixmap = QPixmap.fromImage(prepared.background)
+            else:
+                pixmap = self._cached_pixmap("backgrounds", page_num)
+            if pixmap is None:
+                pixmap = self.pdf_loader.get_page_pixmap(page_num, scale=1.5)
+            # Only the first page's background is kept for the project file
+            if page_num == 0:
+                self.background_pixmaps[page_num] = pixmap
+        return pixmap
+
+    def _page_analysis(self, page_num, prepared=None):
+        """Layout analysis of a page, from the prefetcher, the project's previews or pdfminer."""
+        elements = self.page_analysis.get(page_num)
+        if elements is None and prepared is not None:
+            elements = prepared.analysis
+        if elements is None:
+            elements = self._cached_preview("analysis", page_num)
+            if elements is None:
+                elements = self.layout_analyzer.analyze_page(page_num)
+            self.page_analysis[page_num] = elements
+        return elements
+
+    def _has_cached_preview(self, kind, page_num):
+        reader = self.project_reader
+        return (reader is not None and reader.cache_matches(self.pdf_fingerprint)
+                and reader.has_cached_preview(kind, page_num))
+
+    def _is_project_page(self, page_num):
+        """True if the page is built from its element model, not from the layout analysis."""
+        return self.page_model(page_num) is not None
+
+    # ------------------------------------------------------------------
+    # Edit tracking
+    # ------------------------------------------------------------------
+
+    def mark_page_dirty(self, page_num=None):
+        """Record an edit on a page (defaults to the page shown in the canvas)."""
+        if page_num is None:
+            page_num = getattr(self.canvas.scene, 'page_num', None)
+            if page_num is None:
+                return
+            # The changed items are not known; sync and journal the whole page
+            self.sync_page_model(page_num)
+            self.journal_page(page_num)
+        elif self.page_model(page_num) is None:
+            # First edit of a page built from the layout analysis: its
+            # scene becomes the page's model
+            self.sync_page_model(page_num)
+
+        self.edit_tracker.mark_dirty(page_num)
+        if not self.is_modified:
+            self.is_modified = True
+            self.update_window_title()
+
+    # ------------------------------------------------------------------
+    # Prefetch of adjacent pages
+    # ------------------------------------------------------------------
+
+    def start_prefetcher(self, pdf_source):
+        """Prefetch pages of a newly opened document (its path or stream)."""
+        self.stop_prefetcher()
+        if self.task_timer is None:
+            return  # Without a timer the results could not be delivered
+        self.page_preparer = PagePreparer(pdf_source, self.page_order)
+        self.prefetcher = Prefetcher(self.prefetch_runner, self.page_preparer)
+        self.page_images = PageImageLoader(self.prefetch_runner, self.page_preparer,
+                                           self.pdf_loader, on_submit=self._wake_task_timer)
+        self.project_images = ProjectImageLoader(self.prefetch_runner, self.shared_pixmaps,
+                                                 on_submit=self._wake_task_timer)
+
+    def stop_prefetcher(self):
+        """Drop prefetched pages; the worker closes its document after a running job."""
+        if self.prefetcher is not None:
+            self.prefetcher.reset()
+            self.page_images.close()
+            self.project_images.close()
+            self.prefetch_runner.submit(self.page_preparer.close)
+            self.prefetcher = None
+            self.page_preparer = None
+            self.page_images = None
+            self.project_images = None
+
+    def step_page(self, step):
+        """Show the page step places away in page order (PgDown/PgUp)."""
+        if not self.pdf_loader:
+            return
+        if self.continuous_scroll:
+            current_page = self.document_view.current_page()
+        else:
+            current_page = getattr(self.canvas.scene, 'page_num', None)
+        if current_page not in self.page_order:
+            return
+        index = self.page_order.index_of(current_page) + step
+        if 0 <= index < len(self.page_order):
+            page_num = self.page_order.ref(index).id
+            self.thumbnail_panel.select_page(page_num)
+            self.load_page(page_num)
+
+    def _prefetch_neighbours(self, page_num):
+        """Prepare the next and previous pages (in page order) in the background."""
+        if self.prefetcher is None or page_num not in self.page_order:
+            return
+        index = self.page_order.index_of(page_num)
+        neighbours = [self.page_order.ref(position).id for position in (index + 1, index - 1)
+                      if 0 <= position < len(self.page_order)]
+        self.prefetch_pages([neighbour for neighbour in neighbours
+                             if neighbour not in self.page_scenes])
+
+    def prefetch_pages(self, page_nums):
+        """Prepare pages in the background; queued pages not among them are cancelled."""
+        if self.prefetcher is None:
+            return
+        self.prefetcher.request([(page_num, self._prefetch_args(page_num))
+                                 for page_num in page_nums])
+        if self.prefetch_runner.busy:
+            self._wake_task_timer()
+
+    def _wake_task_timer(self):
+        """Poll the background runners until their results are delivered."""
+        if self.task_timer is not None and not self.task_timer.isActive():
+            self.task_timer.start()
+
+    def _prefetch_args(self, page_num):
+        """What the worker has to prepare for a page: (background, analysis, elements)."""
+        want_background = (page_num not in self.background_pixmaps
+                           and not self._has_cached_preview("backgrounds", page_num))
+        if self._is_project_page(page_num):
+            return want_background, False, None
+
+        elements = self.page_analysis.get(page_num)
+        want_analysis = False
+        if elements is None:
+            elements = self._cached_preview("analysis", page_num)
+            want_analysis = elements is None
+        return want_background, want_analysis, elements
+
+    # ------------------------------------------------------------------
+    # Continuous scroll view
+    # ------------------------------------------------------------------
+
+    def toggle_continuous_scroll(self, checked):
+        """Switch between the page editor and the continuous view of all pages."""
+        if checked == self.continuous_scroll:
+            return
+        if not checked:
+            self.open_page_in_editor(self.document_view.current_page())
+            return
+
+        page_num = getattr(self.canvas.scene, 'page_num', None)
+        self.cancel_population()
+        if self.document_view is None:
+            self.document_view = DocumentView(
+                self.build_document_page, self.page_version,
+                prefetch=self.prefetch_pages, undo_stack=self.undo_stack)
+            self.document_view.scene.contentEdited.connect(self.document_page_edited)
+            self.document_view.scene.itemEdited.connect(self.document_item_edited)
+            self.document_view.pageActivated.connect(self.open_page_in_editor)
+            self.main_splitter.insertWidget(0, self.document_view)
+        self.continuous_scroll = True
+        self.menu_bar.action_continuous_scroll.setChecked(True)
+        self.canvas.hide()
+        self.inspector_panel.clear()
+        self.document_view.show()
+        self.reset_document_view()
+        if page_num is not None:
+            self.document_view.scroll_to_page(page_num)
+
+    def open_page_in_editor(self, page_num):
+        """Leave the continuous view for the page editor, on page_num."""
+        if self.continuous_scroll:
+            self.continuous_scroll = False
+            self.menu_bar.action_continuous_scroll.setChecked(False)
+            # Offscreen pages are not kept while the view is hidden
+            self.document_view.release()
+            self.document_view.hide()
+            self.canvas.show()
+        if page_num is not None:
+            self.thumbnail_panel.select_page(page_num)
+            self.load_page(page_num)
+
+    def reset_document_view(self):
+        """Lay out the pages of the loaded document in the continuous view."""
+        if not self.continuous_scroll:
+            return
+        layout = None
+        if self.pdf_loader:
+            layout = PageLayout(self.pdf_loader.get_page_sizes(), self.page_order.ids())
+        self.document_view.set_layout(layout)
+
+    def page_version(self, page_num):
+        """Version of a page's element model (None for pages never edited)."""
+        model = self.page_model(page_num)
+        return model.version if model is not None else None
+
+    def build_document_page(self, page_num):
+        """
+        Background and items of a page for the continuous view, from its
+        element model or its layout analysis.
+
+        Returns:
+            (background pixmap, background opacity, items, model version)
+        """
+        prepared = self.prefetcher.take(page_num) if self.prefetcher else None
+        pixmap = self._page_background(page_num, prepared)
+        model = self.page_model(page_num)
+        if model is not None:
+            items = self._element_items(model.to_dicts())
+            return pixmap, self._background_opacity(page_num), items, model.version
+        items = self._analysis_items(page_num, self._page_analysis(page_num, prepared), prepared)
+        return pixmap, 0.5, items, None
+
+    def document_page_edited(self, page_num):
+        """An edit in the continuous view touched a page (DocumentScene.contentEdited)."""
+        if self.page_model(page_num) is None:
+            # First edit of a page built from the layout analysis
+            model = self.page_models[page_num] = PageModel(page_num)
+            model.replace(self.document_view.page_elements(page_num))
+        # The page's editor scene is out of date; it is rebuilt from the
+        # model when the page is opened again
+        self.page_scenes.pop(page_num)
+        self.mark_page_dirty(page_num)
+
+    def document_item_edited(self, page_num, item, op):
+        """Apply an item edit made in the continuous view (DocumentScene.itemEdited)."""
+        element = self.document_view.serialize_item(item) if op != "delete" else None
+        self.apply_item_edit(page_num, item, op, element)
+        self.document_view.note_edit(page_num, item)
 
     # ------------------------------------------------------------------
     # Load page (standard — from PDF analysis or cache)
@@ -47,37 +406,54 @@ class PageManagerMixin:
         if not self.pdf_loader:
             return
 
+        if self.continuous_scroll:
+            self.document_view.scroll_to_page(page_num)
+            return
+
+        # Rotated pages are shown turned; their scene is not
+        self.canvas.set_page_rotation(self.page_order.resolve(page_num).rotation)
+
+        if self.scene_population is not None:
+            if self.scene_population[0].page_num == page_num:
+                return  # Already shown, its items are still being added
+            self.cancel_population()
+
+        # The page being left may have grown while it was edited
+        current_page = getattr(self.canvas.scene, 'page_num', None)
+        if current_page is not None and current_page != page_num:
+            self.page_scenes.refresh(current_page)
+
         # Check if we already have a scene for this page
         if page_num in self.page_scenes:
-            if page_num in self.scene_cache_order:
-                self.scene_cache_order.remove(page_num)
-            self.scene_cache_order.append(page_num)
-
-            self.canvas.set_scene(self.page_scenes[page_num])
-            self.populate_inspector_from_scene(self.page_scenes[page_num])
+            scene = self.page_scenes.touch(page_num)
+            self.canvas.set_scene(scene)
+            self.populate_inspector_from_scene(scene)
+            self._prefetch_neighbours(page_num)
             return
 
-        # Check if cache is full — evict LRU page if needed
-        if len(self.page_scenes) >= self.MAX_CACHED_SCENES:
-            lru_page = self.scene_cache_order.pop(0)
-            self.save_scene_to_data(lru_page)
-            del self.page_scenes[lru_page]
+        prepared = self.prefetcher.take(page_num) if self.prefetcher else None
+
+        # Edited pages (and pages restored from a project) are rebuilt
+        # from their element model, not analyzed again
+        if self._is_project_page(page_num):
+            self.load_page_from_project(page_num, prepared)
+            return
 
         # Lazy import to avoid circular imports
-        from .editor_canvas import (EditorScene, EditableTextItem,
-                                    ResizablePixmapItem, ResizerHandle)
+        from .editor_canvas import EditorScene
 
         # Create new scene
-        scene = EditorScene(self.canvas, undo_stack=self.undo_stack)
-        self.page_scenes[page_num] = scene
-        self.scene_cache_order.append(page_num)
+        scene = EditorScene(self.canvas, undo_stack=self.undo_stack, page_num=page_num)
+        self.page_scenes.add(page_num, scene)
         self.canvas.set_scene(scene)
 
-        # Connect selection signal
+        # Connect selection and edit signals
         scene.selectionChanged.connect(self.sync_selection_to_inspector)
+        scene.contentEdited.connect(self.mark_page_dirty)
+        scene.itemEdited.connect(self.apply_item_edit)
 
         # Render Page Background
-        pixmap = self.pdf_loader.get_page_pixmap(page_num, scale=1.5)
+        pixmap = self._page_background(page_num, prepared)
         bg_item = QGraphicsPixmapItem(pixmap)
         bg_item.setZValue(-100)
         bg_item.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable, False)
@@ -90,108 +466,116 @@ class PageManagerMixin:
         # Update inspector slider
         self.inspector_panel.set_background_opacity_value(0.5)
 
+        # Add elements to canvas (and the inspector), a time slice at a time
+        elements = self._page_analysis(page_num, prepared)
+        _, page_height = self.pdf_loader.get_page_size(page_num)
+        self._populate_scene(
+            scene, list(enumerate(elements)),
+            lambda unit: self._analysis_item(page_num, page_height, unit[0], unit[1], prepared),
+            lambda unit: CoordinateConverter.pdf_rect_to_qt_rect(unit[1]['bbox'], page_height, scale=1.5))
+        self._prefetch_neighbours(page_num)
+
+    def _analysis_items(self, page_num, elements, prepared=None):
+        """Items of a page built from its layout analysis (scene coordinates at scale 1.5)."""
         # Get page height for coordinate conversion
         _, page_height = self.pdf_loader.get_page_size(page_num)
 
-        # Check if we have saved element data (previously visited page)
-        if page_num in self.page_elements and self.page_elements[page_num]:
-            elements = self.page_elements[page_num]
-        else:
-            elements = self.layout_analyzer.analyze_page(page_num)
-            self.page_elements[page_num] = elements
-
-        # Add elements to canvas
-        for i, el in enumerate(elements):
-            scale = 1.5
-            qt_x, qt_y, w, h = CoordinateConverter.pdf_rect_to_qt_rect(
-                el['bbox'], page_height, scale=scale
-            )
+        items = (self._analysis_item(page_num, page_height, i, el, prepared)
+                 for i, el in enumerate(elements))
+        return [item for item in items if item is not None]
 
-            x = qt_x
-            y = qt_y
-
-            item = None
-            if el.get('type') == 'text':
-                text_content = el.get('text', '').strip()
-                if text_content:
-                    font_size = el.get('font_size', 12) * scale
-                    item = EditableTextItem(text_content)
-                    item.setPos(x, y)
-                    font = item.font()
-                    font.setPointSize(int(font_size))
-                    item.setFont(font)
-                    scene.addItem(item)
-            elif el.get('type') == 'image':
-                bbox = el['bbox']
-                try:
-                    img_pixmap = self.pdf_loader.get_image_from_rect(page_num, bbox, scale=2.0)
+    def _analysis_item(self, page_num, page_height, i, el, prepared=None):
+        """Item of one layout analysis element (None for blank text)."""
+        from .editor_canvas import EditableTextItem, ResizablePixmapItem
+
+        scale = 1.5
+        qt_x, qt_y, w, h = CoordinateConverter.pdf_rect_to_qt_rect(
+            el['bbox'], page_height, scale=scale
+        )
+
+        x = qt_x
+        y = qt_y
+
+        item = None
+        if el.get('type') == 'text':
+            text_content = el.get('text', '').strip()
+            if text_content:
+                font_size = el.get('font_size', 12) * scale
+                item = EditableTextItem(text_content)
+                item.setPos(x, y)
+                font = item.font()
+                font.setPointSize(int(font_size))
+                item.setFont(font)
+        elif el.get('type') == 'image':
+            bbox = el['bbox']
+            try:
+                image = prepared.images.get(tuple(bbox)) if prepared else None
+                if image is None and self.page_images is not None:
+                    # Extracted once the item is shown, selected or saved
+                    item = self.page_images.placeholder_item((page_num, tuple(bbox)), w, h)
+                else:
+                    if image is not None:
+                        img_pixmap = QPixmap.fromImage(image)
+                    else:
+                        img_pixmap = self.pdf_loader.get_image_from_rect(page_num, bbox, scale=2.0)
                     item = ResizablePixmapItem(img_pixmap)
-                    curr_w = img_pixmap.width()
-                    curr_h = img_pixmap.height()
-                    item.setPos(x, y)
-                    transform = QTransform()
-                    transform.scale(w / curr_w, h / curr_h)
-                    item.setTransform(transform)
-                    scene.addItem(item)
-                except Exception as e:
-                    print(f"Failed to extract image: {e}")
-                    item = QGraphicsRectItem(x, y, w, h)
-                    item.setPen(QPen(Qt.GlobalColor.blue))
-                    item.setFlags(
-                        QGraphicsItem.GraphicsItemFlag.ItemIsMovable |
-                        QGraphicsItem.GraphicsItemFlag.ItemIsSelectable
-                    )
-                    scene.addItem(item)
-            else:
+                curr_w = item.boundingRect().width()
+                curr_h = item.boundingRect().height()
+                item.setPos(x, y)
+                transform = QTransform()
+                transform.scale(w / curr_w, h / curr_h)
+                item.setTransform(transform)
+            except Exception as e:
+                print(f"Failed to extract image: {e}")
                 item = QGraphicsRectItem(x, y, w, h)
-                item.setPen(QPen(Qt.GlobalColor.darkGreen))
+                item.setPen(QPen(Qt.GlobalColor.blue))
                 item.setFlags(
                     QGraphicsItem.GraphicsItemFlag.ItemIsMovable |
                     QGraphicsItem.GraphicsItemFlag.ItemIsSelectable
                 )
-                scene.addItem(item)
-
-            if item:
-                item.setData(Qt.ItemDataRole.UserRole, el)
-                item.setData(Qt.ItemDataRole.UserRole + 2, i)  # Original Index
+        else:
+            item = QGraphicsRectItem(x, y, w, h)
+            item.setPen(QPen(Qt.GlobalColor.darkGreen))
+            item.setFlags(
+                QGraphicsItem.GraphicsItemFlag.ItemIsMovable |
+                QGraphicsItem.GraphicsItemFlag.ItemIsSelectable
+            )
 
-        self.populate_inspector_from_scene_auto(scene)
+        if item:
+            item.setData(Qt.ItemDataRole.UserRole, el)
+            item.setData(Qt.ItemDataRole.UserRole + 2, i)  # Original Index
+        return item
 
     # ------------------------------------------------------------------
     # Load page from .omar project (preserves structure)
     # ------------------------------------------------------------------
 
-    def load_page_from_project(self, page_num, project_data):
-        """Load a page with data from project file (no auto-organization)."""
+    def load_page_from_project(self, page_num, prepared=None):
+        """Load a page from its element model (no auto-organization)."""
         if not self.pdf_loader:
             return
 
         from .editor_canvas import EditorScene
 
         # Create new scene
-        scene = EditorScene(self.canvas, undo_stack=self.undo_stack)
-        self.page_scenes[page_num] = scene
-        self.scene_cache_order.append(page_num)
+        scene = EditorScene(self.canvas, undo_stack=self.undo_stack, page_num=page_num)
+        self.page_scenes.add(page_num, scene)
         self.canvas.set_scene(scene)
 
-        # Connect selection signal
+        # Connect selection and edit signals
         scene.selectionChanged.connect(self.sync_selection_to_inspector)
+        scene.contentEdited.connect(self.mark_page_dirty)
+        scene.itemEdited.connect(self.apply_item_edit)
 
         # Render Page Background
-        pixmap = self.pdf_loader.get_page_pixmap(page_num, scale=1.5)
+        pixmap = self._page_background(page_num, prepared)
         bg_item = QGraphicsPixmapItem(pixmap)
         bg_item.setZValue(-100)
         bg_item.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable, False)
         bg_item.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsMovable, False)
 
         # Restore background opacity
-        pages_data = project_data.get("pages", [])
-        bg_opacity = 0.5  # default
-        for page_data in pages_data:
-            if page_data.get("page_num") == page_num:
-                bg_opacity = page_data.get("background_opacity", 0.5)
-                break
-
+        bg_opacity = self._background_opacity(page_num)
         bg_item.setOpacity(bg_opacity)
         scene.addItem(bg_item)
         scene.setSceneRect(QRectF(pixmap.rect()))
@@ -200,75 +584,203 @@ class PageManagerMixin:
         # Update inspector slider
         self.inspector_panel.set_background_opacity_value(bg_opacity)
 
-        # Restore elements from project data
-        if page_num in self.page_elements:
-            self._restore_elements_to_scene(scene, self.page_elements[page_num])
+        # Build the scene (and the inspector) from the page's element
+        # model, a time slice at a time
+        model = self.page_model(page_num)
+        self._populate_scene(
+            scene, model.to_dicts() if model is not None else [], self._element_item,
+            lambda element: (element.get("x", 0), element.get("y", 0),
+                             element.get("width", 0), element.get("height", 0)))
+        self._prefetch_neighbours(page_num)
+
+    def _background_opacity(self, page_num):
+        """Background opacity saved in the open project for a page (0.5 by default)."""
+        page_info = self.project_reader.page_info(page_num) if self.project_reader else None
+        if page_info:
+            return page_info.get("background_opacity", 0.5)
+        return 0.5
 
-        # Populate inspector
-        self.populate_inspector_from_scene_auto(scene)
+    # ------------------------------------------------------------------
+    # Time-sliced scene population
+    # ------------------------------------------------------------------
+
+    def _populate_scene(self, scene, units, build, bounds):
+        """
+        Add the items of a new page scene, and their inspector entries, in
+        time slices so a dense page doesn't freeze the window.
+
+        The units in the viewport are built first, so the visible part of
+        the page is complete after the first slices; the rest follow from
+        population_timer. scene.populated is emitted once all are added.
+
+        Args:
+            scene: Scene shown in the canvas (its background already added)
+            units: Element data of the items, in stacking order
+            build: unit -> graphics item (None to skip the unit)
+            bounds: unit -> (x, y, width, height) in scene coordinates
+        """
+        self.cancel_population()
+        visible = self.canvas.mapToScene(self.canvas.viewport().rect()).boundingRect()
+        units = order_visible_first(
+            units, bounds, (visible.left(), visible.top(), visible.right(), visible.bottom()))
+
+        def add_item(unit):
+            item = build(unit)
+            if item is not None:
+                scene.addItem(item)
+            return item
+
+        self.inspector_panel.start_auto_organize()
+        job = TimeSlicedJob(units, add_item,
+                            on_batch=self.inspector_panel.add_graphics_items,
+                            on_done=lambda: self._population_finished(scene))
+        scene.is_populated = False
+        self.scene_population = (scene, job)
+
+        if self.population_timer is None:
+            job.run_all()
+        elif not job.run_slice():
+            self.population_timer.start()
+
+    def _populate_next_slice(self):
+        """Timer slot: add the next slice of items of the page being populated."""
+        if self.scene_population is None:
+            self.population_timer.stop()
+            return
+        try:
+            self.scene_population[1].run_slice()
+        except Exception as e:
+            print(f"Failed to populate page: {e}")
+            self.cancel_population()
+
+    def _population_finished(self, scene):
+        self.scene_population = None
+        if self.population_timer is not None:
+            self.population_timer.stop()
+        scene.is_populated = True
+        # Weigh the populated scene; older pages are evicted if over budget
+        self.page_scenes.refresh(scene.page_num)
+        scene.populated.emit(scene.page_num)
+
+    def finish_population(self, scene=None):
+        """Add the remaining items of a scene being populated (any scene by default) now."""
+        if self.scene_population is not None and scene in (None, self.scene_population[0]):
+            self.scene_population[1].run_all()
+
+    def cancel_population(self):
+        """
+        Stop populating a scene (another page is shown, or another document
+        opened). The incomplete scene is dropped from the cache; its page is
+        built again when it's next shown.
+        """
+        if self.scene_population is None:
+            return
+        scene, job = self.scene_population
+        job.cancel()
+        self.scene_population = None
+        if self.population_timer is not None:
+            self.population_timer.stop()
+        if self.page_scenes.get(scene.page_num) is scene:
+            self.page_scenes.pop(scene.page_num)
 
     # ------------------------------------------------------------------
     # Restore serialized elements into a scene
     # ------------------------------------------------------------------
 
-    def _restore_elements_to_scene(self, scene, elements_data):
-        """Restore graphics items from serialized element data."""
-        from .editor_canvas import EditableTextItem, ResizablePixmapItem
+    def _element_image(self, element_data):
+        """
+        (image bytes, image ref) of an image element; the bytes are kept by
+        the item so saving it doesn't encode the pixmap again.
+
+        Images are keyed by content hash (the v2 "image_ref", computed for
+        v1 data), so duplicated items share one decoded image.
+        """
+        from omar_container import image_member_name
         import base64
 
-        for element_data in elements_data:
-            item = None
-            element_type = element_data.get("type")
+        image_data = element_data["image_data"]
+        # v2 projects hold raw bytes, v1 base64 text
+        if isinstance(image_data, str):
+            image_data = base64.b64decode(image_data)
+        return image_data, element_data.get("image_ref") or image_member_name(image_data)
+
+    def _shared_pixmap(self, image_data, image_ref):
+        """Decode an image once per project (duplicated items share one implicitly shared QPixmap)."""
+        pixmap = self.shared_pixmaps.get(image_ref)
+        if pixmap is None:
+            pixmap = QPixmap()
+            pixmap.loadFromData(image_data)
+            self.shared_pixmaps[image_ref] = pixmap
+        return pixmap
+
+    def _element_items(self, elements_data):
+        """Graphics items restored from serialized element data."""
+        items = (self._element_item(element_data) for element_data in elements_data)
+        return [item for item in items if item is not None]
+
+    def _element_item(self, element_data):
+        """Graphics item restored from one serialized element (None if it can't be)."""
+        from .editor_canvas import EditableTextItem, ResizablePixmapItem
 
-            if element_type == "text":
-                text = element_data.get("text", "")
-                item = EditableTextItem(text)
+        item = None
+        element_type = element_data.get("type")
 
-                font = item.font()
-                font.setFamily(element_data.get("font_family", "Arial"))
-                font.setPointSize(int(element_data.get("font_size", 12)))
-                font.setBold(element_data.get("font_bold", False))
-                font.setItalic(element_data.get("font_italic", False))
-                item.setFont(font)
+        if element_type == "text":
+            text = element_data.get("text", "")
+            item = EditableTextItem(text)
 
-            elif element_type == "image":
-                image_data_b64 = element_data.get("image_data", "")
-                if image_data_b64:
-                    try:
-                        image_bytes = base64.b64decode(image_data_b64)
-                        pixmap = QPixmap()
-                        pixmap.loadFromData(image_bytes)
-                        item = ResizablePixmapItem(pixmap)
-                    except Exception as e:
-                        print(f"Failed to restore image: {e}")
-                        continue
-
-            elif element_type == "shape":
-                width = element_data.get("width", 100)
-                height = element_data.get("height", 100)
-                item = QGraphicsRectItem(0, 0, width, height)
-                item.setPen(QPen(Qt.GlobalColor.blue))
-                item.setFlags(
-                    QGraphicsItem.GraphicsItemFlag.ItemIsMovable |
-                    QGraphicsItem.GraphicsItemFlag.ItemIsSelectable
-                )
-
-            if item:
-                pos_x = element_data.get("x", 0)
-                pos_y = element_data.get("y", 0)
-                item.setPos(pos_x, pos_y)
+            font = item.font()
+            font.setFamily(element_data.get("font_family", "Arial"))
+            font.setPointSize(int(element_data.get("font_size", 12)))
+            font.setBold(element_data.get("font_bold", False))
+            font.setItalic(element_data.get("font_italic", False))
+            item.setFont(font)
 
-                transform_matrix = element_data.get("transform_matrix", [1, 0, 0, 1, 0, 0])
-                if len(transform_matrix) == 6:
-                    transform = QTransform(
-                        transform_matrix[0], transform_matrix[1],
-                        transform_matrix[2], transform_matrix[3],
-                        transform_matrix[4], transform_matrix[5]
-                    )
-                    item.setTransform(transform)
-
-                item.setOpacity(element_data.get("opacity", 1.0))
-                item.setVisible(element_data.get("visible", True))
-                item.setZValue(element_data.get("z_value", 0))
+        elif element_type == "image":
+            if element_data.get("image_data"):
+                try:
+                    image_data, image_ref = self._element_image(element_data)
+                    width = element_data.get("width")
+                    height = element_data.get("height")
+                    if (self.project_images is not None and width and height
+                            and image_ref not in self.shared_pixmaps):
+                        # Decoded once the item is shown, selected or saved
+                        item = self.project_images.placeholder_item(
+                            (image_data, image_ref), width, height)
+                    else:
+                        pixmap = self._shared_pixmap(image_data, image_ref)
+                        item = ResizablePixmapItem(pixmap, encoded=(image_data, image_ref))
+                except Exception as e:
+                    print(f"Failed to restore image: {e}")
+                    return None
+
+        elif element_type == "shape":
+            width = element_data.get("width", 100)
+            height = element_data.get("height", 100)
+            item = QGraphicsRectItem(0, 0, width, height)
+            item.setPen(QPen(Qt.GlobalColor.blue))
+            item.setFlags(
+                QGraphicsItem.GraphicsItemFlag.ItemIsMovable |
+                QGraphicsItem.GraphicsItemFlag.ItemIsSelectable
+            )
 
-                scene.addItem(item)
+        if item:
+            pos_x = element_data.get("x", 0)
+            pos_y = element_data.get("y", 0)
+            item.setPos(pos_x, pos_y)
+
+            transform_matrix = element_data.get("transform_matrix", [1, 0, 0, 1, 0, 0])
+            if len(transform_matrix) == 6:
+                transform = QTransform(
+                    transform_matrix[0], transform_matrix[1],
+                    transform_matrix[2], transform_matrix[3],
+                    transform_matrix[4], transform_matrix[5]
+                )
+                item.setTransform(transform)
+
+            item.setOpacity(element_data.get("opacity", 1.0))
+            item.setVisible(element_data.get("visible", True))
+            item.setZValue(element_data.get("z_value", 0))
+            if element_data.get("id"):
+                item.setData(ELEMENT_ID_KEY, element_data["id"])
+        return item
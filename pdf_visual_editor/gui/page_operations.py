@@ -0,0 +1,210 @@
+"""
+PageOperationsMixin — operaciones sobre las páginas del documento.
+
+Insertar páginas de otro PDF, eliminar, duplicar, rotar, extraer y
+reordenar páginas. Cada operación cambia el orden de páginas
+(utils/page_order.py) en un solo paso que se puede deshacer; la lista de
+miniaturas se actualiza en el sitio.
+Se usa como mixin: class MainWindow(QMainWindow, ..., PageOperationsMixin, ...)
+"""
+
+from qt_compat import QFileDialog, QMessageBox, QIcon, QTransform
+from export.pdf_writer import PDFWriter
+from element_model import PageModel
+from gui.commands import PageOrderCommand
+import os
+
+
+class PageOperationsMixin:
+    """Mixin que añade a MainWindow las operaciones de páginas (insertar, eliminar, duplicar, rotar, extraer)."""
+
+    # ------------------------------------------------------------------
+    # Pages operated on
+    # ------------------------------------------------------------------
+
+    def current_page_id(self):
+        """Page shown in the editor (or at the top of the continuous view)."""
+        if self.continuous_scroll:
+            return self.document_view.current_page()
+        return getattr(self.canvas.scene, 'page_num', None)
+
+    def _target_pages(self):
+        """Pages an operation applies to: the selected thumbnails, or the page shown."""
+        if self.page_order is None:
+            return []
+        pages = [page_num for page_num in self.thumbnail_panel.selected_pages()
+                 if page_num in self.page_order]
+        if not pages:
+            current = self.current_page_id()
+            if current in self.page_order:
+                pages = [current]
+        return pages
+
+    # ------------------------------------------------------------------
+    # Undoable changes of the page order
+    # ------------------------------------------------------------------
+
+    def change_page_order(self, description, operation):
+        """
+        Apply operation(page_order) as one undoable step (nothing is pushed
+        if the order didn't change). Returns what operation returned.
+        """
+        before = self.page_order.snapshot()
+        previous_ids = self.page_order.ids()
+        result = operation(self.page_order)
+        after = self.page_order.snapshot()
+        if after != before:
+            self._keep_page_models(previous_ids)
+            self.undo_stack.push(PageOrderCommand(self, before, after, description))
+        return result
+
+    def apply_page_order(self, snapshot):
+        """Show a page order snapshot (PageOrderCommand undo/redo)."""
+        current = self.current_page_id()
+        previous_ids = self.page_order.ids()
+        self.page_order.restore(snapshot)
+        self._keep_page_models(previous_ids)
+        self.thumbnail_panel.sync_order(self.page_order.refs(), self._thumbnail_icon)
+        self.reset_document_view()
+
+        if current is not None and current not in self.page_order and len(self.page_order):
+            # The page shown was removed: show the one that took its place
+            position = previous_ids.index(current) if current in previous_ids else 0
+            current = self.page_order.ref(min(position, len(self.page_order) - 1)).id
+            self.thumbnail_panel.select_page(current)
+            self.load_page(current)
+        elif current is not None:
+            self.thumbnail_panel.select_page(current)
+            if not self.continuous_scroll:
+                self.canvas.set_page_rotation(self.page_order.resolve(current).rotation)
+
+        self.is_modified = True
+        self.update_window_title()
+
+    def _keep_page_models(self, previous_ids):
+        """
+        Keep the edits of pages that left or re-entered the order. Saving
+        drops the entries of removed pages from the project, so their
+        models are read while it still has them, and pages brought back
+        (undo) are saved again.
+        """
+        ids = set(self.page_order.ids())
+        for page_num in previous_ids:
+            if page_num not in ids:
+                self.page_model(page_num)
+        previous = set(previous_ids)
+        for page_num in ids - previous:
+            if page_num in self.page_models:
+                self.edit_tracker.mark_dirty(page_num)
+
+    def _thumbnail_icon(self, ref):
+        """Thumbnail of a page, turned by its rotation."""
+        pixmap = self.thumbnail_pixmaps.get(ref.id)
+        if pixmap is None:
+            pixmap = self._cached_pixmap("thumbnails", ref.id)
+            if pixmap is None:
+                pixmap = self.pdf_loader.get_page_pixmap(ref.id, scale=0.2)
+            self.thumbnail_pixmaps[ref.id] = pixmap
+        return QIcon(rotated_pixmap(pixmap, ref.rotation))
+
+    # ------------------------------------------------------------------
+    # Operations (Pages menu)
+    # ------------------------------------------------------------------
+
+    def insert_pages_dialog(self):
+        """Insert all pages of another PDF after the current page."""
+        if not self.pdf_loader:
+            return
+        file_path, _ = QFileDialog.getOpenFileName(self, "Insert Pages", "", "PDF Files (*.pdf)")
+        if not file_path:
+            return
+
+        try:
+            source = self.page_order.add_source(os.path.abspath(file_path))
+            page_count = self.pdf_loader.source_page_count(source)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to insert pages: {str(e)}")
+            return
+
+        current = self.current_page_id()
+        if current in self.page_order:
+            position = self.page_order.index_of(current) + 1
+        else:
+            position = len(self.page_order)
+        self.change_page_order("Insert Pages",
+                               lambda order: order.insert(position, source, range(page_count)))
+        self.status_label.setText(f"Inserted {page_count} page(s) from {file_path}")
+
+    def delete_pages(self):
+        """Remove the selected pages (a document keeps at least one page)."""
+        pages = self._target_pages()
+        if not pages:
+            return
+        if len(pages) >= len(self.page_order):
+            QMessageBox.warning(self, "Delete Pages", "A document needs at least one page.")
+            return
+        self.change_page_order("Delete Pages", lambda order: order.delete(pages))
+
+    def duplicate_pages(self):
+        """Copy the selected pages, with their edits, each copy after its page."""
+        pages = self._target_pages()
+        if not pages:
+            return
+        # Copies come in page order, like the pages they copy
+        originals = [page_num for page_num in self.page_order.ids() if page_num in pages]
+        copies = self.change_page_order("Duplicate Pages", lambda order: order.duplicate(pages))
+        for page_num, copy in zip(originals, copies):
+            model = self.page_model(page_num)
+            if model is not None:
+                self.page_models[copy] = PageModel.from_dicts(copy, model.to_dicts())
+                self.edit_tracker.mark_dirty(copy)
+
+    def rotate_pages(self, degrees):
+        """Turn the selected pages clockwise by degrees (a multiple of 90)."""
+        pages = self._target_pages()
+        if pages:
+            self.change_page_order("Rotate Pages", lambda order: order.rotate(pages, degrees))
+
+    def reorder_pages(self, page_ids):
+        """The thumbnails were dragged into a new order (ThumbnailPanel.orderChanged)."""
+        if self.page_order is None or page_ids == self.page_order.ids():
+            return
+        self.change_page_order("Move Pages", lambda order: order.set_ids(page_ids))
+
+    def extract_pages_dialog(self):
+        """Save the pages from the first to the last selected one, with their edits, as a new PDF."""
+        pages = self._target_pages()
+        if not pages:
+            return
+        positions = [self.page_order.index_of(page_num) for page_num in pages]
+        refs = self.page_order.extract(min(positions), max(positions))
+
+        out_path, _ = QFileDialog.getSaveFileName(self, "Extract Pages", "", "PDF Files (*.pdf)")
+        if not out_path:
+            return
+        if self.current_file and os.path.abspath(out_path) == os.path.abspath(self.current_file):
+            QMessageBox.warning(self, "Extract Pages", "Pages can't be extracted over the open PDF.")
+            return
+
+        try:
+            pages_data = self._gather_export_pages_data()
+            writer = PDFWriter(self._open_source_pdf(), out_path,
+                               page_sources=self.page_order.sources)
+            report = writer.save({ref.id: pages_data[ref.id] for ref in refs if ref.id in pages_data},
+                                 refs, incremental=False)
+            QMessageBox.information(self, "Success",
+                                    f"Extracted {len(refs)} page(s).\n\n{report.summary()}")
+            self.status_label.setText(f"Extracted: {out_path}")
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            QMessageBox.critical(self, "Error", f"Failed to extract pages: {str(e)}")
+
+
+def rotated_pixmap(pixmap, rotation):
+    """pixmap turned clockwise by rotation degrees (as is where it can't be)."""
+    if not rotation or not hasattr(pixmap, 'transformed'):
+        return pixmap
+    transform = QTransform()
+    transform.rotate(rotation)
+    return pixmap.transformed(transform)
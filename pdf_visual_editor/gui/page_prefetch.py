@@ -0,0 +1,95 @@
+"""
+PagePreparer — background preparation of the pages next to the current one.
+
+Renders, analyzes and extracts the images of a page on the prefetch worker
+thread (see utils/prefetch.py), with its own PyMuPDF document and layout
+analyzer: neither is safe to share with the UI thread. Results are QImages;
+the UI thread turns them into pixmaps when it builds the scene.
+"""
+
+import io
+
+from pdf_loader import PDFLoader
+from layout_analyzer import LayoutAnalyzer
+from utils.pdf_source import is_pdf_path, read_pdf_bytes
+
+
+class PreparedPage:
+    """Data of a page prepared in the background (None where not needed)."""
+    __slots__ = ("page_num", "background", "analysis", "images")
+
+    def __init__(self, page_num, background=None, analysis=None, images=None):
+        self.page_num = page_num
+        self.background = background  # QImage of the background (scale 1.5)
+        self.analysis = analysis  # Layout analysis elements
+        self.images = images or {}  # Image bbox (tuple) -> QImage of the extracted image
+
+
+class PagePreparer:
+    """
+    Callable run by the prefetcher on its worker thread.
+
+    The document is opened on first use, on the worker thread. A source
+    PDF held in memory is copied, so pdfminer's seeks don't move the file
+    position the UI thread's analyzer relies on.
+    """
+    def __init__(self, source, pages=None):
+        """
+        Args:
+            source: Path or file object of the document
+            pages: PageOrder of the window (page ids to pages of the
+                document or of inserted PDFs); the worker only reads the
+                source and index of ids, which never change
+        """
+        self.source = source
+        self.pages = pages
+        self._loader = None
+        self._analyzer = None
+
+    def __call__(self, page_num, want_background, want_analysis, elements):
+        """
+        Args:
+            page_num: Page to prepare
+            want_background: Render the background (not stored in the project)
+            want_analysis: Analyze the layout (elements is then ignored)
+            elements: Known analysis elements whose images are extracted
+
+        Returns:
+            PreparedPage
+        """
+        self._open()
+        prepared = PreparedPage(page_num)
+        if want_background:
+            prepared.background = self._loader.render_page_image(page_num, scale=1.5)
+        if want_analysis:
+            elements = prepared.analysis = self._analyzer.analyze_page(page_num)
+
+        for element in elements or []:
+            if element.get('type') == 'image' and 'bbox' in element:
+                try:
+                    prepared.images[tuple(element['bbox'])] = self._loader.extract_image(
+                        page_num, element['bbox'], scale=2.0)
+                except Exception:
+                    pass  # load_page falls back to a placeholder rect
+        return prepared
+
+    def extract_image(self, page_num, bbox):
+        """QImage of the image in bbox (for a placeholder image item, see gui/image_loader.py)."""
+        self._open()
+        return self._loader.extract_image(page_num, bbox, scale=2.0)
+
+    def _open(self):
+        if self._loader is not None:
+            return
+        source = self.source
+        if not is_pdf_path(source):
+            source = io.BytesIO(read_pdf_bytes(source))
+        self._loader = PDFLoader(source, self.pages)
+        self._analyzer = LayoutAnalyzer(source, self.pages)
+
+    def close(self):
+        """Close the worker's document (run it on the worker thread, after the jobs)."""
+        if self._loader is not None:
+            self._loader.close()
+            self._loader = None
+            self._analyzer = None
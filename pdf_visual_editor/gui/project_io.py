@@ -9,12 +9,56 @@ from qt_compat import (QFileDialog, QMessageBox, QBuffer, QIODevice,
                        QSettings, QGraphicsTextItem, QGraphicsPixmapItem)
 from export.pdf_writer import PDFWriter
 from export.pikepdf_writer import PikePDFWriter
-from omar_format import OmarFormat
+from export.profiles import PROFILES
+from export.project_elements import project_elements_to_export
+from omar_format import OmarFormat, capture_image
+from element_model import PageModel
+from omar_journal import (JournalWriter, journal_path, base_token, read_journal,
+                          journal_matches, replay_journal)
 from pdf_loader import PDFLoader
 from layout_analyzer import LayoutAnalyzer
+from utils.pdf_source import read_pdf_bytes, pdf_fingerprint
+from utils.page_order import PageOrder
+import io
 import os
 
 
+# Image format of each kind of stored preview
+_PREVIEW_FORMATS = {"thumbnails": "JPG", "backgrounds": "PNG"}
+
+
+def _encode_pixmap(pixmap, image_format):
+    """Encode a QPixmap or QImage (QImage also on worker threads)."""
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.ReadWrite)
+    pixmap.save(buffer, image_format)
+    return bytes(buffer.data().data())
+
+
+def _encode_previews(cache):
+    """Encode, in place, the preview images gathered as QImage."""
+    for kind, image_format in _PREVIEW_FORMATS.items():
+        cache[kind] = {page_num: _encode_pixmap(image, image_format)
+                       for page_num, image in cache[kind].items()}
+
+
+def _write_project_snapshot(output_path, project_meta, pages, update):
+    """
+    Worker side of a background save: encodes the images captured by the
+    snapshot and writes the project file. Touches no widgets or pixmaps.
+    """
+    for page in pages:
+        OmarFormat.encode_images(page["elements"])
+    if project_meta.get("cache"):
+        _encode_previews(project_meta["cache"])
+
+    if update:
+        # The open project is still read from; it is compacted afterwards
+        OmarFormat.update_project(output_path, project_meta, pages, compact=False)
+    else:
+        OmarFormat.save_project(output_path, {**project_meta, "pages": pages})
+
+
 class ProjectIOMixin:
     """Mixin que añade a MainWindow la capacidad de guardar/cargar proyectos y PDFs."""
 
@@ -41,7 +85,7 @@ class ProjectIOMixin:
         self.menu_bar.menu_recent.clear()
         for path in self.recent_files:
             action = self.menu_bar.menu_recent.addAction(path)
-            action.triggered.connect(lambda checked, p=path: self.load_file(p))
+            action.triggered.connect(lambda checked, p=path: self.open_document(p))
 
     # ------------------------------------------------------------------
     # Smart loader
@@ -67,35 +111,50 @@ class ProjectIOMixin:
             "All Supported Files (*.omar *.pdf);;OMAR Projects (*.omar);;PDF Files (*.pdf)"
         )
         if file_path:
-            self.load_file(file_path)
+            self.open_document(file_path)
 
     # ------------------------------------------------------------------
     # Load PDF
     # ------------------------------------------------------------------
 
     def load_pdf(self, file_path):
+        # A running save still needs the current document
+        self.finish_background_tasks()
+        self.stop_prefetcher()
+        self.cancel_population()
         try:
             if self.pdf_loader:
                 self.pdf_loader.close()
 
+            if self.project_reader:
+                self.project_reader.close()
+                self.project_reader = None
+            self._close_journal()
+
             self.current_file = file_path
             self.source_pdf_path = file_path  # Store as source for .omar project
             self.current_project_file = None   # New PDF = unsaved project
             self.is_modified = False
+            self.set_source_embedded(False)
 
             self.pdf_loader = PDFLoader(file_path)
-            self.layout_analyzer = LayoutAnalyzer(file_path)
+            self.page_order = self.pdf_loader.pages
+            self.layout_analyzer = LayoutAnalyzer(file_path, self.page_order)
 
             self.thumbnail_panel.clear()
             self.inspector_panel.clear()
-            self.page_scenes = {}       # Clear scenes
-            self.page_elements = {}
-            self.scene_cache_order = [] # Reset cache order
+            self.page_scenes.clear()    # Clear scenes
+            self.page_models = {}
+            self.shared_pixmaps = {}
+            self.edit_tracker.clear()
+            self._recover_journal()
+            self._reset_previews(file_path)
+            self.start_prefetcher(file_path)
+            self.set_store_previews(False)
 
             # Load Thumbnails
-            for i in range(self.pdf_loader.get_page_count()):
-                pixmap = self.pdf_loader.get_page_pixmap(i, scale=0.2)
-                self.thumbnail_panel.add_page(pixmap, i)
+            self._load_thumbnails()
+            self.reset_document_view()
 
             # Load first page
             if self.pdf_loader.get_page_count() > 0:
@@ -114,21 +173,33 @@ class ProjectIOMixin:
 
     def load_project(self, filepath: str):
         """Load a .omar project file."""
+        self.finish_background_tasks()
+        self.stop_prefetcher()
+        self.cancel_population()
         try:
             # Validate this is actually a .omar file
             if not filepath.lower().endswith('.omar'):
                 QMessageBox.warning(self, "Invalid File", "Please select a .omar project file.")
                 return
 
-            # Load project data
-            project_data = OmarFormat.load_project(filepath)
+            # Open the project; v2 files only read their manifest here
+            reader = OmarFormat.open_project(filepath)
 
             # Get source PDF path
-            source_pdf = project_data.get("source_pdf", {})
+            source_pdf = reader.source_pdf
             pdf_path = source_pdf.get("path", "")
 
+            # Self-contained projects carry their PDF: read it from the
+            # project's memory map in one go, no temporary file
+            pdf_source = None
+            embedded_pdf = reader.open_embedded_pdf()
+            if embedded_pdf is not None:
+                with embedded_pdf:
+                    pdf_source = io.BytesIO(read_pdf_bytes(embedded_pdf))
+
             # Validate PDF path
-            if not pdf_path:
+            if pdf_source is None and not pdf_path:
+                reader.close()
                 QMessageBox.warning(
                     self,
                     "Invalid Project",
@@ -137,7 +208,7 @@ class ProjectIOMixin:
                 return
 
             # Check if PDF exists
-            if not os.path.exists(pdf_path):
+            if pdf_source is None and not os.path.exists(pdf_path):
                 response = QMessageBox.question(
                     self,
                     "PDF Not Found",
@@ -155,46 +226,65 @@ class ProjectIOMixin:
                     if new_pdf_path:
                         pdf_path = new_pdf_path
                     else:
+                        reader.close()
                         return
                 else:
+                    reader.close()
                     return
 
             # Load the source PDF first
             if self.pdf_loader:
                 self.pdf_loader.close()
+            if self.project_reader:
+                self.project_reader.close()
+            self.project_reader = reader
+            self._close_journal()
 
             self.source_pdf_path = pdf_path
             self.current_file = pdf_path
             self.current_project_file = filepath
             self.is_modified = False
+            self.set_source_embedded(pdf_source is not None)
 
-            self.pdf_loader = PDFLoader(pdf_path)
-            self.layout_analyzer = LayoutAnalyzer(pdf_path)
+            # Both share the in-memory PDF of embedded projects, and the
+            # project's page order
+            self.pdf_loader = PDFLoader(pdf_source if pdf_source is not None else pdf_path)
+            self.page_order = PageOrder.from_table(reader.page_order_table,
+                                                   len(self.pdf_loader.doc))
+            self.pdf_loader.pages = self.page_order
+            self.layout_analyzer = LayoutAnalyzer(pdf_source if pdf_source is not None else pdf_path,
+                                                  self.page_order)
 
             # Clear UI
             self.thumbnail_panel.clear()
             self.inspector_panel.clear()
-            self.page_scenes = {}
-            self.page_elements = {}
-            self.scene_cache_order = []
-
-            # Load thumbnails
-            for i in range(self.pdf_loader.get_page_count()):
-                pixmap = self.pdf_loader.get_page_pixmap(i, scale=0.2)
-                self.thumbnail_panel.add_page(pixmap, i)
-
-            # Restore pages data
-            pages_data = project_data.get("pages", [])
-            for page_data in pages_data:
-                page_num = page_data.get("page_num", 0)
-                self.page_elements[page_num] = page_data.get("elements", [])
+            self.page_scenes.clear()
+            self.page_models = {}
+            self.shared_pixmaps = {}
+            self.edit_tracker.clear()
+            self._reset_previews(pdf_source if pdf_source is not None else pdf_path)
+            self.start_prefetcher(pdf_source if pdf_source is not None else pdf_path)
+            self.set_store_previews(reader.settings.get("store_previews", False))
+
+            # Load thumbnails (stored in the project when made from this PDF)
+            self._load_thumbnails()
+
+            # Page entries are read when a page is first needed; the page
+            # index is enough to know which pages carry edits
+            for page_num in reader.page_nums():
+                if reader.page_info(page_num).get("element_count"):
+                    self.edit_tracker.mark_dirty(page_num)
+            self.edit_tracker.mark_saved()
+            self._recover_journal()
+            self.reset_document_view()
 
             # Load first page
+            # (unedited pages are analyzed, not read from the project)
             if self.pdf_loader.get_page_count() > 0:
-                self.load_page_from_project(0, project_data)
+                self.load_page(self.page_order.ref(0).id)
 
             # Restore settings
-            settings = project_data.get("settings", {})
+            settings = reader.settings
             theme = settings.get("theme", "light")
             if theme != self.current_theme:
                 self.apply_theme(theme)
@@ -249,69 +339,164 @@ class ProjectIOMixin:
             if not out_path.endswith('.omar'):
                 out_path += '.omar'
 
+            # The new path becomes the project file once the save completes
             self.save_project_to_path(out_path)
-            self.current_project_file = out_path
-            self.is_modified = False
-            self.add_recent_file(out_path)
-            self.update_window_title()
-            self.status_label.setText(f"Saved: {out_path}")
 
     def save_project_to_path(self, output_path: str):
-        """Save the project with all modifications to the specified .omar file."""
-        try:
-            project_data = self.gather_project_data()
-            OmarFormat.save_project(output_path, project_data)
+        """
+        Save the project with all modifications to the specified .omar file.
+
+        Only a snapshot is taken on the UI thread: the element dicts of the
+        page models (new dicts, so later edits don't change them) and the
+        previews as QImages, which are implicitly shared. Preview
+        encoding and writing run on the worker thread and _finish_save()
+        completes the save. The file is replaced (or its new trailer
+        written) last, so editing can go on meanwhile; edits made during
+        the save stay unsaved.
+        """
+        if self.saving_project:
+            self.status_label.setText("A save is already in progress")
+            return
 
-            self.is_modified = False
-            self.update_window_title()
-            QMessageBox.information(self, "Success", "Project Saved Successfully!")
-            self.status_label.setText(f"Saved: {output_path}")
+        try:
+            update = self._can_update_project(output_path)
+            if update:
+                # Saving over the open v2 project: only pages edited since
+                # the last save are serialized and appended to the file
+                page_nums = [page_num for page_num in sorted(self.edit_tracker.unsaved_pages())
+                             if page_num in self.page_order]
+            else:
+                page_nums = self.page_order.ids()
+
+            saved_generations = self.edit_tracker.snapshot()
+            pages = [self._gather_page_data(page_num) for page_num in page_nums]
+            project_meta = self._gather_project_meta(encode_images=False)
+
+            if not update and self.project_reader:
+                # Every page has its model loaded now; release the old file
+                # before it is replaced and read pages from the new one afterwards
+                self.project_reader.close()
+                self.project_reader = None
         except Exception as e:
             import traceback
             traceback.print_exc()
             QMessageBox.critical(self, "Error", f"Failed to save project: {str(e)}")
+            return
 
-    def gather_project_data(self):
-        """Gather all data needed for .omar file."""
-        pages_data = []
-
-        for page_num in range(self.pdf_loader.get_page_count()):
-            page_data = {
-                "page_num": page_num,
-                "background_opacity": 0.5,
-                "elements": [],
-                "inspector_tree": None
-            }
+        self.saving_project = True
+        self.status_label.setText(f"Saving: {output_path}...")
+        self.run_in_background(
+            _write_project_snapshot, output_path, project_meta, pages, update,
+            on_done=lambda _: self._finish_save(output_path, saved_generations, update),
+            on_error=self._save_failed)
 
-            if page_num in self.page_scenes:
-                scene = self.page_scenes[page_num]
-                page_data["elements"] = self._serialize_scene_elements(scene)
-                page_data["inspector_tree"] = self.inspector_panel.serialize_tree_structure()
-            elif page_num in self.page_elements:
-                page_data["elements"] = self.page_elements[page_num]
+    def _finish_save(self, output_path, saved_generations, compact):
+        """Completion of a background save (runs on the UI thread)."""
+        self.saving_project = False
+        try:
+            if self.project_reader:
+                self.project_reader.close()
+                self.project_reader = None
+            if compact:
+                # Compaction replaces the file, so it waits until nothing reads it
+                OmarFormat.compact_project(output_path)
+            self.project_reader = OmarFormat.open_project(output_path)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            QMessageBox.critical(self, "Error", f"Failed to reopen saved project: {str(e)}")
+
+        path_changed = output_path != self.current_project_file
+        self.current_project_file = output_path
+        self.edit_tracker.mark_saved(saved_generations)
+        self._close_journal(discard=True)
+        unsaved_pages = self.edit_tracker.unsaved_pages()
+        for page_num in sorted(unsaved_pages):
+            # Edits made during the save go to a journal of the saved file
+            self.journal_page(page_num)
+
+        self.is_modified = bool(unsaved_pages)
+        self.update_window_title()
+        self.status_label.setText(f"Saved: {output_path}")
+        if path_changed:
+            self.add_recent_file(output_path)
+            self.populate_inspector_from_scene(self.canvas.scene)
+
+    def _save_failed(self, error):
+        """A background save raised; the previous file is left as it was."""
+        self.saving_project = False
+        import traceback
+        traceback.print_exception(type(error), error, error.__traceback__)
+        if self.project_reader is None and self.current_project_file:
+            try:
+                self.project_reader = OmarFormat.open_project(self.current_project_file)
+            except Exception as e:
+                print(f"Failed to reopen project: {e}")
+        QMessageBox.critical(self, "Error", f"Failed to save project: {str(error)}")
+
+    def _can_update_project(self, output_path):
+        """True if a save to output_path can append to the open v2 project."""
+        if self.project_reader is None or not self.current_project_file:
+            return False
+        if os.path.abspath(output_path) != os.path.abspath(self.current_project_file):
+            return False
+        return OmarFormat.can_update_project(output_path)
+
+    def _gather_page_data(self, page_num):
+        """
+        Serialize one page for the .omar file, from its element model (no
+        Qt items are read). Pages that were never edited have no elements
+        and are built from the layout analysis when the project is opened.
+        """
+        model = self.page_model(page_num)
+        page_data = {
+            "page_num": page_num,
+            "background_opacity": 0.5,
+            "elements": model.to_dicts() if model is not None else [],
+            "inspector_tree": None
+        }
 
-            pages_data.append(page_data)
+        if page_num in self.page_scenes:
+            # The inspector lists the page's items once they are all added
+            self.finish_population(self.page_scenes.get(page_num))
+            page_data["inspector_tree"] = self.inspector_panel.serialize_tree_structure()
 
-        page_order = self.thumbnail_panel.get_page_order()
+        return page_data
 
+    def _gather_project_meta(self, encode_images=True):
+        """Project-level data of the .omar file (everything but the pages)."""
         return {
             "source_pdf": {
                 "path": self.source_pdf_path or self.current_file,
-                "embedded": False,
-                "data": None
+                "embedded": self.source_embedded,
+                # Where an embedded PDF is copied from when the file is rewritten
+                "container": self.current_project_file,
             },
             "settings": {
                 "theme": self.current_theme,
-                "current_page": 0
+                "current_page": 0,
+                "store_previews": self.store_previews
             },
-            "pages": pages_data,
-            "page_order": page_order
+            # "page_order", "page_table" and "page_sources"
+            **self.page_order.to_table(),
+            "cache": self._gather_previews(encode_images) if self.store_previews else None
         }
 
-    def _serialize_scene_elements(self, scene):
-        """Serialize all elements in a scene."""
+    def _serialize_scene_elements(self, scene, encode_images=True):
+        """
+        Serialize all elements in a scene.
+
+        Items whose state is unchanged since the scene was last serialized
+        reuse their previous dict, so unchanged images are not PNG-encoded
+        again on every save. Without encode_images images that aren't
+        encoded yet are left as DeferredImage for a background save to
+        encode (in place, so the reused dicts are encoded once).
+        """
         from .editor_canvas import ResizerHandle
 
+        previous = scene.serialized_items
+        scene.serialized_items = {}
+
         elements = []
         for item in scene.items():
             if item.zValue() == -100:
@@ -319,36 +504,247 @@ class ProjectIOMixin:
             if isinstance(item, ResizerHandle):
                 continue
 
-            element_data = OmarFormat.serialize_graphics_item(item)
+            state = self._item_state(item)
+            cached = previous.get(item)
+            if state is not None and cached is not None and cached[0] == state:
+                element_data = cached[1]
+            else:
+                element_data = OmarFormat.serialize_graphics_item(item, encode_images)
             if element_data:
+                scene.serialized_items[item] = (state, element_data)
                 elements.append(element_data)
 
+        if encode_images:
+            # Dicts reused from a background save that is still encoding them
+            OmarFormat.encode_images(elements)
         return elements
 
+    @staticmethod
+    def _item_state(item):
+        """
+        Cheap fingerprint of everything serialize_graphics_item() stores,
+        or None if the item can't be fingerprinted (never reused then).
+        """
+        t = item.transform()
+        pos = item.pos()
+        state = (type(item), pos.x(), pos.y(), t.m11(), t.m12(), t.m21(), t.m22(),
+                 t.dx(), t.dy(), item.opacity(), item.isVisible(), item.zValue())
+
+        if isinstance(item, QGraphicsTextItem):
+            font = item.font()
+            return state + (item.toPlainText(), font.family(), font.pointSize(),
+                            font.bold(), font.italic())
+        if isinstance(item, QGraphicsPixmapItem):
+            pixmap = item.pixmap()
+            if not hasattr(pixmap, 'cacheKey'):
+                return None
+            return state + (pixmap.cacheKey(),)
+        rect = item.boundingRect()
+        return state + (rect.width(), rect.height())
+
     # ------------------------------------------------------------------
-    # Export PDF
+    # Background tasks
     # ------------------------------------------------------------------
 
-    def save_pdf_to_path(self, output_path: str):
-        """Save the PDF with all modifications to the specified path."""
+    def run_in_background(self, fn, *args, on_done=None, on_error=None):
+        """
+        Run fn(*args) on the worker thread. The callbacks run later on the
+        UI thread, from task_timer (synchronously without a Qt timer).
+        """
+        self.task_runner.submit(fn, *args, on_done=on_done, on_error=on_error)
+        if self.task_timer is None:
+            self.task_runner.wait()
+        elif not self.task_timer.isActive():
+            self.task_timer.start()
+
+    def _poll_background_tasks(self):
+        pending = self.task_runner.poll() + self.prefetch_runner.poll()
+        if not pending:
+            self.task_timer.stop()
+
+    def finish_background_tasks(self):
+        """Wait for pending tasks (e.g. a running save) and complete them."""
+        self.task_runner.wait()
+
+    # ------------------------------------------------------------------
+    # Autosave journal
+    # ------------------------------------------------------------------
+
+    def _journal(self, record):
+        """Queue a journal record, starting the journal on the first edit."""
+        if self.journal is None:
+            target = self.current_project_file or self.current_file
+            if not target:
+                return
+            try:
+                self.journal = JournalWriter(journal_path(target),
+                                             {"target": target, "base": base_token(target)})
+            except OSError as e:
+                print(f"Failed to start autosave journal: {e}")
+                return
+        self.journal.append(record)
+
+    def journal_item_edit(self, page_num, item, op):
+        """Record an edit of one item, once it's applied to the page model (see apply_item_edit)."""
+        if page_num not in self.journaled_pages:
+            # The first record of a page holds all its elements
+            self.journal_page(page_num)
+        elif op == "delete":
+            self._journal({"op": "delete", "page": page_num, "id": OmarFormat.element_id(item)})
+        else:
+            element = self.page_models[page_num].get(OmarFormat.element_id(item))
+            if element is not None:
+                self._journal({"op": "update", "page": page_num, "element": element.to_dict()})
+
+    def journal_page(self, page_num):
+        """Record the current elements of a whole page (from its model)."""
+        model = self.page_model(page_num)
+        elements = model.to_dicts() if model is not None else []
+        self._journal({"op": "page", "page": page_num, "elements": elements})
+        self.journaled_pages.add(page_num)
+
+    def _close_journal(self, discard=False):
+        """Stop journaling; the file is kept for recovery unless discard is set."""
+        if self.journal is not None:
+            if discard:
+                self.journal.discard()
+            else:
+                self.journal.close()
+            self.journal = None
+        self.journaled_pages = set()
+
+    def _recover_journal(self):
+        """
+        Offer to restore edits left in the journal of the file being opened
+        (the previous session did not save them). Stale journals are removed.
+        """
+        target = self.current_project_file or self.current_file
+        path = journal_path(target)
+        if not os.path.exists(path):
+            return
+
+        records = read_journal(path)
+        pages = replay_journal(records) if journal_matches(records, target) else {}
+        if pages:
+            response = QMessageBox.question(
+                self, "Recover Unsaved Changes",
+                f"Unsaved changes to {len(pages)} page(s) from a previous session were found.\n\n"
+                "Do you want to recover them?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if response == QMessageBox.StandardButton.Yes:
+                for page_num, elements in pages.items():
+                    self.page_models[page_num] = PageModel.from_dicts(page_num, elements)
+                    self.edit_tracker.mark_dirty(page_num)
+                    # Carry the recovered state over to the new journal
+                    self.journal_page(page_num)
+                self.is_modified = True
+                return
+
         try:
-            writer = PikePDFWriter(self.current_file)
+            os.remove(path)
+        except OSError as e:
+            print(f"Failed to remove autosave journal: {e}")
 
-            page_order = self.thumbnail_panel.get_page_order()
+    # ------------------------------------------------------------------
+    # Previews stored in the project (thumbnails, background, analysis)
+    # ------------------------------------------------------------------
 
-            current_pages_data = {}
-            for page_num in range(self.pdf_loader.get_page_count()):
-                if page_num in self.page_scenes:
-                    current_pages_data[page_num] = self.get_elements_from_scene(self.page_scenes[page_num])
-                elif page_num in self.page_elements:
-                    current_pages_data[page_num] = self.page_elements[page_num]
-                else:
-                    current_pages_data[page_num] = []
+    def _reset_previews(self, pdf_source):
+        """Forget the previews of the previous document."""
+        self.pdf_fingerprint = pdf_fingerprint(pdf_source)
+        self.thumbnail_pixmaps = {}
+        self.background_pixmaps = {}
+        self.page_analysis = {}
+
+    def _load_thumbnails(self):
+        # The panel is empty, so every page's thumbnail is added
+        self.thumbnail_panel.sync_order(self.page_order.refs(), self._thumbnail_icon)
 
-            writer.save(output_path, current_pages_data, page_order)
+    def set_store_previews(self, store):
+        """Set whether saves bundle previews into the project (synced with the menu)."""
+        self.store_previews = store
+        self.menu_bar.action_store_previews.setChecked(store)
+
+    def toggle_store_previews(self, checked):
+        if checked == self.store_previews:
+            return
+        self.store_previews = checked
+        self.is_modified = True
+        self.update_window_title()
+
+    def _gather_previews(self, encode_images=True):
+        """
+        Preview cache for the project file. Entries the open project already
+        stores for this PDF are kept by the container, not encoded again.
+        Without encode_images the images are QImages (see _encode_previews()).
+        """
+        reader = self.project_reader
+        if reader is None or not reader.cache_matches(self.pdf_fingerprint):
+            reader = None
+        cache = {
+            "fingerprint": self.pdf_fingerprint,
+            "container": self.current_project_file,
+            "thumbnails": {},
+            "backgrounds": {},
+            "analysis": {},
+        }
+        for kind, pixmaps in (("thumbnails", self.thumbnail_pixmaps),
+                              ("backgrounds", self.background_pixmaps)):
+            for page_num, pixmap in pixmaps.items():
+                if reader is None or not reader.has_cached_preview(kind, page_num):
+                    cache[kind][page_num] = capture_image(pixmap)
+        if encode_images:
+            _encode_previews(cache)
+        for page_num, elements in self.page_analysis.items():
+            if reader is None or not reader.has_cached_preview("analysis", page_num):
+                cache["analysis"][page_num] = elements
+        return cache
+
+    # ------------------------------------------------------------------
+    # Embedded source PDF
+    # ------------------------------------------------------------------
+
+    def set_source_embedded(self, embedded):
+        """Set whether the project file carries its source PDF (synced with the menu)."""
+        self.source_embedded = embedded
+        self.menu_bar.action_embed_pdf.setChecked(embedded)
+
+    def toggle_embed_source_pdf(self, checked):
+        """Embed the source PDF on the next save, or link the original file again."""
+        if checked == self.source_embedded:
+            return
+        if not checked and not os.path.isfile(self.source_pdf_path or ""):
+            QMessageBox.warning(
+                self, "Embedded PDF",
+                "The original PDF file no longer exists, so the project keeps its embedded copy."
+            )
+            self.menu_bar.action_embed_pdf.setChecked(True)
+            return
+        self.source_embedded = checked
+        self.is_modified = True
+        self.update_window_title()
+
+    def _open_source_pdf(self):
+        """Path of the source PDF, or a file object over the embedded one."""
+        if self.source_embedded and self.project_reader is not None:
+            embedded_pdf = self.project_reader.open_embedded_pdf()
+            if embedded_pdf is not None:
+                return embedded_pdf
+        return self.current_file
+
+    def save_pdf_to_path(self, output_path: str, profile=None):
+        """Save the PDF with all modifications to the specified path."""
+        try:
+            writer = PikePDFWriter(self._open_source_pdf(), page_sources=self.page_order.sources)
+
+            page_order = self.page_order.refs()
+            current_pages_data = self._gather_export_pages_data()
+
+            report = writer.save(output_path, current_pages_data, page_order, profile=profile)
             writer.close()
 
-            QMessageBox.information(self, "Success", "PDF Saved Successfully!")
+            QMessageBox.information(self, "Success", f"PDF Saved Successfully!\n\n{report.summary()}")
             self.status_label.setText(f"Saved: {output_path}")
         except Exception as e:
             import traceback
@@ -359,74 +755,64 @@ class ProjectIOMixin:
         if not self.current_file:
             return
 
-        out_path, _ = QFileDialog.getSaveFileName(self, "Export PDF", "", "PDF Files (*.pdf)")
+        # Each export profile is offered as its own file type; the plain
+        # filter keeps the default save settings
+        filters = ["PDF Files (*.pdf)"] + [
+            f"PDF - {name.capitalize()} profile (*.pdf)" for name in PROFILES
+        ]
+        out_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export PDF", "", ";;".join(filters))
         if out_path:
+            profile = None
+            for name in PROFILES:
+                if selected_filter.startswith(f"PDF - {name.capitalize()} "):
+                    profile = name
             try:
-                writer = PDFWriter(self.current_file, out_path)
+                writer = PDFWriter(self._open_source_pdf(), out_path,
+                                   page_sources=self.page_order.sources)
 
-                page_order = self.thumbnail_panel.get_page_order()
+                page_order = self.page_order.refs()
+                current_pages_data = self._gather_export_pages_data()
 
-                current_pages_data = {}
-                for page_num in range(self.pdf_loader.get_page_count()):
-                    if page_num in self.page_scenes:
-                        current_pages_data[page_num] = self.get_elements_from_scene(self.page_scenes[page_num])
-                    else:
-                        current_pages_data[page_num] = []
+                # Exporting over the source PDF appends an incremental update
+                # when the page order is unchanged (full rewrite otherwise)
+                writes_to_source = (not self.source_embedded and
+                                    os.path.abspath(out_path) == os.path.abspath(self.current_file))
+                if writes_to_source:
+                    self.pdf_loader.close()
 
-                writer.save(current_pages_data, page_order)
+                report = writer.save(current_pages_data, page_order, profile=profile)
 
-                QMessageBox.information(self, "Success", "PDF Exported Successfully!")
+                if writes_to_source:
+                    # Edits are now part of the PDF itself: reopen it so the
+                    # editor shows what is on disk
+                    self.load_pdf(out_path)
+
+                if report.incremental:
+                    message = "Changes appended to the PDF (incremental save)."
+                else:
+                    message = "PDF Exported Successfully!"
+                QMessageBox.information(self, "Success", f"{message}\n\n{report.summary()}")
+                self.status_label.setText(f"Exported: {out_path}")
             except Exception as e:
                 import traceback
                 traceback.print_exc()
+                if self.pdf_loader and self.pdf_loader.doc is None:
+                    # Failed while writing over the source: keep editing the old state
+                    self.pdf_loader = PDFLoader(self.current_file, self.page_order)
                 QMessageBox.critical(self, "Error", f"Failed to export PDF: {str(e)}")
 
-    def get_elements_from_scene(self, scene):
-        """Extract serializable element dicts from a scene (for PDF export)."""
-        from .editor_canvas import ResizerHandle
-
-        elements = []
-        for item in scene.items():
-            if item.zValue() == -100:
-                continue  # Skip background
-            if not item.isVisible():
-                continue
-            if isinstance(item, ResizerHandle):
-                continue
-
-            scene_rect = item.sceneBoundingRect()
-            x = scene_rect.x()
-            y = scene_rect.y()
-            w = scene_rect.width()
-            h = scene_rect.height()
-
-            if isinstance(item, QGraphicsTextItem):
-                text = item.toPlainText()
-                scale = item.transform().m11()
-                font_size = item.font().pointSize() * scale
-
-                elements.append({
-                    'type': 'text',
-                    'text': text,
-                    'x': x,
-                    'y': y,
-                    'font_size': font_size
-                })
-
-            elif isinstance(item, QGraphicsPixmapItem):
-                pixmap = item.pixmap()
-                buffer = QBuffer()
-                buffer.open(QIODevice.OpenModeFlag.ReadWrite)
-                pixmap.save(buffer, "PNG")
-                image_data = buffer.data().data()
-
-                elements.append({
-                    'type': 'image',
-                    'image_data': image_data,
-                    'x': x,
-                    'y': y,
-                    'w': w,
-                    'h': h
-                })
-
-        return elements
+    def _gather_export_pages_data(self):
+        """
+        Collect writer input for edited pages only, from their element
+        models (no Qt items are read).
+
+        Pages the edit tracker has never seen are left out, so the writers
+        copy them verbatim without any per-element work.
+        """
+        pages_data = {}
+        for page_num in sorted(self.edit_tracker.dirty_pages()):
+            model = self.page_model(page_num)
+            if model is not None:
+                pages_data[page_num] = project_elements_to_export(model.to_dicts())
+        return pages_data
@@ -1,11 +1,19 @@
 from qt_compat import (QListWidget, QListWidgetItem, QWidget, QVBoxLayout,
                        Qt, Signal, QSize, QIcon)
 
+# Item data role holding the rotation a thumbnail was made with
+_ROTATION_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
 class ThumbnailPanel(QWidget):
     """
     Panel showing thumbnails of PDF pages.
+
+    Items hold the page id (see utils/page_order.py); labels number the
+    pages by position.
     """
     pageSelected = Signal(int)
+    orderChanged = Signal(list)  # Page ids after the user dragged a thumbnail
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -14,7 +22,7 @@ class ThumbnailPanel(QWidget):
         self.list_widget = QListWidget()
         self.list_widget.setIconSize(QSize(100, 140))
         self.list_widget.setViewMode(QListWidget.ViewMode.IconMode)
-        self.list_widget.setSelectionMode(QListWidget.SelectionMode.SingleSelection)
+        self.list_widget.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
         self.list_widget.setDragEnabled(True)
         self.list_widget.setAcceptDrops(True)
         self.list_widget.setDropIndicatorShown(True)
@@ -26,33 +34,97 @@ class ThumbnailPanel(QWidget):
         
         layout.addWidget(self.list_widget)
 
-    def add_page(self, pixmap, page_num):
-        icon = QIcon(pixmap)
-        item = QListWidgetItem(icon, f"Page {page_num + 1}")
+    def add_page(self, pixmap, page_num, rotation=0):
+        """Append the thumbnail of a page (pixmap already turned by rotation)."""
+        self.list_widget.addItem(self._make_item(QIcon(pixmap), page_num, rotation,
+                                                 self.list_widget.count()))
+
+    def _make_item(self, icon, page_num, rotation, position):
+        item = QListWidgetItem(icon, f"Page {position + 1}")
         item.setData(Qt.ItemDataRole.UserRole, page_num)
-        self.list_widget.addItem(item)
+        item.setData(_ROTATION_ROLE, rotation)
+        return item
+
+    def sync_order(self, refs, make_icon):
+        """
+        Show the pages of refs (PageRefs, in order), updating the list in
+        place: thumbnails of listed pages are kept and only moved, so only
+        new or newly rotated pages are rendered, by make_icon(ref).
+        """
+        items = {}
+        for row in range(self.list_widget.count()):
+            item = self.list_widget.item(row)
+            items[item.data(Qt.ItemDataRole.UserRole)] = item
+
+        if not hasattr(self.list_widget, 'takeItem'):
+            # GameQt lists can only be rebuilt; the icons are reused
+            self.list_widget.clear()
+            for position, ref in enumerate(refs):
+                item = items.get(ref.id)
+                if item is not None and item.data(_ROTATION_ROLE) == ref.rotation:
+                    icon = item.icon
+                else:
+                    icon = make_icon(ref)
+                self.list_widget.addItem(self._make_item(icon, ref.id, ref.rotation, position))
+            return
+
+        listed = {ref.id for ref in refs}
+        for row in reversed(range(self.list_widget.count())):
+            if self.list_widget.item(row).data(Qt.ItemDataRole.UserRole) not in listed:
+                self.list_widget.takeItem(row)
+
+        for position, ref in enumerate(refs):
+            item = items.get(ref.id)
+            if item is None:
+                item = self._make_item(make_icon(ref), ref.id, ref.rotation, position)
+                self.list_widget.insertItem(position, item)
+                continue
+            if item.data(_ROTATION_ROLE) != ref.rotation:
+                item.setIcon(make_icon(ref))
+                item.setData(_ROTATION_ROLE, ref.rotation)
+            if self.list_widget.item(position) is not item:
+                self.list_widget.takeItem(self.list_widget.row(item))
+                self.list_widget.insertItem(position, item)
+            label = f"Page {position + 1}"
+            if item.text() != label:
+                item.setText(label)
+
+    def selected_pages(self):
+        """Ids of the selected pages, in list order."""
+        return [self.list_widget.item(row).data(Qt.ItemDataRole.UserRole)
+                for row in range(self.list_widget.count())
+                if self.list_widget.item(row).isSelected()]
 
     def _on_item_clicked(self, item):
-        # When clicked, we might want to reload the page, 
-        # but be careful if the item data (page_num) is stale after reorder.
-        # For now, we rely on the stored page_num which represents the ORIGINAL page index.
+        # Items hold the page id, which doesn't change when pages move
         page_num = item.data(Qt.ItemDataRole.UserRole)
         self.pageSelected.emit(page_num)
 
     def _on_rows_moved(self, parent, start, end, destination, row):
-        # Reordering happened. 
-        # We need to update the MainWindow's knowledge of page order if we want to save it correctly.
-        # For now, we just let the visual list change. 
-        # The exporter will need to query this list order.
-        pass
+        # The user dragged thumbnails: the window makes it an undoable
+        # change of the page order (which then finds the list up to date)
+        self.orderChanged.emit(self.get_page_order())
 
     def get_page_order(self):
-        """Returns a list of original page indices in their new order."""
+        """Returns the page ids in list order."""
         order = []
         for i in range(self.list_widget.count()):
             item = self.list_widget.item(i)
             order.append(item.data(Qt.ItemDataRole.UserRole))
         return order
 
+    def select_page(self, page_num):
+        """Highlight the thumbnail of a page (without emitting pageSelected)."""
+        for row in range(self.list_widget.count()):
+            item = self.list_widget.item(row)
+            if item.data(Qt.ItemDataRole.UserRole) != page_num:
+                if not hasattr(self.list_widget, 'setCurrentRow'):
+                    item.setSelected(False)
+                continue
+            if hasattr(self.list_widget, 'setCurrentRow'):
+                self.list_widget.setCurrentRow(row)
+            else:
+                item.setSelected(True)
+
     def clear(self):
         self.list_widget.clear()
@@ -0,0 +1,285 @@
+"""
+WorkspaceMixin — varios documentos abiertos en pestañas.
+
+Cada documento abierto guarda su parte del estado de la ventana (cargador
+del PDF, orden de páginas, escenas, modelos, historial de deshacer...).
+La ventana trabaja siempre sobre el documento visible: al cambiar de
+pestaña su estado se guarda y se restaura el del otro, así el resto de
+mixins no distingue entre uno y varios documentos. Todos los documentos
+comparten los hilos de trabajo (renderizado, análisis, guardado) y el
+presupuesto de memoria de las escenas.
+Se usa como mixin: class MainWindow(QMainWindow, ..., WorkspaceMixin, ...)
+"""
+
+from qt_compat import QWidget, QUndoStack
+from omar_format import OmarFormat
+from utils.edit_tracker import EditTracker
+import os
+
+
+# Window attributes that belong to the document shown
+DOCUMENT_ATTRIBUTES = (
+    "current_file", "current_project_file", "source_pdf_path", "source_embedded",
+    "is_modified", "pdf_loader", "layout_analyzer", "page_order", "page_scenes",
+    "page_models", "project_reader", "shared_pixmaps", "pdf_fingerprint",
+    "thumbnail_pixmaps", "background_pixmaps", "page_analysis", "store_previews",
+    "edit_tracker", "journal", "journaled_pages", "prefetcher", "page_preparer",
+    "page_images", "project_images", "undo_stack",
+)
+
+
+class OpenDocument:
+    """A document open in a tab; its state is kept here while another document is shown."""
+
+    def __init__(self):
+        self.state = {}  # DOCUMENT_ATTRIBUTES values while in the background
+        self.page = None  # Page shown when the document was left
+
+    def value(self, name, default=None):
+        return self.state.get(name, default)
+
+
+class WorkspaceMixin:
+    """Mixin que añade a MainWindow varios documentos abiertos en pestañas."""
+
+    # ------------------------------------------------------------------
+    # Document state
+    # ------------------------------------------------------------------
+
+    def init_document_state(self):
+        """Give the window the state of a new, empty document."""
+        self.current_file = None  # Source PDF path or None
+        self.current_project_file = None  # Path to .omar file or None
+        self.source_pdf_path = None  # Original PDF for .omar projects
+        self.source_embedded = False  # The .omar file carries a copy of the source PDF
+        self.is_modified = False  # Track unsaved changes
+        self.pdf_loader = None
+        self.layout_analyzer = None
+        self.page_order = None # PageOrder of the document: page ids in order (shared with pdf_loader)
+        self.page_scenes = self.create_scene_cache() # Map page_num -> EditorScene (memory-budgeted LRU)
+        self.page_models = {} # page_num -> PageModel of edited pages (source of truth for save/export)
+        self.project_reader = None # Open .omar project, pages are read on demand
+        self.shared_pixmaps = {} # Image content hash -> decoded QPixmap (per project)
+        self.pdf_fingerprint = None # Identifies the source PDF for previews stored in projects
+        self.thumbnail_pixmaps = {} # page_num -> thumbnail QPixmap
+        self.background_pixmaps = {} # page_num -> background render kept for the project file
+        self.page_analysis = {} # page_num -> layout analysis results
+        self.store_previews = False # Bundle previews into the .omar file on save
+        self.edit_tracker = EditTracker() # Per-page edit generations (drives export fast path)
+        self.journal = None # Autosave journal of unsaved edits (started on the first edit)
+        self.journaled_pages = set() # Pages with a full snapshot in the journal
+        self.prefetcher = None # Prepared neighbours of the current page (per document)
+        self.page_preparer = None
+        self.page_images = None # Extracts the images of analysis placeholders (per document)
+        self.project_images = None # Decodes the images of project placeholders (per document)
+        self.undo_stack = QUndoStack(self) # Each document has its own history
+
+    def document_title(self, document=None):
+        """Tab title of a document (the one shown by default)."""
+        if document is None or document is self.active_document():
+            path, modified = self.current_project_file or self.current_file, self.is_modified
+        else:
+            path = document.value("current_project_file") or document.value("current_file")
+            modified = document.value("is_modified")
+        title = os.path.basename(path) if path else "Untitled"
+        return f"{title}*" if modified else title
+
+    def active_document(self):
+        if self.active_index is None:
+            return None
+        return self.documents[self.active_index]
+
+    # ------------------------------------------------------------------
+    # Tabs
+    # ------------------------------------------------------------------
+
+    def add_document_tab(self):
+        """Open a new, empty document and show it."""
+        if self.documents:
+            self._stash_document()
+            self.init_document_state()
+        self.documents.append(OpenDocument())
+        self.active_index = len(self.documents) - 1
+        self.document_tabs.addTab(QWidget(), self.document_title())
+        self._show_active_document()
+
+    def open_document(self, file_path):
+        """Open a file in a new tab (in the shown one if it's empty, or switch to its tab)."""
+        for index, document in enumerate(self.documents):
+            if index == self.active_index:
+                paths = (self.current_project_file, self.current_file)
+            else:
+                paths = (document.value("current_project_file"), document.value("current_file"))
+            if file_path in paths:
+                self.switch_document(index)
+                return
+
+        if self.pdf_loader is not None:
+            self.add_document_tab()
+        self.load_file(file_path)
+        if self.pdf_loader is None and len(self.documents) > 1:
+            # Loading failed or was cancelled: drop the empty tab
+            self.close_document()
+
+    def switch_document(self, index):
+        """Show the document of a tab."""
+        if self.active_index is None or index == self.active_index:
+            return
+        if not 0 <= index < len(self.documents):
+            return
+        self._stash_document()
+        self.active_index = index
+        self._show_active_document()
+
+    def close_document(self, index=None):
+        """
+        Close a document (the shown one by default). Unsaved edits stay in
+        its autosave journal, as when the window is closed.
+        """
+        if index is not None and index != self.active_index:
+            self.switch_document(index)
+        self.finish_background_tasks()
+        self.cancel_population()
+        if self.continuous_scroll:
+            self.toggle_continuous_scroll(False)
+        self.stop_prefetcher()
+        if self.pdf_loader:
+            self.pdf_loader.close()
+        if self.project_reader:
+            self.project_reader.close()
+        self._close_journal()
+        self.page_scenes.clear()
+        self.page_scenes.budget.unregister(self.page_scenes)
+
+        index = self.active_index
+        # Removing the tab selects another one; it's shown below
+        self.active_index = None
+        del self.documents[index]
+        if hasattr(self.document_tabs, 'removeTab'):
+            self.document_tabs.removeTab(index)
+
+        if not self.documents:
+            self.init_document_state()
+            self.documents.append(OpenDocument())
+            self.document_tabs.addTab(QWidget(), self.document_title())
+            self.active_index = 0
+            self._show_active_document()
+            return
+        self.active_index = min(index, len(self.documents) - 1)
+        self._show_active_document()
+
+    def close_background_documents(self):
+        """Write out the journals of the documents not shown (the window is closing)."""
+        for document in self.documents:
+            journal = document.value("journal")
+            if document is not self.active_document() and journal is not None:
+                journal.close()
+
+    def _stash_document(self):
+        """Keep the state of the document shown in its OpenDocument."""
+        # A running save or a page being populated belongs to this document
+        self.finish_background_tasks()
+        self.cancel_population()
+        if self.continuous_scroll:
+            self.toggle_continuous_scroll(False)
+        if self.prefetcher is not None:
+            # The shared worker serves the document shown next
+            self.prefetcher.reset()
+
+        document = self.documents[self.active_index]
+        document.page = self.current_page_id() if self.page_order is not None else None
+        document.state = {name: getattr(self, name) for name in DOCUMENT_ATTRIBUTES}
+
+    def _show_active_document(self):
+        """Show the document of the active tab (its state is restored or fresh)."""
+        document = self.documents[self.active_index]
+        for name, value in document.state.items():
+            setattr(self, name, value)
+        document.state = {}
+
+        # The views push onto the history of the document shown
+        self.canvas.undo_stack = self.undo_stack
+        if self.document_view is not None:
+            self.document_view.undo_stack = self.undo_stack
+            self.document_view.scene.undo_stack = self.undo_stack
+        if hasattr(self.undo_view, 'setStack'):
+            self.undo_view.setStack(self.undo_stack)
+        self.set_source_embedded(self.source_embedded)
+        self.set_store_previews(self.store_previews)
+
+        self.thumbnail_panel.clear()
+        self.inspector_panel.clear()
+        if self.page_order is not None and len(self.page_order):
+            self._load_thumbnails()
+            page_num = document.page if document.page in self.page_order else self.page_order.ref(0).id
+            self.thumbnail_panel.select_page(page_num)
+            self.load_page(page_num)
+        else:
+            from .editor_canvas import EditorScene
+            self.canvas.set_page_rotation(0)
+            self.canvas.set_scene(EditorScene(self.canvas, undo_stack=self.undo_stack))
+
+        if hasattr(self.document_tabs, 'setCurrentIndex'):
+            self.document_tabs.setCurrentIndex(self.active_index)
+        self.update_window_title()
+
+    def update_document_tabs(self):
+        """Refresh tab titles and the menus listing the open documents."""
+        if hasattr(self.document_tabs, 'setTabText'):
+            for index, document in enumerate(self.documents):
+                self.document_tabs.setTabText(index, self.document_title(document))
+
+        self.menu_bar.menu_documents.clear()
+        self.menu_bar.menu_copy_to_document.clear()
+        for index, document in enumerate(self.documents):
+            title = self.document_title(document)
+            action = self.menu_bar.menu_documents.addAction(title)
+            action.triggered.connect(lambda checked, i=index: self.switch_document(i))
+            opened = (self.page_order if index == self.active_index
+                      else document.value("page_order")) is not None
+            if index != self.active_index and opened:
+                action = self.menu_bar.menu_copy_to_document.addAction(title)
+                action.triggered.connect(
+                    lambda checked, i=index: self.copy_selection_to_document(i))
+
+    # ------------------------------------------------------------------
+    # Copy elements between documents
+    # ------------------------------------------------------------------
+
+    def copy_selection_to_document(self, index):
+        """
+        Copy the selected elements of the page shown onto the page shown in
+        another document, with their fonts, transforms and images (the
+        system clipboard only carries plain text or a bitmap).
+        """
+        if self.continuous_scroll or not self.canvas.scene or self.page_order is None:
+            return
+        source_title = self.document_title()
+        elements = []
+        for item in self.canvas.scene.selectedItems():
+            if item.zValue() == -100:
+                continue
+            element = OmarFormat.serialize_graphics_item(item)
+            if element:
+                # The copies are new elements of the other page
+                element.pop("id", None)
+                elements.append(element)
+        if not elements:
+            return
+
+        self.switch_document(index)
+        if self.active_index != index or self.page_order is None:
+            return
+        from gui.commands import AddItemCommand
+        scene = self.canvas.scene
+        items = self._element_items(elements)
+        self.undo_stack.beginMacro(f"Copy from {source_title}")
+        for item in items:
+            self.undo_stack.push(AddItemCommand(scene, item, "Copy Element"))
+        self.undo_stack.endMacro()
+
+        scene.clearSelection()
+        for item in items:
+            item.setSelected(True)
+        self.populate_inspector_from_scene(scene)
+        self.status_label.setText(f"Copied {len(items)} element(s) from {source_title}")
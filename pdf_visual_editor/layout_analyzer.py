@@ -6,8 +6,14 @@ class LayoutAnalyzer:
     """
     Uses pdfminer.six to analyze the layout of a PDF page and extract elements.
     """
-    def __init__(self, file_path: str):
+    def __init__(self, file_path, pages=None):
+        # A path, or a seekable binary file object for embedded PDFs
+        # (pdfminer seeks to what it needs)
         self.file_path = file_path
+        # PageOrder resolving page ids to pages of file_path or of PDFs
+        # pages were inserted from (see utils/page_order.py); without it
+        # page ids are page numbers of file_path
+        self.pages = pages
 
     def analyze_page(self, page_num: int) -> List[Dict[str, Any]]:
         """
@@ -16,11 +22,17 @@ class LayoutAnalyzer:
         but usually iterates all. We will iterate and pick the matching page.
         """
         elements = []
+        file_path = self.file_path
+        if self.pages is not None:
+            ref = self.pages.resolve(page_num)
+            page_num = ref.index
+            if ref.source:
+                file_path = self.pages.sources[ref.source]
         
         # extract_pages yields LTPage objects
         # We need to find the specific page_num (0-indexed)
         current_page = 0
-        for page_layout in extract_pages(self.file_path):
+        for page_layout in extract_pages(file_path):
             if current_page == page_num:
                 for element in page_layout:
                     if isinstance(element, LTTextContainer):
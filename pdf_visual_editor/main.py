@@ -1,9 +1,15 @@
 import sys
 import os
-from qt_compat import QApplication
-from gui.main_window import MainWindow
 
 def main():
+    # Headless mode: "python main.py batch ..." exports projects without Qt
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from batch_export import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    
+    from qt_compat import QApplication
+    from gui.main_window import MainWindow
+    
     app = QApplication(sys.argv)
     app.setApplicationName("PDF Visual Editor")
     
@@ -0,0 +1,1002 @@
+"""
+OMAR v2 project container.
+
+A v2 .omar file is a small random-access archive instead of one big JSON
+document:
+
+    header     b"OMARPRJ2"
+    members    raw bytes, one after the other (page entries, images, ...)
+               images are content addressed: "images/<sha256>", stored
+               once however many elements show them; page entries are
+               JSON or MessagePack (see omar_serializer), per member flag;
+               an embedded source PDF is the raw member "source.pdf";
+               optional previews live under "cache/" (see _store_cache)
+    manifest   JSON: project metadata, page index and member table
+    trailer    magic, manifest offset, manifest length, manifest CRC32
+
+Opening a project reads the trailer and the manifest only; page entries
+and images are read (and decompressed) when they are asked for. Members
+are located through the manifest's member table, so new members can be
+appended after the old manifest and a new trailer written at the end:
+readers use the last valid trailer, which makes appending crash safe.
+
+Embedded source PDFs are copied into the container as they are (no base64)
+and read back through a memory map of the project file, so a
+self-contained project opens like one that links its PDF.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import mmap
+import os
+import re
+import struct
+import zlib
+from typing import Any, Dict, List, Optional
+
+from omar_serializer import SERIALIZERS, default_serializer
+
+MAGIC = b"OMARPRJ2"
+TRAILER_MAGIC = b"OMAREND2"
+CONTAINER_VERSION = "2.0"
+
+# magic, manifest offset, manifest length, manifest crc32
+_TRAILER = struct.Struct("<8sQQI")
+
+# Member flags
+FLAG_DEFLATE = 1
+FLAG_MSGPACK = 2  # Structured member encoded as MessagePack (JSON otherwise)
+
+# Bytes read at a time when looking back for an intact trailer after a torn write
+_TRAILER_SCAN_CHUNK = 4 * 1024 * 1024
+
+# Dead bytes tolerated before an incremental save compacts the container
+_COMPACTION_SLACK = 1024 * 1024
+
+# Member holding an embedded source PDF
+SOURCE_PDF_MEMBER = "source.pdf"
+
+_COPY_CHUNK = 1024 * 1024
+
+# Kinds of cached previews: page thumbnails and backgrounds (encoded
+# images) and layout analysis results (structured entries)
+CACHE_IMAGE_KINDS = ("thumbnails", "backgrounds")
+CACHE_KINDS = CACHE_IMAGE_KINDS + ("analysis",)
+
+
+def is_container(filepath: str) -> bool:
+    """True if the file starts with the v2 container magic."""
+    try:
+        with open(filepath, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def encode_entry(data: Dict[str, Any]) -> bytes:
+    """Compact JSON used for page entries and the manifest."""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class ContainerReader:
+    """Random access to the members of a v2 container."""
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._file = open(filepath, 'rb')
+        try:
+            if self._file.read(len(MAGIC)) != MAGIC:
+                raise ValueError("Not an OMAR v2 project container")
+            self.manifest_offset, self.manifest_length, manifest = self._read_manifest()
+        except Exception:
+            self._file.close()
+            raise
+        self.members = manifest.pop("members", {})
+        self.manifest = manifest
+
+    def _read_manifest(self):
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+
+        # Fast path: the trailer is the last thing in the file
+        if size >= len(MAGIC) + _TRAILER.size:
+            self._file.seek(size - _TRAILER.size)
+            manifest = self._try_trailer(self._file.read(_TRAILER.size), size - _TRAILER.size)
+            if manifest is not None:
+                return manifest
+
+        # A save was interrupted: use the last intact trailer before it.
+        # The file is scanned backwards a chunk at a time, however large
+        # the members appended after that trailer are
+        end = size
+        overlap = b""  # Start of the later chunk, for magics split between chunks
+        while end > len(MAGIC):
+            start = max(len(MAGIC), end - _TRAILER_SCAN_CHUNK)
+            self._file.seek(start)
+            chunk = self._file.read(end - start) + overlap
+            pos = chunk.rfind(TRAILER_MAGIC)
+            while pos != -1:
+                manifest = self._try_trailer_at(start + pos, size)
+                if manifest is not None:
+                    return manifest
+                pos = chunk.rfind(TRAILER_MAGIC, 0, pos)
+            overlap = chunk[:len(TRAILER_MAGIC) - 1]
+            end = start
+        raise ValueError("Project container has no valid manifest")
+
+    def _try_trailer_at(self, trailer_offset: int, size: int):
+        if trailer_offset + _TRAILER.size > size:
+            return None
+        self._file.seek(trailer_offset)
+        return self._try_trailer(self._file.read(_TRAILER.size), trailer_offset)
+
+    def _try_trailer(self, trailer: bytes, trailer_offset: int):
+        if len(trailer) != _TRAILER.size:
+            return None
+        magic, offset, length, crc = _TRAILER.unpack(trailer)
+        if magic != TRAILER_MAGIC or offset + length > trailer_offset:
+            return None
+        self._file.seek(offset)
+        data = self._file.read(length)
+        if len(data) != length or zlib.crc32(data) != crc:
+            return None
+        return offset, length, json.loads(data.decode('utf-8'))
+
+    def has(self, name: str) -> bool:
+        return name in self.members
+
+    def names(self) -> List[str]:
+        return list(self.members)
+
+    def span(self, name: str):
+        """(offset, length, flags) of a member inside the file."""
+        offset, length, flags, _ = self.members[name]
+        return offset, length, flags
+
+    def read(self, name: str) -> bytes:
+        """
+        Reads one member.
+
+        Raises:
+            KeyError: If there is no such member
+            ValueError: If the member data is corrupt
+        """
+        offset, length, flags, crc = self.members[name]
+        self._file.seek(offset)
+        data = self._file.read(length)
+        if len(data) != length or zlib.crc32(data) != crc:
+            raise ValueError(f"Corrupt project member: {name}")
+        if flags & FLAG_DEFLATE:
+            data = zlib.decompress(data)
+        return data
+
+    def open_member(self, name: str) -> "MemberStream":
+        """
+        Read-only file object over an uncompressed member, backed by a
+        memory map of the container (nothing is read up front).
+
+        Raises:
+            KeyError: If there is no such member
+            ValueError: If the member is compressed
+        """
+        offset, length, flags, _ = self.members[name]
+        if flags & FLAG_DEFLATE:
+            raise ValueError(f"Project member is compressed: {name}")
+        return MemberStream(self.filepath, offset, length)
+
+    def read_raw(self, name: str):
+        """Stored bytes of a member (still compressed) and its table entry."""
+        offset, length, flags, crc = self.members[name]
+        self._file.seek(offset)
+        return self._file.read(length), flags, crc
+
+    def read_entry(self, name: str) -> Any:
+        """Decodes a structured member with the codec it was written with."""
+        flags = self.members[name][2]
+        serializer = SERIALIZERS["msgpack" if flags & FLAG_MSGPACK else "json"]
+        return serializer.loads(self.read(name))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ContainerWriter:
+    """
+    Writes a v2 container.
+
+    A new container is written to a temporary file and moved over the target
+    on commit(). With append=True the members of the existing container stay
+    where they are; new members, the new manifest and trailer are appended.
+    """
+    def __init__(self, filepath: str, append: bool = False):
+        self.filepath = filepath
+        self.append = append
+        self.members = {}
+        self.previous_manifest = {}
+        if append:
+            reader = ContainerReader(filepath)
+            self.members = dict(reader.members)
+            self.previous_manifest = reader.manifest
+            reader.close()
+            self._path = filepath
+            self._file = open(filepath, 'r+b')
+            self._start = self._file.seek(0, os.SEEK_END)
+        else:
+            self._path = filepath + ".tmp"
+            self._file = open(self._path, 'wb')
+            self._file.write(MAGIC)
+
+    def add(self, name: str, data: bytes, compress: bool = False, flags: int = 0):
+        """Appends a member (replacing any member with the same name)."""
+        if compress:
+            data = zlib.compress(data, 6)
+            flags |= FLAG_DEFLATE
+        offset = self._file.tell()
+        self._file.write(data)
+        self.members[name] = [offset, len(data), flags, zlib.crc32(data)]
+
+    def add_stream(self, name: str, stream):
+        """Appends a member copied from a binary file object, chunk by chunk."""
+        offset = self._file.tell()
+        crc = 0
+        while True:
+            chunk = stream.read(_COPY_CHUNK)
+            if not chunk:
+                break
+            self._file.write(chunk)
+            crc = zlib.crc32(chunk, crc)
+        self.members[name] = [offset, self._file.tell() - offset, 0, crc]
+
+    def add_entry(self, name: str, data: Any, serializer=None):
+        """Appends a structured member (default_serializer() unless given)."""
+        serializer = serializer or default_serializer()
+        flags = FLAG_MSGPACK if serializer.name == "msgpack" else 0
+        self.add(name, serializer.dumps(data), compress=True, flags=flags)
+
+    def copy_raw(self, reader: ContainerReader, name: str):
+        """Copies a member from another container without decompressing it."""
+        data, flags, crc = reader.read_raw(name)
+        offset = self._file.tell()
+        self._file.write(data)
+        self.members[name] = [offset, len(data), flags, crc]
+
+    def remove(self, name: str):
+        """Drops a member from the table; its bytes become garbage."""
+        self.members.pop(name, None)
+
+    def commit(self, manifest: Dict[str, Any]):
+        """Writes manifest and trailer, flushes to disk and closes the file."""
+        data = encode_entry({**manifest, "members": self.members})
+        offset = self._file.tell()
+        self._file.write(data)
+        self._file.write(_TRAILER.pack(TRAILER_MAGIC, offset, len(data), zlib.crc32(data)))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        if not self.append:
+            os.replace(self._path, self.filepath)
+
+    def abort(self):
+        """Drops a write that was not committed."""
+        if self._file is None:
+            return
+        if self.append:
+            # Cut off what was appended; the old trailer is last again
+            self._file.truncate(self._start)
+            self._file.close()
+        else:
+            self._file.close()
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+        self._file = None
+
+
+class MemberStream(io.RawIOBase):
+    """Seekable, read-only window over one member of a container file."""
+    def __init__(self, filepath: str, offset: int, length: int):
+        super().__init__()
+        self._map = None
+        self._file = open(filepath, 'rb')
+        if length:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offset = offset
+        self._length = length
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, pos: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += self._length
+        if pos < 0:
+            raise ValueError("Negative seek position")
+        self._pos = pos
+        return pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        count = max(0, min(len(buffer), self._length - self._pos))
+        if count:
+            start = self._offset + self._pos
+            buffer[:count] = self._map[start:start + count]
+            self._pos += count
+        return count
+
+    def getvalue(self) -> bytes:
+        """The whole member as bytes, copied straight from the map."""
+        if not self._length:
+            return b""
+        return self._map[self._offset:self._offset + self._length]
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()
+
+
+def page_entry_name(page_num: int) -> str:
+    return f"pages/{page_num:05d}"
+
+
+def image_member_name(data: bytes) -> str:
+    """Content address of an image: identical bytes share one member."""
+    return "images/" + hashlib.sha256(data).hexdigest()
+
+
+def _write_page(writer: ContainerWriter, page: Dict[str, Any], serializer=None) -> Dict[str, Any]:
+    """
+    Writes one page entry and its new images.
+
+    Image data (bytes or v1 base64 text) is stored in separate binary
+    members keyed by content hash and referenced from the elements by
+    "image_ref"; images already in the container are not written again.
+    The "image_ref" given with bytes (by serialize_graphics_item or a
+    reader) is trusted, so cached images are not hashed again.
+
+    Returns:
+        The page's manifest index entry
+    """
+    page_num = page.get("page_num", 0)
+    elements = []
+    image_refs = []
+    for element in page.get("elements") or []:
+        image_data = element.get("image_data")
+        if element.get("type") == "image" and image_data:
+            if isinstance(image_data, str):
+                image_data = base64.b64decode(image_data)
+                image_name = image_member_name(image_data)
+            else:
+                image_name = element.get("image_ref") or image_member_name(image_data)
+            if image_name not in writer.members:
+                writer.add(image_name, image_data)
+            element = {key: value for key, value in element.items() if key != "image_data"}
+            element["image_ref"] = image_name
+        if element.get("image_ref") and element["image_ref"] not in image_refs:
+            image_refs.append(element["image_ref"])
+        elements.append(element)
+
+    writer.add_entry(page_entry_name(page_num), {**page, "elements": elements}, serializer)
+    return {
+        "page_num": page_num,
+        "entry": page_entry_name(page_num),
+        "element_count": len(elements),
+        "background_opacity": page.get("background_opacity", 0.5),
+        "images": image_refs,
+    }
+
+
+def _store_source_pdf(writer: ContainerWriter, source_pdf: Dict[str, Any],
+                      filepath: str) -> Dict[str, Any]:
+    """
+    Makes the source PDF member match the project's "source_pdf" settings.
+
+    An embedded PDF is taken from, in order: v1 base64 "data", a member the
+    container already has, the container named by "container" (or the
+    file being replaced), or the file at "path". It is copied raw, in
+    chunks, never loaded whole.
+
+    Returns:
+        The "source_pdf" entry for the manifest
+
+    Raises:
+        FileNotFoundError: If the PDF to embed can't be found
+    """
+    stored = {key: value for key, value in source_pdf.items()
+              if key not in ("data", "container", "member")}
+    if not source_pdf.get("embedded"):
+        writer.remove(SOURCE_PDF_MEMBER)
+        return stored
+
+    stored["member"] = SOURCE_PDF_MEMBER
+    data = source_pdf.get("data")
+    if isinstance(data, str) and data:
+        writer.add(SOURCE_PDF_MEMBER, base64.b64decode(data))
+        return stored
+    if SOURCE_PDF_MEMBER in writer.members:
+        return stored
+
+    for container in (source_pdf.get("container"), filepath):
+        if not container or not os.path.isfile(container):
+            continue
+        if is_container(container):
+            reader = ContainerReader(container)
+            try:
+                if reader.has(SOURCE_PDF_MEMBER):
+                    writer.copy_raw(reader, SOURCE_PDF_MEMBER)
+                    return stored
+            finally:
+                reader.close()
+        else:
+            # v1 project with a base64 embedded PDF
+            try:
+                reader = LegacyProjectReader(container)
+            except ValueError:
+                continue
+            try:
+                stream = reader.open_embedded_pdf()
+                if stream is not None:
+                    writer.add_stream(SOURCE_PDF_MEMBER, stream)
+                    return stored
+            finally:
+                reader.close()
+
+    pdf_path = source_pdf.get("path")
+    if not pdf_path or not os.path.isfile(pdf_path):
+        raise FileNotFoundError(f"Source PDF to embed not found: {pdf_path}")
+    with open(pdf_path, 'rb') as f:
+        writer.add_stream(SOURCE_PDF_MEMBER, f)
+    return stored
+
+
+def cache_member_name(kind: str, page_num: int) -> str:
+    return f"cache/{kind}/{page_num:05d}"
+
+
+def _previous_cache(writer: ContainerWriter, container: Optional[str]):
+    """
+    The cache index the project had before this save and a reader to copy
+    its members from (None when appending: they are already in place).
+    """
+    if writer.append:
+        return writer.previous_manifest.get("cache"), None
+    if container and is_container(container):
+        reader = ContainerReader(container)
+        cache = reader.manifest.get("cache")
+        if cache:
+            return cache, reader
+        reader.close()
+    return None, None
+
+
+def _store_cache(writer: ContainerWriter, project_data: Dict[str, Any],
+                 filepath: str) -> Optional[Dict[str, Any]]:
+    """
+    Writes the preview cache of a project.
+
+    project_data["cache"] is None to drop the cache, absent to keep the
+    stored one, or a dict with the "fingerprint" of the source PDF the
+    previews were made from, optionally the "container" holding the
+    current cache (for full rewrites) and new entries per kind
+    ({page_num: bytes} for images, {page_num: element list} for
+    "analysis"). Stored entries made from the same PDF are kept unless
+    replaced; those of another PDF are dropped.
+
+    Returns:
+        The "cache" entry for the manifest, or None
+    """
+    cache = project_data.get("cache", {})
+    if cache is None:
+        for name in [name for name in writer.members if name.startswith("cache/")]:
+            writer.remove(name)
+        return None
+
+    previous, reader = _previous_cache(writer, cache.get("container") or filepath)
+    try:
+        fingerprint = cache.get("fingerprint", previous and previous.get("fingerprint"))
+        if previous and previous.get("fingerprint") != fingerprint:
+            previous = None
+        index = {"fingerprint": fingerprint}
+        for kind in CACHE_KINDS:
+            entries = {int(page): name for page, name in (previous or {}).get(kind, {}).items()}
+            for page_num in cache.get(kind, {}):
+                entries.pop(int(page_num), None)
+            if reader is not None:
+                for name in entries.values():
+                    writer.copy_raw(reader, name)
+            index[kind] = {str(page): name for page, name in entries.items()}
+    finally:
+        if reader is not None:
+            reader.close()
+
+    if previous is None:
+        for name in [name for name in writer.members if name.startswith("cache/")]:
+            writer.remove(name)
+    for kind in CACHE_KINDS:
+        for page_num, data in cache.get(kind, {}).items():
+            name = cache_member_name(kind, int(page_num))
+            if kind in CACHE_IMAGE_KINDS:
+                writer.add(name, data)
+            else:
+                writer.add_entry(name, data)
+            index[kind][str(page_num)] = name
+
+    if not fingerprint or not any(index[kind] for kind in CACHE_KINDS):
+        return None
+    return index
+
+
+def _project_manifest(writer: ContainerWriter, project_data: Dict[str, Any], page_index,
+                      filepath: str) -> Dict[str, Any]:
+    """Stores the source PDF and preview members and builds the manifest."""
+    manifest = {key: value for key, value in project_data.items()
+                if key not in ("pages", "cache")}
+    manifest["source_pdf"] = _store_source_pdf(writer, project_data.get("source_pdf", {}), filepath)
+    cache = _store_cache(writer, project_data, filepath)
+    if cache:
+        manifest["cache"] = cache
+    manifest["version"] = CONTAINER_VERSION
+    manifest["pages"] = sorted(page_index, key=lambda page: page["page_num"])
+    return manifest
+
+
+def write_project(filepath: str, project_data: Dict[str, Any], serializer=None):
+    """
+    Writes a complete project as a v2 container.
+
+    Args:
+        filepath: Path of the .omar file
+        project_data: Project dictionary in the v1 layout
+        serializer: Codec of the page entries (default_serializer() if None)
+    """
+    writer = ContainerWriter(filepath)
+    try:
+        page_index = [_write_page(writer, page, serializer)
+                      for page in project_data.get("pages", [])]
+        writer.commit(_project_manifest(writer, project_data, page_index, filepath))
+    except Exception:
+        writer.abort()
+        raise
+
+
+def update_project(filepath: str, project_data: Dict[str, Any],
+                   changed_pages: List[Dict[str, Any]], serializer=None, compact: bool = True):
+    """
+    Saves only what changed into an existing v2 container.
+
+    The changed page entries and their new images are appended, followed by
+    a new manifest (project metadata from project_data, the page index with
+    the changed entries swapped in). The new trailer is written last, so an
+    interrupted save leaves the previous state readable. Entries of pages
+    no longer in the page order, and images no longer referenced by any
+    page, are dropped; when dead bytes outweigh live ones
+    the container is compacted (unless compact is False, e.g. while the
+    file is still open for reading).
+
+    Args:
+        filepath: Path of the existing v2 .omar file
+        project_data: Project metadata (the "pages" key is ignored)
+        changed_pages: Full page dicts of the pages to replace or add
+        serializer: Codec of the new page entries (default_serializer() if None)
+        compact: Compact the container when it holds mostly dead bytes
+    """
+    writer = ContainerWriter(filepath, append=True)
+    try:
+        page_index = {page["page_num"]: page
+                      for page in writer.previous_manifest.get("pages", [])}
+        for page in changed_pages:
+            entry = _write_page(writer, page, serializer)
+            previous = page_index.get(entry["page_num"])
+            if previous and previous["entry"] != entry["entry"]:
+                # Entry written under an older naming scheme
+                writer.remove(previous["entry"])
+            page_index[entry["page_num"]] = entry
+
+        if project_data.get("page_order"):
+            # Pages deleted from the document (documents have at least one
+            # page, so an empty order is no order)
+            listed = set(project_data["page_order"])
+            for page_num in [page_num for page_num in page_index if page_num not in listed]:
+                writer.remove(page_index.pop(page_num)["entry"])
+
+        live_images = {ref for page in page_index.values() for ref in page.get("images", [])}
+        for name in list(writer.members):
+            if name.startswith("images/") and name not in live_images:
+                writer.remove(name)
+        writer.commit(_project_manifest(writer, project_data, page_index.values(), filepath))
+    except Exception:
+        writer.abort()
+        raise
+
+    if compact and needs_compaction(filepath):
+        compact_container(filepath)
+
+
+def needs_compaction(filepath: str) -> bool:
+    """True when most of the file is superseded members and manifests."""
+    reader = ContainerReader(filepath)
+    try:
+        live = reader.manifest_length + sum(member[1] for member in reader.members.values())
+    finally:
+        reader.close()
+    return os.path.getsize(filepath) > 2 * live + _COMPACTION_SLACK
+
+
+def compact_container(filepath: str):
+    """Rewrites a container with only its live members (raw copies, no re-encoding)."""
+    reader = ContainerReader(filepath)
+    writer = ContainerWriter(filepath)
+    try:
+        for name in reader.names():
+            writer.copy_raw(reader, name)
+        reader.close()
+        writer.commit(reader.manifest)
+    except Exception:
+        reader.close()
+        writer.abort()
+        raise
+
+
+class ProjectReader:
+    """
+    Lazy view of a v2 project: metadata comes from the manifest, page
+    entries and their images are read on demand.
+    """
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.container = ContainerReader(filepath)
+        self.manifest = self.container.manifest
+        self._pages = {page["page_num"]: page for page in self.manifest.get("pages", [])}
+
+    @property
+    def version(self) -> str:
+        return self.manifest.get("version", CONTAINER_VERSION)
+
+    @property
+    def source_pdf(self) -> Dict[str, Any]:
+        return self.manifest.get("source_pdf", {})
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        return self.manifest.get("settings", {})
+
+    @property
+    def page_order(self) -> List[int]:
+        return self.manifest.get("page_order", [])
+
+    @property
+    def page_order_table(self) -> Dict[str, Any]:
+        """Page order fields, for PageOrder.from_table() (see utils/page_order.py)."""
+        return {key: self.manifest.get(key) for key in ("page_order", "page_table", "page_sources")}
+
+    def page_nums(self) -> List[int]:
+        return sorted(self._pages)
+
+    def page_info(self, page_num: int) -> Optional[Dict[str, Any]]:
+        """Index entry of a page (element count, background opacity), or None."""
+        return self._pages.get(page_num)
+
+    def page_data(self, page_num: int) -> Optional[Dict[str, Any]]:
+        """Full page entry with image data loaded as bytes, or None."""
+        info = self._pages.get(page_num)
+        if info is None:
+            return None
+        page = self.container.read_entry(info["entry"])
+        images = {}
+        for element in page.get("elements", []):
+            image_ref = element.get("image_ref")
+            if image_ref and "image_data" not in element:
+                # Elements sharing an image share the bytes object too
+                if image_ref not in images:
+                    images[image_ref] = self.container.read(image_ref)
+                element["image_data"] = images[image_ref]
+        return page
+
+    def page_elements(self, page_num: int) -> List[Dict[str, Any]]:
+        page = self.page_data(page_num)
+        return page.get("elements", []) if page else []
+
+    def open_embedded_pdf(self):
+        """File object over the embedded source PDF, or None if it is linked."""
+        member = self.source_pdf.get("member")
+        if not self.source_pdf.get("embedded") or not self.container.has(member or SOURCE_PDF_MEMBER):
+            return None
+        return self.container.open_member(member or SOURCE_PDF_MEMBER)
+
+    def cache_matches(self, fingerprint: Optional[str]) -> bool:
+        """True if the stored previews were made from the PDF with this fingerprint."""
+        cache = self.manifest.get("cache")
+        return bool(cache and fingerprint and cache.get("fingerprint") == fingerprint)
+
+    def has_cached_preview(self, kind: str, page_num: int) -> bool:
+        return str(page_num) in (self.manifest.get("cache") or {}).get(kind, {})
+
+    def cached_preview(self, kind: str, page_num: int):
+        """
+        Stored preview of a page (check cache_matches() first).
+
+        Returns:
+            Encoded image bytes, the element list for "analysis", or None
+            if there is none (or it is unreadable)
+        """
+        name = (self.manifest.get("cache") or {}).get(kind, {}).get(str(page_num))
+        if name is None or not self.container.has(name):
+            return None
+        try:
+            if kind in CACHE_IMAGE_KINDS:
+                return self.container.read(name)
+            return self.container.read_entry(name)
+        except ValueError as e:
+            print(f"Failed to read cached {kind} of page {page_num}: {e}")
+            return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materializes the whole project in the v1 dictionary layout."""
+        project_data = {key: value for key, value in self.manifest.items() if key != "pages"}
+        project_data["pages"] = [self.page_data(page_num) for page_num in self.page_nums()]
+        return project_data
+
+    def close(self):
+        self.container.close()
+
+
+# Next structural character of a JSON document
+_JSON_TOKEN = re.compile(rb'["{}\[\],]')
+_JSON_WHITESPACE = b" \t\r\n"
+
+
+def _skip_json_string(buf, pos: int) -> int:
+    """Position after the closing quote of the string whose content starts at pos."""
+    while True:
+        end = buf.find(b'"', pos)
+        if end < 0:
+            raise ValueError("Invalid .omar file format: unterminated string")
+        backslashes = 0
+        while buf[end - 1 - backslashes] == 0x5C:
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return end + 1
+        pos = end + 1
+
+
+def _json_members(buf, start: int):
+    """
+    Yields the (start, end) spans of the members of the JSON object or
+    array opening at start, without decoding them.
+
+    Strings are skipped with bytes.find, so long base64 images cost a
+    memchr instead of a parse.
+    """
+    depth = 0
+    pos = start
+    member_start = start + 1
+    while True:
+        match = _JSON_TOKEN.search(buf, pos)
+        if match is None:
+            raise ValueError("Invalid .omar file format: truncated JSON")
+        char = buf[match.start()]
+        pos = match.end()
+        if char == 0x22:  # "
+            pos = _skip_json_string(buf, pos)
+        elif char in b"{[":
+            depth += 1
+        elif char in b"}]":
+            depth -= 1
+            if depth == 0:
+                # Only whitespace before the closing bracket: empty container
+                first = member_start
+                while first < match.start() and buf[first] in _JSON_WHITESPACE:
+                    first += 1
+                if first < match.start():
+                    yield member_start, match.start()
+                return
+        elif depth == 1:  # , between members
+            yield member_start, match.start()
+            member_start = pos
+
+
+def _json_fields(buf, start: int):
+    """Yields (key, value_start, value_end) for the object opening at start."""
+    for member_start, member_end in _json_members(buf, start):
+        key_start = member_start
+        while buf[key_start] in _JSON_WHITESPACE:
+            key_start += 1
+        key_end = _skip_json_string(buf, key_start + 1)
+        key = json.loads(bytes(buf[key_start:key_end]))
+        value_start = buf.find(b":", key_end, member_end) + 1
+        while buf[value_start] in _JSON_WHITESPACE:
+            value_start += 1
+        yield key, value_start, member_end
+
+
+def _json_value(buf, start: int, end: int):
+    return json.loads(bytes(buf[start:end]))
+
+
+class LegacyProjectReader:
+    """
+    Same interface as ProjectReader over a v1 (single JSON document) project.
+
+    The file is memory mapped and indexed in one pass: top-level fields are
+    decoded, while for each entry of "pages" only its byte span, page
+    number, background opacity and element count are kept. A page's JSON
+    (and its base64 images) is decoded when the page is asked for, so
+    opening costs about one page of memory instead of the whole document.
+    The embedded source PDF (source_pdf.data) is kept as a span too and
+    decoded by open_embedded_pdf().
+    """
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._file = open(filepath, 'rb')
+        try:
+            self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("Invalid .omar file format: empty file")
+        self._spans = {}
+        self._pdf_data_span = None  # (start, end) of the base64 text of source_pdf.data
+        try:
+            self.header = self._index()
+        except (ValueError, IndexError) as e:
+            self.close()
+            raise ValueError(f"Invalid .omar file format: {e}")
+        self._pages = {page["page_num"]: page for page in self.header.get("pages", [])}
+
+    def _index(self) -> Dict[str, Any]:
+        """Top-level fields, with "pages" replaced by the page index."""
+        buf = self._buf
+        start = 0
+        while buf[start] in _JSON_WHITESPACE:
+            start += 1
+        if buf[start] != 0x7B:  # {
+            raise ValueError("not a JSON object")
+
+        header = {}
+        for key, value_start, value_end in _json_fields(buf, start):
+            if key == "source_pdf" and buf[value_start] == 0x7B:  # {
+                header[key] = self._index_source_pdf(value_start)
+                continue
+            if key != "pages":
+                header[key] = _json_value(buf, value_start, value_end)
+                continue
+            header["pages"] = []
+            for page_start, page_end in _json_members(buf, value_start):
+                while buf[page_start] in _JSON_WHITESPACE:
+                    page_start += 1
+                info = {"page_num": 0, "element_count": 0, "background_opacity": 0.5}
+                for field, field_start, field_end in _json_fields(buf, page_start):
+                    if field == "elements":
+                        if buf[field_start] == 0x5B:  # [
+                            info["element_count"] = sum(1 for _ in _json_members(buf, field_start))
+                    elif field in ("page_num", "background_opacity"):
+                        info[field] = _json_value(buf, field_start, field_end)
+                header["pages"].append(info)
+                self._spans[info["page_num"]] = (page_start, page_end)
+        return header
+
+    def _index_source_pdf(self, start: int) -> Dict[str, Any]:
+        """source_pdf fields, without its "data" (only the span of the base64 text is kept)."""
+        buf = self._buf
+        source_pdf = {}
+        for field, field_start, field_end in _json_fields(buf, start):
+            if field == "data" and buf[field_start] == 0x22:  # "
+                self._pdf_data_span = (field_start + 1,
+                                       _skip_json_string(buf, field_start + 1) - 1)
+            else:
+                source_pdf[field] = _json_value(buf, field_start, field_end)
+        return source_pdf
+
+    def _pdf_data(self) -> Optional[str]:
+        """The base64 text of the embedded source PDF, or None."""
+        if self._pdf_data_span is None:
+            return None
+        start, end = self._pdf_data_span
+        return _json_value(self._buf, start - 1, end + 1)
+
+    @property
+    def version(self) -> str:
+        return self.header.get("version", "1.0")
+
+    @property
+    def source_pdf(self) -> Dict[str, Any]:
+        return self.header.get("source_pdf", {})
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        return self.header.get("settings", {})
+
+    @property
+    def page_order(self) -> List[int]:
+        return self.header.get("page_order", [])
+
+    @property
+    def page_order_table(self) -> Dict[str, Any]:
+        """Page order fields, for PageOrder.from_table() (see utils/page_order.py)."""
+        return {key: self.header.get(key) for key in ("page_order", "page_table", "page_sources")}
+
+    def page_nums(self) -> List[int]:
+        return sorted(self._pages)
+
+    def page_info(self, page_num: int) -> Optional[Dict[str, Any]]:
+        return self._pages.get(page_num)
+
+    def _raw_page(self, page_num: int) -> Optional[Dict[str, Any]]:
+        span = self._spans.get(page_num)
+        if span is None:
+            return None
+        return _json_value(self._buf, *span)
+
+    def page_data(self, page_num: int) -> Optional[Dict[str, Any]]:
+        """Page entry with image data decoded to bytes, as ProjectReader returns it."""
+        page = self._raw_page(page_num)
+        if page is None:
+            return None
+        images = {}
+        for element in page.get("elements") or []:
+            image_data = element.get("image_data")
+            if isinstance(image_data, str) and image_data:
+                if image_data not in images:
+                    images[image_data] = base64.b64decode(image_data)
+                element["image_data"] = images[image_data]
+        return page
+
+    def page_elements(self, page_num: int) -> List[Dict[str, Any]]:
+        page = self.page_data(page_num)
+        return (page.get("elements") or []) if page else []
+
+    def open_embedded_pdf(self):
+        """File object over the embedded (base64) source PDF, or None if it is linked."""
+        if not self.source_pdf.get("embedded") or self._pdf_data_span is None:
+            return None
+        start, end = self._pdf_data_span
+        if start == end:
+            return None
+        if self._buf.find(b"\\", start, end) >= 0:
+            # Text with JSON escapes (e.g. "\/") is decoded as JSON first
+            return io.BytesIO(base64.b64decode(self._pdf_data()))
+        # Decoded straight from the memory map, with no copy of the base64 text
+        with memoryview(self._buf)[start:end] as data:
+            return io.BytesIO(base64.b64decode(data))
+
+    def cache_matches(self, fingerprint: Optional[str]) -> bool:
+        """v1 projects carry no previews."""
+        return False
+
+    def has_cached_preview(self, kind: str, page_num: int) -> bool:
+        return False
+
+    def cached_preview(self, kind: str, page_num: int):
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The whole project as stored (image data stays base64 text)."""
+        project_data = {key: value for key, value in self.header.items() if key != "pages"}
+        if self._pdf_data_span is not None:
+            project_data["source_pdf"] = dict(self.source_pdf, data=self._pdf_data())
+        project_data["pages"] = [self._raw_page(page_num) for page_num in self.page_nums()]
+        return project_data
+
+    def close(self):
+        if self._buf is not None:
+            self._buf.close()
+            self._buf = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -2,7 +2,9 @@
 OMAR Project File Format Handler
 
 Handles serialization and deserialization of PDF Visual Editor project files (.omar).
-.omar files are JSON-based and store all project state including:
+Version 2 files are a random-access container (see omar_container.py) with a
+manifest, one entry per page and images as binary members; version 1 files
+are a single JSON document and can still be opened. Both store:
 - Source PDF reference or embedded data
 - All page elements (text, images, shapes)
 - Element transforms, opacity, visibility
@@ -10,40 +12,131 @@ Handles serialization and deserialization of PDF Visual Editor project files (.o
 - Application settings (theme, etc.)
 """
 
-import json
-import base64
 import os
-from typing import Dict, List, Any, Optional
-from qt_compat import QGraphicsItem, QGraphicsTextItem, QGraphicsPixmapItem, QBuffer, QIODevice
+import uuid
+from typing import Dict, List, Any, Optional, TYPE_CHECKING
+from omar_container import (write_project, update_project, is_container,
+                            needs_compaction, compact_container, image_member_name,
+                            ProjectReader, LegacyProjectReader)
+from omar_serializer import get_serializer
+
+if TYPE_CHECKING:
+    from qt_compat import QGraphicsPixmapItem, QGraphicsItem
+
+
+# QGraphicsItem data key holding an element's stable id
+ELEMENT_ID_KEY = 0x4F4D
+
+
+def capture_image(pixmap):
+    """
+    Copy of a pixmap that can be encoded on a worker thread: a QImage,
+    implicitly shared, so changes of the pixmap don't reach it.
+    
+    GameQt images can't be encoded; the pixmap itself is returned there
+    (GameQt runs background tasks synchronously).
+    """
+    image = pixmap.toImage()
+    return image if hasattr(image, "save") else pixmap
+
+
+class DeferredImage:
+    """
+    Pixmap of an item captured for PNG encoding off the UI thread.
+    
+    The QImage copy is implicitly shared, so later edits of the item don't
+    change it. Once encoded, the bytes are handed back to the item (if it
+    caches them, see ResizablePixmapItem) for the pixmap version captured.
+    """
+    __slots__ = ("image", "item", "version")
+    
+    def __init__(self, item: "QGraphicsPixmapItem"):
+        self.image = capture_image(item.pixmap())
+        self.item = item
+        self.version = getattr(item, "pixmap_version", None)
+    
+    def encode(self):
+        """(PNG bytes, image ref) of the captured image."""
+        data = OmarFormat.encode_image(self.image)
+        image_ref = image_member_name(data)
+        if self.version is not None:
+            self.item.set_encoded_image(data, image_ref, self.version)
+        return data, image_ref
 
 
 class OmarFormat:
     """Handler for .omar project file format."""
     
-    VERSION = "1.0"
+    VERSION = "2.0"
     
     @staticmethod
-    def save_project(filepath: str, project_data: Dict[str, Any]) -> None:
+    def save_project(filepath: str, project_data: Dict[str, Any],
+                     serializer: Optional[str] = None) -> None:
         """
         Save project data to .omar file.
         
         Args:
             filepath: Path to save .omar file
             project_data: Complete project data dictionary
+            serializer: Page entry codec ("json" or "msgpack"); defaults to
+                msgpack when the msgpack package is installed
         """
         # Add version and app identifier
         project_data["version"] = OmarFormat.VERSION
         project_data["app"] = "PDF Visual Editor"
         
-        # Write to file with indentation for readability
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(project_data, f, indent=2, ensure_ascii=False)
+        write_project(filepath, project_data, get_serializer(serializer) if serializer else None)
+    
+    @staticmethod
+    def can_update_project(filepath: str) -> bool:
+        """True if the file is a v2 project that update_project() can append to."""
+        return is_container(filepath)
+    
+    @staticmethod
+    def update_project(filepath: str, project_data: Dict[str, Any],
+                       changed_pages: List[Dict[str, Any]],
+                       serializer: Optional[str] = None, compact: bool = True) -> None:
+        """
+        Save only the changed pages into an existing v2 .omar file.
+        
+        Args:
+            filepath: Path of the .omar file (must be a v2 container)
+            project_data: Project metadata (source PDF, settings, page order)
+            changed_pages: Page dicts to replace, in the save_project layout
+            serializer: Page entry codec, as in save_project()
+            compact: Compact the file when it holds mostly dead data (see
+                compact_project())
+        """
+        project_data["version"] = OmarFormat.VERSION
+        project_data["app"] = "PDF Visual Editor"
+        
+        update_project(filepath, project_data, changed_pages,
+                       get_serializer(serializer) if serializer else None, compact)
+    
+    @staticmethod
+    def compact_project(filepath: str) -> bool:
+        """
+        Rewrite a v2 .omar file without its superseded data, if that is
+        most of the file.
+        
+        The file is replaced, so it must not be open (on Windows).
+        
+        Returns:
+            True if the file was compacted
+        """
+        if not needs_compaction(filepath):
+            return False
+        compact_container(filepath)
+        return True
     
     @staticmethod
     def load_project(filepath: str) -> Dict[str, Any]:
         """
         Load project data from .omar file.
         
+        Reads the whole project; use open_project() to read pages on demand.
+        Image data of v2 projects is returned as bytes, v1 keeps base64 text.
+        
         Args:
             filepath: Path to .omar file
             
@@ -53,14 +146,46 @@ class OmarFormat:
         Raises:
             ValueError: If file format is invalid
         """
-        with open(filepath, 'r', encoding='utf-8') as f:
-            project_data = json.load(f)
+        reader = OmarFormat.open_project(filepath)
+        try:
+            return reader.to_dict()
+        finally:
+            reader.close()
+    
+    @staticmethod
+    def open_project(filepath: str):
+        """
+        Open a .omar file for lazy reading.
+        
+        For v2 containers only the manifest is read here; page entries and
+        images are read by reader.page_data() / page_elements(). v1 files
+        are indexed without decoding their pages, which are parsed when
+        asked for.
+        
+        Args:
+            filepath: Path to .omar file
+            
+        Returns:
+            ProjectReader (v2) or LegacyProjectReader (v1)
+            
+        Raises:
+            ValueError: If file format is invalid
+        """
+        if is_container(filepath):
+            reader = ProjectReader(filepath)
+            if not OmarFormat.validate_project(reader.manifest):
+                reader.close()
+                raise ValueError("Invalid .omar file format")
+            return reader
+        
+        reader = LegacyProjectReader(filepath)
         
         # Validate format
-        if not OmarFormat.validate_project(project_data):
+        if not OmarFormat.validate_project(reader.header):
+            reader.close()
             raise ValueError("Invalid .omar file format")
         
-        return project_data
+        return reader
     
     @staticmethod
     def validate_project(project_data: Dict[str, Any]) -> bool:
@@ -77,16 +202,38 @@ class OmarFormat:
         return all(key in project_data for key in required_keys)
     
     @staticmethod
-    def serialize_graphics_item(item: QGraphicsItem) -> Optional[Dict[str, Any]]:
+    def element_id(item: "QGraphicsItem") -> str:
+        """
+        Stable id of a graphics item, assigned on first use.
+        
+        Ids are saved with the elements and restored with them, so journal
+        records can refer to the same element across sessions.
+        """
+        element_id = item.data(ELEMENT_ID_KEY)
+        if not element_id:
+            element_id = uuid.uuid4().hex
+            item.setData(ELEMENT_ID_KEY, element_id)
+        return element_id
+    
+    @staticmethod
+    def serialize_graphics_item(item: "QGraphicsItem",
+                                encode_images: bool = True) -> Optional[Dict[str, Any]]:
         """
         Serialize a QGraphicsItem to dictionary.
         
         Args:
             item: Graphics item to serialize
+            encode_images: If False, an image that isn't encoded yet is
+                left as a DeferredImage, to be PNG-encoded later by
+                encode_images() (which may run on a worker thread, unlike
+                QPixmap operations)
             
         Returns:
             Dictionary with item data, or None if item should be skipped
         """
+        # Qt is only needed here, so projects can be loaded headless
+        from qt_compat import QGraphicsTextItem, QGraphicsPixmapItem
+        
         # Get transform matrix
         t = item.transform()
         transform_matrix = [t.m11(), t.m12(), t.m21(), t.m22(), t.dx(), t.dy()]
@@ -96,6 +243,7 @@ class OmarFormat:
         
         # Get common properties
         base_data = {
+            "id": OmarFormat.element_id(item),
             "x": pos.x(),
             "y": pos.y(),
             "transform_matrix": transform_matrix,
@@ -117,20 +265,29 @@ class OmarFormat:
             }
         
         elif isinstance(item, QGraphicsPixmapItem):
-            # Encode pixmap as base64
+            # A placeholder's image is extracted before it's saved or exported
+            if hasattr(item, "ensure_image"):
+                item.ensure_image()
             pixmap = item.pixmap()
-            buffer = QBuffer()
-            buffer.open(QIODevice.OpenModeFlag.ReadWrite)
-            pixmap.save(buffer, "PNG")
-            image_data = base64.b64encode(buffer.data().data()).decode('utf-8')
+            # ResizablePixmapItem keeps the encoding of its pixmap
+            cached = item.cached_image() if hasattr(item, "cached_image") else None
+            if cached is not None:
+                image_data, image_ref = cached
+            elif encode_images:
+                image_data, image_ref = DeferredImage(item).encode()
+            else:
+                image_data, image_ref = DeferredImage(item), None
             
-            return {
+            element = {
                 **base_data,
                 "type": "image",
                 "image_data": image_data,
                 "width": pixmap.width(),
                 "height": pixmap.height()
             }
+            if image_ref:
+                element["image_ref"] = image_ref
+            return element
         
         else:
             # Generic shape/rect
@@ -143,32 +300,48 @@ class OmarFormat:
             }
     
     @staticmethod
-    def embed_pdf(pdf_path: str) -> str:
+    def encode_image(image) -> bytes:
+        """PNG-encode a QPixmap or QImage."""
+        from qt_compat import QBuffer, QIODevice
+        
+        buffer = QBuffer()
+        buffer.open(QIODevice.OpenModeFlag.ReadWrite)
+        image.save(buffer, "PNG")
+        return bytes(buffer.data().data())
+    
+    @staticmethod
+    def encode_images(elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Embed PDF file as base64 string.
+        Encode, in place, the images serialize_graphics_item() left as
+        DeferredImage (encode_images=False). Safe on a worker thread.
         
-        Args:
-            pdf_path: Path to PDF file
-            
         Returns:
-            Base64 encoded PDF data
+            The same elements
         """
-        with open(pdf_path, 'rb') as f:
-            pdf_data = f.read()
-        return base64.b64encode(pdf_data).decode('utf-8')
+        for element in elements:
+            image_data = element.get("image_data")
+            if isinstance(image_data, DeferredImage):
+                element["image_data"], element["image_ref"] = image_data.encode()
+        return elements
     
     @staticmethod
-    def extract_embedded_pdf(pdf_data: str, output_path: str) -> None:
+    def embed_pdf(project_data: Dict[str, Any], pdf_path: Optional[str] = None) -> None:
         """
-        Extract embedded PDF data to file.
+        Mark the source PDF of a project to be embedded in the .omar file.
+        
+        The PDF is copied into the container as a raw member when the
+        project is saved, and read back with reader.open_embedded_pdf()
+        (a memory-mapped file object, no base64 and no temporary file).
         
         Args:
-            pdf_data: Base64 encoded PDF data
-            output_path: Where to save extracted PDF
+            project_data: Project data dictionary
+            pdf_path: PDF to embed (defaults to the linked source PDF)
         """
-        pdf_bytes = base64.b64decode(pdf_data)
-        with open(output_path, 'wb') as f:
-            f.write(pdf_bytes)
+        source_pdf = project_data.setdefault("source_pdf", {})
+        if pdf_path:
+            source_pdf["path"] = pdf_path
+        source_pdf["embedded"] = True
+        source_pdf.pop("data", None)
     
     @staticmethod
     def create_empty_project(source_pdf_path: str) -> Dict[str, Any]:
@@ -0,0 +1,230 @@
+"""
+Append-only autosave journal for .omar projects.
+
+Edits made through the undo commands are recorded in a sidecar file
+(<project or PDF>.journal) so work since the last save survives a crash.
+The journal holds one record per line:
+
+    <crc32 hex> <compact JSON>\n
+
+The first record names the file the journal belongs to and the state it
+started from. The first edit of a page records a snapshot of all its
+elements ("page"); later edits record single elements ("update",
+"delete"). Images are stored once per journal ("image") and referenced by
+content hash, as in the project container. A torn last line (crash while
+writing) is ignored.
+
+Records are queued by the UI thread and written by a background thread,
+which fsyncs once per batch, so journaling never waits on the disk.
+"""
+
+import base64
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from typing import Any, Dict, List
+
+from omar_container import image_member_name
+
+JOURNAL_SUFFIX = ".journal"
+
+# How long the writer collects records before writing and syncing a batch
+FLUSH_INTERVAL = 0.5
+
+_STOP = object()
+
+
+def journal_path(target_path: str) -> str:
+    """Sidecar journal file of a project or PDF."""
+    return target_path + JOURNAL_SUFFIX
+
+
+def base_token(target_path: str) -> List[int]:
+    """Identifies the saved state of a file; any save changes it."""
+    st = os.stat(target_path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    data = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return b"%08x " % zlib.crc32(data) + data + b"\n"
+
+
+def read_journal(path: str) -> List[Dict[str, Any]]:
+    """
+    Reads the intact records of a journal, stopping at the first damaged one.
+
+    Returns:
+        List of records (empty if the file is missing or unreadable)
+    """
+    records = []
+    try:
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n") or len(line) < 10:
+                    break
+                crc, data = line[:8], line[9:-1]
+                try:
+                    if int(crc, 16) != zlib.crc32(data):
+                        break
+                    records.append(json.loads(data.decode('utf-8')))
+                except ValueError:
+                    break
+    except OSError:
+        pass
+    return records
+
+
+def journal_matches(records: List[Dict[str, Any]], target_path: str) -> bool:
+    """True if a journal was started from the current saved state of target_path."""
+    if not records or records[0].get("op") != "begin":
+        return False
+    try:
+        return records[0].get("base") == base_token(target_path)
+    except OSError:
+        return False
+
+
+def replay_journal(records: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Rebuilds the element lists of the journaled pages.
+
+    Returns:
+        Dict mapping page_num to project-format element dicts (image data
+        as bytes), in the order they were recorded
+    """
+    pages = {}
+    images = {}
+    for record in records:
+        op = record.get("op")
+        if op == "image":
+            images[record["ref"]] = base64.b64decode(record["data"])
+        elif op == "page":
+            pages[record["page"]] = {el.get("id") or str(index): el
+                                     for index, el in enumerate(record["elements"])}
+        elif op == "update":
+            element = record["element"]
+            pages.setdefault(record["page"], {})[element["id"]] = element
+        elif op == "delete":
+            pages.get(record["page"], {}).pop(record["id"], None)
+
+    result = {}
+    for page_num, elements in pages.items():
+        for element in elements.values():
+            image_ref = element.get("image_ref")
+            if image_ref and "image_data" not in element and image_ref in images:
+                element["image_data"] = images[image_ref]
+        result[page_num] = list(elements.values())
+    return result
+
+
+class JournalWriter:
+    """
+    Appends records to a journal from a background thread.
+
+    append() only queues the record; the writer thread moves image data
+    out of the elements, encodes, writes and fsyncs in batches.
+    """
+    def __init__(self, path: str, header: Dict[str, Any], flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._file = open(path, 'wb')
+        self._queue = queue.Queue()
+        self._written_images = set()
+        self._thread = threading.Thread(target=self._run, name="omar-journal", daemon=True)
+        self._thread.start()
+        self.append({"op": "begin", **header})
+
+    def append(self, record: Dict[str, Any]):
+        """Queue a record. Never blocks; the record must not be mutated afterwards."""
+        self._queue.put(record)
+
+    def flush(self):
+        """Wait until every queued record is on disk."""
+        self._queue.join()
+
+    def close(self):
+        """Write what is queued and stop the writer thread."""
+        if self._file is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._file.close()
+        self._file = None
+
+    def discard(self):
+        """Stop and delete the journal (its content is now saved elsewhere)."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not _STOP:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            try:
+                chunks = []
+                for record in batch:
+                    if record is not _STOP:
+                        chunks.extend(self._encode(record))
+                self._file.write(b"".join(chunks))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except Exception as e:
+                print(f"Failed to write autosave journal: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if batch[-1] is _STOP:
+                return
+
+    def _encode(self, record: Dict[str, Any]) -> List[bytes]:
+        """Encodes a record, preceded by records for images not yet written."""
+        if record.get("op") == "page":
+            elements = record["elements"]
+        elif record.get("op") == "update":
+            elements = [record["element"]]
+        else:
+            return [encode_record(record)]
+
+        chunks = []
+        stripped = []
+        for element in elements:
+            image_data = element.get("image_data")
+            if image_data:
+                if isinstance(image_data, str):
+                    image_data = base64.b64decode(image_data)
+                    image_ref = image_member_name(image_data)
+                else:
+                    image_ref = element.get("image_ref") or image_member_name(image_data)
+                if image_ref not in self._written_images:
+                    chunks.append(encode_record({
+                        "op": "image", "ref": image_ref,
+                        "data": base64.b64encode(image_data).decode('ascii'),
+                    }))
+                    self._written_images.add(image_ref)
+                element = {key: value for key, value in element.items() if key != "image_data"}
+                element["image_ref"] = image_ref
+            stripped.append(element)
+
+        if record["op"] == "page":
+            record = {**record, "elements": stripped}
+        else:
+            record = {**record, "element": stripped[0]}
+        chunks.append(encode_record(record))
+        return chunks
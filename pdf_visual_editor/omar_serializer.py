@@ -0,0 +1,246 @@
+"""
+Serializers for the structured members of .omar project containers.
+
+Page entries can be stored as compact JSON or as MessagePack. MessagePack
+is smaller and, with the msgpack package installed, much faster to write
+and read than JSON. Without the package a pure-Python codec reads and
+writes the same bytes, so a project saved on one machine opens on any
+other; it is slower than the json module, so JSON stays the default there.
+
+The container records the codec of each member in its flags, so projects
+may mix entries written by different backends (e.g. after an incremental
+save with another backend).
+"""
+
+import json
+import struct
+from typing import Any, Dict
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    msgpack = None
+    HAS_MSGPACK = False
+
+
+class JSONSerializer:
+    """Compact UTF-8 JSON (no indentation, no ASCII escaping)."""
+    name = "json"
+
+    def dumps(self, data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data.decode('utf-8') if isinstance(data, (bytes, bytearray)) else data)
+
+
+class MsgpackSerializer:
+    """
+    MessagePack through the msgpack package, or the pure-Python codec below
+    when it is not installed (or pure=True).
+    """
+    name = "msgpack"
+
+    def __init__(self, pure: bool = False):
+        self.pure = pure or not HAS_MSGPACK
+
+    def dumps(self, data: Any) -> bytes:
+        if self.pure:
+            return pack(data)
+        return msgpack.packb(data, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        if self.pure:
+            return unpack(data)
+        # Maps keyed by page number are valid data, as for the pure codec
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+SERIALIZERS: Dict[str, Any] = {
+    "json": JSONSerializer(),
+    "msgpack": MsgpackSerializer(),
+}
+
+
+def get_serializer(name: str):
+    """
+    Looks up a serializer by name.
+
+    Raises:
+        ValueError: If there is no serializer with that name
+    """
+    try:
+        return SERIALIZERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown serializer: {name!r} (available: {', '.join(SERIALIZERS)})")
+
+
+def default_serializer():
+    """MessagePack when the msgpack package is available, JSON otherwise."""
+    return SERIALIZERS["msgpack" if HAS_MSGPACK else "json"]
+
+
+# ----------------------------------------------------------------------
+# Pure-Python MessagePack (the subset produced by project data:
+# nil, bool, int, float, str, bin, array, map)
+# ----------------------------------------------------------------------
+
+_FLOAT64 = struct.Struct(">Bd")
+# Smallest integer format first: (type byte, struct format, range)
+_INTS = (
+    (0xcc, ">BB", 0, 1 << 8), (0xcd, ">BH", 0, 1 << 16),
+    (0xce, ">BI", 0, 1 << 32), (0xcf, ">BQ", 0, 1 << 64),
+    (0xd0, ">Bb", -(1 << 7), 0), (0xd1, ">Bh", -(1 << 15), 0),
+    (0xd2, ">Bi", -(1 << 31), 0), (0xd3, ">Bq", -(1 << 63), 0),
+)
+
+
+def pack(data: Any) -> bytes:
+    """Encodes data as MessagePack (floats as float64, bytes as bin)."""
+    out = bytearray()
+    _pack_into(out, data)
+    return bytes(out)
+
+
+def _pack_length(out: bytearray, length: int, fix_base: int, fix_limit: int, codes):
+    """Writes a str/bin/array/map header; codes are the 8/16/32-bit type bytes."""
+    if fix_base is not None and length < fix_limit:
+        out.append(fix_base | length)
+    elif codes[0] is not None and length < 0x100:
+        out += struct.pack(">BB", codes[0], length)
+    elif length < 0x10000:
+        out += struct.pack(">BH", codes[1], length)
+    else:
+        out += struct.pack(">BI", codes[2], length)
+
+
+def _pack_into(out: bytearray, data: Any):
+    if data is None:
+        out.append(0xc0)
+    elif data is True:
+        out.append(0xc3)
+    elif data is False:
+        out.append(0xc2)
+    elif isinstance(data, int):
+        if 0 <= data < 0x80:
+            out.append(data)
+        elif -0x20 <= data < 0:
+            out.append(data & 0xff)
+        else:
+            for code, fmt, low, high in _INTS:
+                if low <= data < high:
+                    out += struct.pack(fmt, code, data)
+                    break
+            else:
+                raise OverflowError(f"Integer out of MessagePack range: {data}")
+    elif isinstance(data, float):
+        out += _FLOAT64.pack(0xcb, data)
+    elif isinstance(data, str):
+        encoded = data.encode('utf-8')
+        _pack_length(out, len(encoded), 0xa0, 32, (0xd9, 0xda, 0xdb))
+        out += encoded
+    elif isinstance(data, (bytes, bytearray, memoryview)):
+        _pack_length(out, len(data), None, 0, (0xc4, 0xc5, 0xc6))
+        out += data
+    elif isinstance(data, (list, tuple)):
+        _pack_length(out, len(data), 0x90, 16, (None, 0xdc, 0xdd))
+        for item in data:
+            _pack_into(out, item)
+    elif isinstance(data, dict):
+        _pack_length(out, len(data), 0x80, 16, (None, 0xde, 0xdf))
+        for key, value in data.items():
+            _pack_into(out, key)
+            _pack_into(out, value)
+    else:
+        raise TypeError(f"Cannot serialize {type(data).__name__} as MessagePack")
+
+
+# Fixed-size formats: type byte -> struct format of the value
+_SCALARS = {
+    0xca: ">f", 0xcb: ">d",
+    0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q",
+    0xd0: ">b", 0xd1: ">h", 0xd2: ">i", 0xd3: ">q",
+}
+# Length-prefixed formats: type byte -> (kind, struct format of the length)
+_SIZED = {
+    0xc4: ("bin", ">B"), 0xc5: ("bin", ">H"), 0xc6: ("bin", ">I"),
+    0xd9: ("str", ">B"), 0xda: ("str", ">H"), 0xdb: ("str", ">I"),
+    0xdc: ("array", ">H"), 0xdd: ("array", ">I"),
+    0xde: ("map", ">H"), 0xdf: ("map", ">I"),
+}
+
+
+def unpack(data: bytes) -> Any:
+    """
+    Decodes one MessagePack object.
+
+    Raises:
+        ValueError: If the data is truncated, has trailing bytes or uses an
+            unsupported type (extension types)
+    """
+    try:
+        value, pos = _unpack_from(data, 0)
+    except (IndexError, struct.error):
+        raise ValueError("Truncated MessagePack data")
+    if pos != len(data):
+        raise ValueError("Extra data after MessagePack object")
+    return value
+
+
+def _unpack_from(data: bytes, pos: int):
+    code = data[pos]
+    pos += 1
+    if code < 0x80:
+        return code, pos
+    if code >= 0xe0:
+        return code - 0x100, pos
+    if 0xa0 <= code <= 0xbf:
+        end = pos + (code & 0x1f)
+        if end > len(data):
+            raise IndexError
+        return data[pos:end].decode('utf-8'), end
+    if 0x90 <= code <= 0x9f:
+        return _unpack_array(data, pos, code & 0x0f)
+    if 0x80 <= code <= 0x8f:
+        return _unpack_map(data, pos, code & 0x0f)
+    if code == 0xc0:
+        return None, pos
+    if code == 0xc2:
+        return False, pos
+    if code == 0xc3:
+        return True, pos
+    if code in _SCALARS:
+        fmt = _SCALARS[code]
+        return struct.unpack_from(fmt, data, pos)[0], pos + struct.calcsize(fmt)
+    if code in _SIZED:
+        kind, fmt = _SIZED[code]
+        length = struct.unpack_from(fmt, data, pos)[0]
+        pos += struct.calcsize(fmt)
+        if kind == "array":
+            return _unpack_array(data, pos, length)
+        if kind == "map":
+            return _unpack_map(data, pos, length)
+        end = pos + length
+        if end > len(data):
+            raise IndexError
+        if kind == "str":
+            return data[pos:end].decode('utf-8'), end
+        return bytes(data[pos:end]), end
+    raise ValueError(f"Unsupported MessagePack type 0x{code:02x}")
+
+
+def _unpack_array(data: bytes, pos: int, length: int):
+    items = []
+    for _ in range(length):
+        item, pos = _unpack_from(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data: bytes, pos: int, length: int):
+    result = {}
+    for _ in range(length):
+        key, pos = _unpack_from(data, pos)
+        result[key], pos = _unpack_from(data, pos)
+    return result, pos
@@ -1,25 +1,66 @@
 import fitz  # PyMuPDF
 from qt_compat import QImage, QPixmap, QT_API
+from utils.pdf_source import open_fitz_document
+from utils.page_order import PageOrder
+
+def _owned(qimage: QImage) -> QImage:
+    """
+    Copy of a QImage made over a Python bytes buffer, so the image owns its
+    pixels once the buffer is gone (GameQt images already copy the data).
+    """
+    return qimage.copy() if hasattr(qimage, 'copy') else qimage
+
 
 class PDFLoader:
     """
     Handles loading of PDF files and rendering pages to images using PyMuPDF.
+
+    Pages are addressed by page id: `pages` (a PageOrder, see
+    utils/page_order.py) tells which page of which PDF an id is. Until
+    pages are inserted or duplicated the ids are the page numbers.
     """
-    def __init__(self, file_path: str):
+    def __init__(self, file_path, pages=None):
+        """file_path is a path or a binary file object (embedded PDF)."""
         self.file_path = file_path
-        self.doc = fitz.open(file_path)
+        self.doc = open_fitz_document(file_path)
+        self.pages = pages if pages is not None else PageOrder(len(self.doc))
+        # Documents by source number; PDFs pages were inserted from are
+        # opened when one of their pages is first needed
+        self._docs = {0: self.doc}
+        self._page_sizes = {}
 
     def get_page_count(self) -> int:
-        return len(self.doc)
+        return len(self.pages)
+
+    def source_page_count(self, source: int) -> int:
+        """Number of pages of a source PDF."""
+        return len(self._document(source))
+
+    def _document(self, source: int):
+        doc = self._docs.get(source)
+        if doc is None:
+            doc = self._docs[source] = fitz.open(self.pages.sources[source])
+        return doc
+
+    def _load_page(self, page_num: int):
+        """fitz page of a page id."""
+        ref = self.pages.resolve(page_num)
+        return self._document(ref.source).load_page(ref.index)
 
     def get_page_pixmap(self, page_num: int, scale: float = 1.0) -> QPixmap:
         """
         Renders a page to a QPixmap.
         """
-        if page_num < 0 or page_num >= len(self.doc):
-            raise ValueError(f"Page number {page_num} out of range.")
+        return QPixmap.fromImage(self.render_page_image(page_num, scale))
 
-        page = self.doc.load_page(page_num)
+    def render_page_image(self, page_num: int, scale: float = 1.0) -> QImage:
+        """
+        Renders a page to a QImage (usable off the UI thread, unlike QPixmap).
+        """
+        try:
+            page = self._load_page(page_num)
+        except (KeyError, ValueError, IndexError):
+            raise ValueError(f"Page number {page_num} out of range.")
         matrix = fitz.Matrix(scale, scale)
         pix = page.get_pixmap(matrix=matrix)
         
@@ -35,22 +76,40 @@ class PDFLoader:
         
         bytes_per_line = pix.width * 3  # RGB888 = 3 bytes per pixel
         qimage = QImage(img_data, pix.width, pix.height, bytes_per_line, img_format)
-        
-        # Convert to QPixmap
-        return QPixmap.fromImage(qimage)
+        return _owned(qimage)
 
     def get_page_size(self, page_num: int):
         """Returns (width, height) of the page."""
-        page = self.doc.load_page(page_num)
+        page = self._load_page(page_num)
         rect = page.rect
         return rect.width, rect.height
 
+    def get_page_sizes(self):
+        """
+        Returns the (width, height) of every page of the order, by page id.
+        The sizes of a source PDF are read once, all together.
+        """
+        sizes = {}
+        for ref in self.pages:
+            source_sizes = self._page_sizes.get(ref.source)
+            if source_sizes is None:
+                source_sizes = self._page_sizes[ref.source] = [
+                    (page.rect.width, page.rect.height) for page in self._document(ref.source)]
+            sizes[ref.id] = source_sizes[ref.index]
+        return sizes
+
     def get_image_from_rect(self, page_num: int, bbox: tuple, scale: float = 2.0) -> QPixmap:
         """
         Extracts an image from the specified bounding box on the page.
         bbox is (x0, y0, x1, y1) in PDF coordinates (bottom-left origin).
         """
-        page = self.doc.load_page(page_num)
+        return QPixmap.fromImage(self.extract_image(page_num, bbox, scale))
+
+    def extract_image(self, page_num: int, bbox: tuple, scale: float = 2.0) -> QImage:
+        """
+        get_image_from_rect() as a QImage (usable off the UI thread).
+        """
+        page = self._load_page(page_num)
         # PyMuPDF uses top-left origin for rects usually, but let's check.
         # Actually fitz.Rect is (x0, y0, x1, y1).
         # If the bbox comes from pdfminer, it's bottom-left origin.
@@ -100,9 +159,11 @@ class PDFLoader:
         
         bytes_per_line = pix.width * (4 if pix.alpha else 3)  # RGBA = 4, RGB = 3 bytes per pixel
         qimage = QImage(img_data, pix.width, pix.height, bytes_per_line, img_format)
-        
-        return QPixmap.fromImage(qimage)
+        return _owned(qimage)
 
     def close(self):
-        if self.doc:
-            self.doc.close()
+        if self.doc is not None:
+            for doc in self._docs.values():
+                doc.close()
+            self._docs = {}
+            self.doc = None
@@ -63,6 +63,8 @@ hiddenimports = [
     # Image library
     'PIL',
     'PIL.Image',
+    # Optional .omar page codec
+    'msgpack',
     # Backports for Python < 3.8
     'importlib_metadata',
     'zipp',
@@ -71,7 +71,7 @@ try:
     )
     from PyQt6.QtCore import (
         Qt, QSettings, QPointF, QRectF, QSize, QBuffer, QIODevice,
-        QMimeData, QModelIndex, pyqtSignal as Signal
+        QMimeData, QModelIndex, QTimer, pyqtSignal as Signal
     )
     from PyQt6.QtGui import (
         QPixmap, QImage, QTransform, QPainter, QPen, QColor, QBrush,
@@ -97,7 +97,7 @@ except ImportError:
         )
         from PySide6.QtCore import (
             Qt, QSettings, QPointF, QRectF, QSize, QBuffer, QIODevice,
-            QMimeData, QModelIndex, Signal
+            QMimeData, QModelIndex, QTimer, Signal
         )
         from PySide6.QtGui import (
             QPixmap, QImage, QTransform, QPainter, QPen, QColor, QBrush,
@@ -123,7 +123,7 @@ except ImportError:
             )
             from PySide2.QtCore import (
                 Qt, QSettings, QPointF, QRectF, QSize, QBuffer, QIODevice,
-                QMimeData, QModelIndex, Signal
+                QMimeData, QModelIndex, QTimer, Signal
             )
             from PySide2.QtGui import (
                 QPixmap, QImage, QTransform, QPainter, QPen, QColor, QBrush,
@@ -150,7 +150,7 @@ except ImportError:
                 )
                 from PyQt5.QtCore import (
                     Qt, QSettings, QPointF, QRectF, QSize, QBuffer, QIODevice,
-                    QMimeData, QModelIndex, pyqtSignal as Signal
+                    QMimeData, QModelIndex, QTimer, pyqtSignal as Signal
                 )
                 from PyQt5.QtGui import (
                     QPixmap, QImage, QTransform, QPainter, QPen, QColor, QBrush,
@@ -191,6 +191,8 @@ except ImportError:
                             QPen, QColor, QBrush, QMouseEvent, QKeySequence, QDrag, QIcon, QFont,
                             QUndoCommand, QUndoStack, QAction, QPrinter
                         )
+                    # GameQt has no timers; background tasks finish synchronously
+                    QTimer = None
                     QT_API = "GameQt"
                     print(f"[Qt Compat] Using {QT_API} (Pygame Fallback)")
                 except ImportError:
@@ -217,7 +219,7 @@ __all__ = [
     'QScrollArea',
     # QtCore
     'Qt', 'QSettings', 'QPointF', 'QRectF', 'QSize', 'QBuffer', 'QIODevice',
-    'QMimeData', 'QModelIndex', 'Signal',
+    'QMimeData', 'QModelIndex', 'QTimer', 'Signal',
     # QtGui
     'QPixmap', 'QImage', 'QTransform', 'QPainter', 'QPen', 'QColor', 'QBrush',
     'QMouseEvent', 'QKeySequence', 'QDrag', 'QIcon', 'QFont', 'QUndoCommand',
@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import base64
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from export.project_elements import project_element_to_export, project_pages_data
+from batch_export import find_projects, resolve_source_pdf
+
+class TestProjectElements(unittest.TestCase):
+    def test_image_uses_transformed_bounds(self):
+        element = {
+            "type": "image", "x": 10, "y": 20,
+            "transform_matrix": [2, 0, 0, 3, 5, 0],
+            "image_data": base64.b64encode(b"png").decode("ascii"),
+            "width": 50, "height": 10, "visible": True,
+        }
+        converted = project_element_to_export(element)
+        self.assertEqual(converted["image_data"], b"png")
+        self.assertEqual((converted["x"], converted["y"]), (15, 20))
+        self.assertEqual((converted["w"], converted["h"]), (100, 30))
+
+    def test_text_font_size_follows_scale(self):
+        element = {"type": "text", "text": "Hi", "x": 1, "y": 2, "font_size": 10,
+                   "transform_matrix": [1.5, 0, 0, 1.5, 0, 0]}
+        converted = project_element_to_export(element)
+        self.assertEqual(converted["font_size"], 15)
+        self.assertEqual((converted["x"], converted["y"]), (1, 2))
+
+    def test_hidden_shapes_and_export_dicts(self):
+        hidden = {"type": "text", "text": "x", "transform_matrix": [1, 0, 0, 1, 0, 0],
+                  "visible": False}
+        shape = {"type": "shape", "transform_matrix": [1, 0, 0, 1, 0, 0]}
+        already_exported = {"type": "text", "text": "x", "x": 0, "y": 0}
+        self.assertIsNone(project_element_to_export(hidden))
+        self.assertIsNone(project_element_to_export(shape))
+        self.assertIs(project_element_to_export(already_exported), already_exported)
+
+    def test_pages_data_skips_empty_pages_and_sorts_by_z(self):
+        project = {"pages": [
+            {"page_num": 0, "elements": []},
+            {"page_num": 1, "elements": [
+                {"type": "text", "text": "top", "z_value": 5, "transform_matrix": [1, 0, 0, 1, 0, 0]},
+                {"type": "text", "text": "bottom", "z_value": 1, "transform_matrix": [1, 0, 0, 1, 0, 0]},
+            ]},
+        ]}
+        pages_data = project_pages_data(project)
+        self.assertEqual(list(pages_data), [1])
+        self.assertEqual([el["text"] for el in pages_data[1]], ["bottom", "top"])
+
+class TestBatchExport(unittest.TestCase):
+    def test_find_projects_and_resolve_source(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("b.omar", "a.omar", "notes.txt", "doc.pdf"):
+                open(os.path.join(tmp, name), "w").close()
+            self.assertEqual(find_projects([tmp]),
+                             [os.path.join(tmp, "a.omar"), os.path.join(tmp, "b.omar")])
+
+            # A moved project finds its PDF next to it
+            project = {"source_pdf": {"path": "/elsewhere/doc.pdf", "embedded": False}}
+            self.assertEqual(resolve_source_pdf(project, os.path.join(tmp, "a.omar")),
+                             os.path.join(tmp, "doc.pdf"))
+
+            missing = {"source_pdf": {"path": "/elsewhere/gone.pdf", "embedded": False}}
+            with self.assertRaises(FileNotFoundError):
+                resolve_source_pdf(missing, os.path.join(tmp, "a.omar"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.bitmap_lod import BitmapLodCache, device_scale
+
+class TestBitmapLodCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = BitmapLodCache(step=2.0, max_pixels=10000)
+
+    def test_scale_rounds_up_to_a_level(self):
+        self.assertEqual(self.cache.scale_for(1.0, 10, 10), 1.0)
+        self.assertEqual(self.cache.scale_for(1.2, 10, 10), 2.0)
+        self.assertEqual(self.cache.scale_for(1.9, 10, 10), 2.0)
+        self.assertEqual(self.cache.scale_for(0.3, 10, 10), 0.5)
+
+    def test_live_painting_for_large_or_empty_bitmaps(self):
+        self.assertIsNone(self.cache.scale_for(4.0, 100, 100))
+        self.assertIsNone(self.cache.scale_for(1.0, 0, 10))
+        self.assertIsNone(self.cache.scale_for(0.0, 10, 10))
+
+    def test_bitmap_reused_until_level_or_key_change(self):
+        self.cache.put("bitmap", 2.0, key=False, nbytes=400)
+        self.assertEqual(self.cache.get(self.cache.scale_for(1.5, 10, 10), False), "bitmap")
+        self.assertIsNone(self.cache.get(self.cache.scale_for(2.5, 10, 10), False))
+        self.assertIsNone(self.cache.get(2.0, True))
+
+    def test_invalidate(self):
+        self.cache.put("bitmap", 1.0, nbytes=400)
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.get(1.0))
+        self.assertEqual(self.cache.nbytes, 0)
+
+class TestDeviceScale(unittest.TestCase):
+    def test_largest_axis_scale(self):
+        self.assertEqual(device_scale(2, 0, 0, 3), 3)
+        # 90 degree rotation keeps the scale
+        self.assertAlmostEqual(device_scale(0, 1.5, -1.5, 0), 1.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from element_model import Element, PageModel
+from export.project_elements import project_elements_to_export
+
+TEXT = {
+    "id": "t1", "x": 10.0, "y": 20.0, "transform_matrix": [2, 0, 0, 2, 0, 0],
+    "opacity": 0.5, "visible": True, "z_value": 3.0, "type": "text",
+    "text": "Hello", "font_family": "Courier", "font_size": 9,
+    "font_bold": True, "font_italic": False,
+}
+IMAGE = {
+    "id": "i1", "x": 5.0, "y": 6.0, "transform_matrix": [1, 0, 0, 1, 0, 0],
+    "opacity": 1.0, "visible": True, "z_value": 1.0, "type": "image",
+    "image_data": b"\x89PNG-data", "image_ref": "images/abc.png",
+    "width": 40, "height": 30,
+}
+
+class TestElementModel(unittest.TestCase):
+    def test_round_trip_keeps_style_transform_and_order(self):
+        for data in (TEXT, IMAGE):
+            self.assertEqual(Element.from_dict(data).to_dict(), data)
+
+    def test_upsert_replaces_in_place_and_remove(self):
+        model = PageModel.from_dicts(0, [TEXT, IMAGE])
+        version = model.version
+        model.upsert({**TEXT, "text": "Changed"})
+        self.assertEqual([el.id for el in model], ["t1", "i1"])
+        self.assertEqual(model.get("t1").text, "Changed")
+        self.assertGreater(model.version, version)
+
+        self.assertTrue(model.remove("i1"))
+        self.assertFalse(model.remove("i1"))
+        self.assertEqual(len(model), 1)
+
+    def test_snapshot_is_not_changed_by_later_edits(self):
+        model = PageModel.from_dicts(0, [TEXT])
+        snapshot = model.to_dicts()
+        model.upsert({**TEXT, "x": 99.0})
+        model.replace([])
+        self.assertEqual(snapshot, [TEXT])
+
+    def test_elements_without_id_get_one(self):
+        element = Element.from_dict({"type": "shape", "x": 1, "y": 2})
+        self.assertTrue(element.id)
+        self.assertEqual(element.to_dict()["width"], 100)
+
+    def test_exports_without_qt(self):
+        model = PageModel.from_dicts(0, [TEXT, IMAGE])
+        image, text = project_elements_to_export(model.to_dicts())
+        self.assertEqual(image["image_data"], b"\x89PNG-data")
+        self.assertEqual((image["x"], image["y"], image["w"], image["h"]), (5.0, 6.0, 40.0, 30.0))
+        self.assertEqual(text["font_size"], 18.0)
+        self.assertEqual(text["font_family"], "Courier")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from export.profiles import PROFILES, ExportProfile, ExportReport, get_profile, downsample_size
+
+class TestExportProfiles(unittest.TestCase):
+    def test_named_profiles(self):
+        self.assertEqual(set(PROFILES), {"print", "screen", "archive"})
+        self.assertTrue(get_profile("screen").linearize)
+        # Archive never touches images and avoids object streams
+        self.assertIsNone(get_profile("archive").image_dpi)
+        self.assertFalse(get_profile("archive").object_streams)
+
+    def test_get_profile_passthrough_and_errors(self):
+        custom = ExportProfile("custom", image_dpi=72)
+        self.assertIs(get_profile(custom), custom)
+        self.assertIsNone(get_profile(None))
+        with self.assertRaises(ValueError):
+            get_profile("poster")
+
+    def test_downsample_size(self):
+        # 3000 px over 5 inches (360 pt) is 600 DPI -> 150 DPI is a quarter
+        self.assertEqual(downsample_size((3000, 1500), (360, 180), 150), (750, 375))
+        # Within the tolerance of the target: kept
+        self.assertIsNone(downsample_size((900, 900), (360, 360), 150))
+        # Not drawn at all
+        self.assertIsNone(downsample_size((900, 900), (0, 0), 150))
+
+class TestExportReport(unittest.TestCase):
+    def test_sizes_and_summary(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "in.pdf")
+            output = os.path.join(tmp, "out.pdf")
+            with open(source, "wb") as f:
+                f.write(b"x" * 1000)
+            report = ExportReport(PROFILES["screen"], source, output)
+            with open(output, "wb") as f:
+                f.write(b"x" * 400)
+            report.images_examined = 2
+            report.images_downsampled = 1
+            report.image_bytes_before = 500
+            report.image_bytes_after = 100
+            report.finish()
+
+        self.assertEqual(report.bytes_saved, 600)
+        data = report.to_dict()
+        self.assertEqual(data["profile"], "screen")
+        self.assertEqual(data["image_bytes_saved"], 400)
+        self.assertIn("total", data["timings"])
+        self.assertIn("60.0% saved", report.summary())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from export import font_manager
+from export.font_manager import (standard_font_name, font_key, is_winansi, subset_font,
+                                 subset_font_program, PikeFontManager)
+
+class TestFontManager(unittest.TestCase):
+    def test_standard_font_name(self):
+        self.assertEqual(standard_font_name("Arial"), "Helvetica")
+        self.assertEqual(standard_font_name("Arial", bold=True), "Helvetica-Bold")
+        self.assertEqual(standard_font_name("Times New Roman", italic=True), "Times-Italic")
+        self.assertEqual(standard_font_name("DejaVu Sans Mono", True, True), "Courier-BoldOblique")
+        self.assertEqual(standard_font_name("DejaVu Sans"), "Helvetica")
+        self.assertEqual(standard_font_name(None), "Helvetica")
+
+    def test_font_key_defaults(self):
+        self.assertEqual(font_key({'type': 'text'}), ("Helvetica", False, False))
+        self.assertEqual(font_key({'font_family': "Courier", 'font_bold': True}),
+                         ("Courier", True, False))
+
+    def test_is_winansi(self):
+        self.assertTrue(is_winansi("Café — 10 €"))
+        self.assertFalse(is_winansi("Привет"))
+        self.assertFalse(is_winansi("日本語"))
+
+    def test_subset_results_are_cached(self):
+        font_manager._subset_cache.clear()
+        first = subset_font("not-a-font", b"garbage", {3, 1, 2})
+        # Same font and glyph set in any order reuses the cached program
+        self.assertIs(subset_font("not-a-font", b"other", [2, 3, 1]), first)
+        self.assertEqual(len(font_manager._subset_cache), 1)
+
+    def test_subset_cache_is_bounded(self):
+        font_manager._subset_cache.clear()
+        for gid in range(font_manager.SUBSET_CACHE_SIZE + 5):
+            subset_font("not-a-font", b"garbage", {gid})
+        self.assertEqual(len(font_manager._subset_cache), font_manager.SUBSET_CACHE_SIZE)
+        # The oldest glyph sets were dropped
+        self.assertNotIn(("not-a-font", frozenset({0})), font_manager._subset_cache)
+
+    def test_full_fonts_are_not_tagged_as_subsets(self):
+        font_manager._subset_cache.clear()
+        program, subset = subset_font_program("not-a-font", b"garbage", {1})
+        # Not a TrueType program (or no fontTools): embedded in full
+        self.assertEqual(program, b"garbage")
+        self.assertFalse(subset)
+
+        class FakeFont:
+            name = "Noto Sans"
+        self.assertEqual(PikeFontManager._base_font_name(FakeFont, False), "NotoSans")
+        self.assertEqual(PikeFontManager._base_font_name(FakeFont, True), "PVEAAA+NotoSans")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,389 @@
+import unittest
+import sys
+import os
+import json
+import base64
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from omar_format import OmarFormat
+import omar_container
+from omar_container import (ContainerReader, ContainerWriter, ProjectReader,
+                            LegacyProjectReader, is_container, compact_container,
+                            SOURCE_PDF_MEMBER)
+from utils.pdf_source import read_pdf_bytes, source_size, pdf_fingerprint
+
+def make_project():
+    project = OmarFormat.create_empty_project("/tmp/source.pdf")
+    project["pages"] = [
+        {"page_num": 0, "background_opacity": 0.3, "elements": [
+            {"type": "text", "text": "Hello", "x": 1, "y": 2,
+             "transform_matrix": [1, 0, 0, 1, 0, 0]},
+            {"type": "image", "image_data": base64.b64encode(b"\x89PNG-data").decode("ascii"),
+             "x": 0, "y": 0, "width": 4, "height": 4, "transform_matrix": [1, 0, 0, 1, 0, 0]},
+        ]},
+        {"page_num": 1, "background_opacity": 0.5, "elements": []},
+    ]
+    project["page_order"] = [1, 0]
+    return project
+
+class TestOmarContainer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "project.omar")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_reads_pages_on_demand(self):
+        OmarFormat.save_project(self.path, make_project())
+        self.assertTrue(is_container(self.path))
+
+        reader = OmarFormat.open_project(self.path)
+        self.assertIsInstance(reader, ProjectReader)
+        self.assertEqual(reader.page_order, [1, 0])
+        self.assertEqual(reader.page_info(0)["element_count"], 2)
+        self.assertEqual(reader.page_info(0)["background_opacity"], 0.3)
+
+        elements = reader.page_elements(0)
+        self.assertEqual(elements[0]["text"], "Hello")
+        # Images are binary members, handed out as bytes
+        self.assertEqual(elements[1]["image_data"], b"\x89PNG-data")
+        self.assertEqual(reader.page_elements(7), [])
+        reader.close()
+
+        project = OmarFormat.load_project(self.path)
+        self.assertEqual(project["version"], OmarFormat.VERSION)
+        self.assertEqual(len(project["pages"]), 2)
+
+    def test_identical_images_are_stored_once(self):
+        project = make_project()
+        image = dict(project["pages"][0]["elements"][1])
+        project["pages"][1]["elements"] = [image, dict(image, image_data=b"\x89PNG-data")]
+        OmarFormat.save_project(self.path, project)
+
+        reader = OmarFormat.open_project(self.path)
+        image_members = [name for name in reader.container.names() if name.startswith("images/")]
+        self.assertEqual(len(image_members), 1)
+        first, second = reader.page_elements(1)
+        self.assertEqual(first["image_ref"], image_members[0])
+        self.assertIs(first["image_data"], second["image_data"])
+        reader.close()
+
+    def test_image_ref_given_with_bytes_is_not_hashed_again(self):
+        # Items hand out their cached encoding with its hash
+        project = make_project()
+        project["pages"][1]["elements"] = [{
+            "type": "image", "image_data": b"\x89PNG-cached", "image_ref": "images/cached",
+            "x": 0, "y": 0, "transform_matrix": [1, 0, 0, 1, 0, 0]}]
+        OmarFormat.save_project(self.path, project)
+
+        reader = OmarFormat.open_project(self.path)
+        self.assertIn("images/cached", reader.container.names())
+        self.assertEqual(reader.page_elements(1)[0]["image_data"], b"\x89PNG-cached")
+        reader.close()
+
+    def test_update_rewrites_only_changed_pages(self):
+        OmarFormat.save_project(self.path, make_project())
+        size = os.path.getsize(self.path)
+
+        changed = {"page_num": 1, "background_opacity": 0.5, "elements": [
+            {"type": "text", "text": "New", "x": 0, "y": 0, "transform_matrix": [1, 0, 0, 1, 0, 0]},
+        ]}
+        meta = {"source_pdf": {"path": "/tmp/source.pdf"}, "settings": {}, "page_order": [0, 1]}
+        OmarFormat.update_project(self.path, meta, [changed])
+        self.assertGreater(os.path.getsize(self.path), size)
+
+        reader = OmarFormat.open_project(self.path)
+        self.assertEqual(reader.page_order, [0, 1])
+        self.assertEqual(reader.page_elements(1)[0]["text"], "New")
+        # Untouched page keeps its entry and image
+        self.assertEqual(reader.page_elements(0)[1]["image_data"], b"\x89PNG-data")
+        reader.close()
+
+    def test_update_drops_unreferenced_images_and_compacts(self):
+        OmarFormat.save_project(self.path, make_project())
+        meta = {"source_pdf": {"path": "/tmp/source.pdf"}, "settings": {}, "page_order": []}
+        OmarFormat.update_project(self.path, meta, [{"page_num": 0, "elements": []}])
+
+        reader = ContainerReader(self.path)
+        self.assertFalse(any(name.startswith("images/") for name in reader.names()))
+        reader.close()
+
+        size = os.path.getsize(self.path)
+        compact_container(self.path)
+        self.assertLess(os.path.getsize(self.path), size)
+        reader = OmarFormat.open_project(self.path)
+        self.assertEqual(reader.page_info(0)["element_count"], 0)
+        self.assertEqual(reader.page_info(1)["element_count"], 0)
+        reader.close()
+
+    def test_update_drops_deleted_pages(self):
+        OmarFormat.save_project(self.path, make_project())
+        # Page 0 (with the image) was deleted from the document
+        meta = {"source_pdf": {"path": "/tmp/source.pdf"}, "settings": {}, "page_order": [1]}
+        OmarFormat.update_project(self.path, meta, [], compact=False)
+
+        reader = OmarFormat.open_project(self.path)
+        self.assertEqual(reader.page_nums(), [1])
+        self.assertFalse(any(name.startswith("images/") for name in reader.container.names()))
+        reader.close()
+
+    def test_update_appends_while_the_project_is_read(self):
+        # A background save appends while the editor still reads the file
+        project = make_project()
+        project["pages"][0]["elements"][1]["image_data"] = os.urandom(3 * 1024 * 1024)
+        OmarFormat.save_project(self.path, project)
+        open_reader = OmarFormat.open_project(self.path)
+
+        meta = {"source_pdf": {"path": "/tmp/source.pdf"}, "settings": {}, "page_order": []}
+        OmarFormat.update_project(self.path, meta, [{"page_num": 0, "elements": []}],
+                                  compact=False)
+        self.assertEqual(len(open_reader.page_elements(0)), 2)
+        open_reader.close()
+
+        size = os.path.getsize(self.path)
+        self.assertTrue(OmarFormat.compact_project(self.path))
+        self.assertLess(os.path.getsize(self.path), size)
+        self.assertFalse(OmarFormat.compact_project(self.path))
+        reader = OmarFormat.open_project(self.path)
+        self.assertEqual(reader.page_info(0)["element_count"], 0)
+        reader.close()
+
+    def test_v1_json_still_loads(self):
+        project = make_project()
+        project["version"] = "1.0"
+        project["app"] = "PDF Visual Editor"
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(project, f, indent=2)
+
+        reader = OmarFormat.open_project(self.path)
+        self.assertIsInstance(reader, LegacyProjectReader)
+        self.assertEqual(reader.page_info(0)["element_count"], 2)
+        self.assertEqual(reader.page_info(0)["background_opacity"], 0.3)
+        self.assertEqual(reader.page_elements(0)[1]["image_data"], b"\x89PNG-data")
+        reader.close()
+        self.assertEqual(OmarFormat.load_project(self.path)["page_order"], [1, 0])
+
+    def test_v1_index_handles_compact_json_and_escapes(self):
+        project = make_project()
+        project["version"] = "1.0"
+        project["app"] = "PDF Visual Editor"
+        tricky = 'quote " brace } bracket ] comma , backslash \\'
+        project["pages"][1]["elements"] = [
+            {"type": "text", "text": tricky, "transform_matrix": [1, 0, 0, 1, 0, 0]},
+            {"type": "text", "text": "\u00e9\\", "transform_matrix": [1, 0, 0, 1, 0, 0]},
+        ]
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(project, f, separators=(",", ":"))
+
+        reader = OmarFormat.open_project(self.path)
+        self.assertEqual(reader.page_nums(), [0, 1])
+        self.assertEqual(reader.page_info(1)["element_count"], 2)
+        self.assertEqual(reader.page_elements(1)[0]["text"], tricky)
+        self.assertEqual(reader.settings, project["settings"])
+        # The whole-project view keeps the v1 layout
+        self.assertEqual(reader.to_dict()["pages"], project["pages"])
+        reader.close()
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(project)[:-40])
+        with self.assertRaises(ValueError):
+            OmarFormat.open_project(self.path)
+
+    def test_invalid_files_are_rejected(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"pages": []}, f)
+        with self.assertRaises(ValueError):
+            OmarFormat.open_project(self.path)
+
+    def test_embedded_pdf_is_a_raw_member(self):
+        pdf_bytes = b"%PDF-1.7\n" + bytes(range(256)) * 4096 + b"\n%%EOF\n"
+        pdf_path = os.path.join(self.tmp.name, "source.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(pdf_bytes)
+        project = make_project()
+        OmarFormat.embed_pdf(project, pdf_path)
+        OmarFormat.save_project(self.path, project)
+        # Stored as is: the file grows by the PDF size, not by base64's third
+        self.assertLess(os.path.getsize(self.path), len(pdf_bytes) + 4096)
+
+        reader = OmarFormat.open_project(self.path)
+        self.assertNotIn("data", reader.source_pdf)
+        with reader.open_embedded_pdf() as stream:
+            self.assertEqual(source_size(stream), len(pdf_bytes))
+            stream.seek(-6, os.SEEK_END)
+            self.assertEqual(stream.read(), b"%%EOF\n")
+            self.assertEqual(read_pdf_bytes(stream), pdf_bytes)
+        reader.close()
+
+        # Incremental saves keep the member; a full save elsewhere copies
+        # it from the old project even when the original PDF is gone
+        os.remove(pdf_path)
+        meta = {"source_pdf": {"path": pdf_path, "embedded": True}, "settings": {},
+                "page_order": []}
+        OmarFormat.update_project(self.path, meta, [{"page_num": 0, "elements": []}])
+        copy_path = os.path.join(self.tmp.name, "copy.omar")
+        project["source_pdf"]["container"] = self.path
+        OmarFormat.save_project(copy_path, project)
+        for path in (self.path, copy_path):
+            reader = OmarFormat.open_project(path)
+            with reader.open_embedded_pdf() as stream:
+                self.assertEqual(stream.read(), pdf_bytes)
+            reader.close()
+
+        # Linking the PDF again drops the member
+        meta["source_pdf"]["embedded"] = False
+        OmarFormat.update_project(self.path, meta, [])
+        reader = OmarFormat.open_project(self.path)
+        self.assertIsNone(reader.open_embedded_pdf())
+        self.assertFalse(reader.container.has(SOURCE_PDF_MEMBER))
+        reader.close()
+
+    def test_v1_embedded_pdf_is_converted(self):
+        project = make_project()
+        project["version"] = "1.0"
+        project["app"] = "PDF Visual Editor"
+        project["source_pdf"] = {"path": "/gone/source.pdf", "embedded": True,
+                                 "data": base64.b64encode(b"%PDF-v1").decode("ascii")}
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(project, f)
+
+        reader = OmarFormat.open_project(self.path)
+        self.assertEqual(reader.open_embedded_pdf().read(), b"%PDF-v1")
+        # The base64 text is only decoded when the PDF is opened
+        self.assertNotIn("data", reader.source_pdf)
+        self.assertEqual(reader.to_dict()["source_pdf"], project["source_pdf"])
+        reader.close()
+
+        # Re-saving as v2 takes the PDF from the v1 file being replaced
+        meta = {"source_pdf": {"path": "/gone/source.pdf", "embedded": True,
+                               "container": self.path}, "settings": {}, "page_order": []}
+        OmarFormat.save_project(self.path, dict(meta, pages=[]))
+        reader = OmarFormat.open_project(self.path)
+        self.assertEqual(reader.open_embedded_pdf().read(), b"%PDF-v1")
+        self.assertNotIn("container", reader.source_pdf)
+        reader.close()
+
+        # Other JSON writers may escape the slashes of base64
+        pdf_bytes = b"%PDF-\xff\xfe\xff"
+        project["source_pdf"]["data"] = base64.b64encode(pdf_bytes).decode("ascii")
+        self.assertIn("/", project["source_pdf"]["data"])
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(project).replace("/", "\\/"))
+        reader = OmarFormat.open_project(self.path)
+        self.assertEqual(reader.open_embedded_pdf().read(), pdf_bytes)
+        reader.close()
+
+    def test_previews_are_validated_by_fingerprint(self):
+        project = make_project()
+        project["cache"] = {"fingerprint": "pdf-a", "thumbnails": {0: b"thumb0", 1: b"thumb1"},
+                            "backgrounds": {0: b"background"},
+                            "analysis": {0: [{"type": "text", "bbox": [0, 0, 10, 10]}]}}
+        OmarFormat.save_project(self.path, project)
+
+        reader = OmarFormat.open_project(self.path)
+        self.assertTrue(reader.cache_matches("pdf-a"))
+        self.assertFalse(reader.cache_matches("pdf-b"))
+        self.assertEqual(reader.cached_preview("thumbnails", 1), b"thumb1")
+        self.assertEqual(reader.cached_preview("analysis", 0)[0]["bbox"], [0, 0, 10, 10])
+        self.assertIsNone(reader.cached_preview("backgrounds", 1))
+        reader.close()
+
+        # New entries are added, stored ones kept, also across full rewrites
+        meta = {"source_pdf": {}, "settings": {}, "page_order": [],
+                "cache": {"fingerprint": "pdf-a", "analysis": {1: []}}}
+        OmarFormat.update_project(self.path, meta, [])
+        copy_path = os.path.join(self.tmp.name, "copy.omar")
+        OmarFormat.save_project(copy_path, dict(meta, pages=[],
+                                                cache=dict(meta["cache"], container=self.path)))
+        for path in (self.path, copy_path):
+            reader = OmarFormat.open_project(path)
+            self.assertEqual(reader.cached_preview("thumbnails", 0), b"thumb0")
+            self.assertEqual(reader.cached_preview("analysis", 1), [])
+            reader.close()
+
+        # Previews of another PDF replace the old ones; None drops them
+        meta["cache"] = {"fingerprint": "pdf-b", "thumbnails": {0: b"new"}}
+        OmarFormat.update_project(self.path, meta, [])
+        reader = OmarFormat.open_project(self.path)
+        self.assertTrue(reader.cache_matches("pdf-b"))
+        self.assertFalse(reader.has_cached_preview("thumbnails", 1))
+        self.assertFalse(reader.container.has("cache/thumbnails/00001"))
+        reader.close()
+
+        meta["cache"] = None
+        OmarFormat.update_project(self.path, meta, [])
+        reader = OmarFormat.open_project(self.path)
+        self.assertFalse(reader.cache_matches("pdf-b"))
+        self.assertFalse(any(name.startswith("cache/") for name in reader.container.names()))
+        reader.close()
+
+    def test_pdf_fingerprint(self):
+        pdf_path = os.path.join(self.tmp.name, "source.pdf")
+        data = b"%PDF-1.4\n" + os.urandom(300000)
+        with open(pdf_path, "wb") as f:
+            f.write(data)
+        fingerprint = pdf_fingerprint(pdf_path)
+        with open(pdf_path, "rb") as f:
+            f.seek(5)
+            self.assertEqual(pdf_fingerprint(f), fingerprint)
+            self.assertEqual(f.tell(), 5)
+
+        # An incremental update changes the end of the file
+        with open(pdf_path, "ab") as f:
+            f.write(b"trailer")
+        self.assertNotEqual(pdf_fingerprint(pdf_path), fingerprint)
+
+    def test_torn_append_falls_back_to_previous_manifest(self):
+        writer = ContainerWriter(self.path)
+        writer.add("a", b"first")
+        writer.commit({"generation": 1})
+
+        writer = ContainerWriter(self.path, append=True)
+        writer.add("a", b"second", compress=True)
+        writer.commit({"generation": 2})
+
+        reader = ContainerReader(self.path)
+        self.assertEqual(reader.manifest["generation"], 2)
+        self.assertEqual(reader.read("a"), b"second")
+        reader.close()
+
+        # Simulate a crash in the middle of a third save
+        with open(self.path, "ab") as f:
+            f.write(b"half-written member")
+        reader = ContainerReader(self.path)
+        self.assertEqual(reader.manifest["generation"], 2)
+        reader.close()
+
+    def test_torn_append_after_large_member_is_recovered(self):
+        writer = ContainerWriter(self.path)
+        writer.add("a", b"first")
+        writer.commit({"generation": 1})
+
+        # A member spanning several scan chunks, then a crash before the
+        # new trailer (e.g. while embedding the source PDF)
+        chunk = omar_container._TRAILER_SCAN_CHUNK
+        omar_container._TRAILER_SCAN_CHUNK = 64
+        try:
+            with open(self.path, "ab") as f:
+                f.write(os.urandom(1000))
+            reader = ContainerReader(self.path)
+            self.assertEqual(reader.manifest["generation"], 1)
+            self.assertEqual(reader.read("a"), b"first")
+            reader.close()
+        finally:
+            omar_container._TRAILER_SCAN_CHUNK = chunk
+
+    def test_aborted_append_leaves_file_unchanged(self):
+        writer = ContainerWriter(self.path)
+        writer.add("a", b"data")
+        writer.commit({})
+        size = os.path.getsize(self.path)
+
+        writer = ContainerWriter(self.path, append=True)
+        writer.add("b", b"more data")
+        writer.abort()
+        self.assertEqual(os.path.getsize(self.path), size)
+
+if __name__ == '__main__':
+    unittest.main()
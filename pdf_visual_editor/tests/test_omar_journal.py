@@ -0,0 +1,82 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from omar_journal import (JournalWriter, journal_path, base_token, read_journal,
+                          journal_matches, replay_journal)
+
+def text(element_id, value):
+    return {"id": element_id, "type": "text", "text": value,
+            "transform_matrix": [1, 0, 0, 1, 0, 0]}
+
+class TestOmarJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.target = os.path.join(self.tmp.name, "project.omar")
+        with open(self.target, "wb") as f:
+            f.write(b"saved project")
+        self.path = journal_path(self.target)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def start(self):
+        return JournalWriter(self.path, {"target": self.target, "base": base_token(self.target)},
+                             flush_interval=0)
+
+    def test_replay_applies_records_in_order(self):
+        image = {"id": "img", "type": "image", "image_data": b"\x89PNG",
+                 "transform_matrix": [1, 0, 0, 1, 0, 0]}
+        journal = self.start()
+        journal.append({"op": "page", "page": 0, "elements": [text("a", "one"), image]})
+        journal.append({"op": "update", "page": 0, "element": text("a", "two")})
+        journal.append({"op": "update", "page": 0, "element": text("b", "new")})
+        journal.append({"op": "delete", "page": 0, "id": "b"})
+        journal.append({"op": "update", "page": 0, "element": dict(image, x=5)})
+        journal.flush()
+
+        records = read_journal(self.path)
+        self.assertTrue(journal_matches(records, self.target))
+        # The image is written once and referenced afterwards
+        self.assertEqual(sum(1 for r in records if r["op"] == "image"), 1)
+
+        elements = replay_journal(records)[0]
+        self.assertEqual([el["id"] for el in elements], ["a", "img"])
+        self.assertEqual(elements[0]["text"], "two")
+        self.assertEqual(elements[1]["image_data"], b"\x89PNG")
+        self.assertEqual(elements[1]["x"], 5)
+        journal.close()
+
+    def test_torn_tail_is_ignored(self):
+        journal = self.start()
+        journal.append({"op": "page", "page": 2, "elements": [text("a", "kept")]})
+        journal.close()
+        with open(self.path, "ab") as f:
+            f.write(b"0badc0de {\"op\":\"delete\",\"page\":2,\"id\":\"a\"}\n")
+            f.write(b"12345678 {\"op\":")
+
+        records = read_journal(self.path)
+        self.assertEqual(len(records), 2)
+        self.assertEqual(replay_journal(records)[2][0]["text"], "kept")
+
+    def test_journal_of_an_older_save_does_not_match(self):
+        journal = self.start()
+        journal.close()
+        records = read_journal(self.path)
+        self.assertTrue(journal_matches(records, self.target))
+
+        with open(self.target, "ab") as f:
+            f.write(b" saved again")
+        self.assertFalse(journal_matches(records, self.target))
+        self.assertFalse(journal_matches([], self.target))
+
+    def test_discard_removes_the_file(self):
+        journal = self.start()
+        journal.append({"op": "delete", "page": 0, "id": "a"})
+        journal.discard()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(read_journal(self.path), [])
+
+if __name__ == '__main__':
+    unittest.main()
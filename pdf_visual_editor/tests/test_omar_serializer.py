@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from omar_serializer import (HAS_MSGPACK, MsgpackSerializer, get_serializer,
+                             pack, unpack)
+from omar_container import ContainerReader, FLAG_MSGPACK, write_project, update_project
+
+SAMPLE = {
+    "none": None, "flags": [True, False],
+    "ints": [0, 127, 128, -1, -32, -33, 255, 65536, -40000, 2 ** 40, -2 ** 40],
+    "float": 1.5, "text": "Año ✓" * 10, "long": "x" * 70000,
+    "bytes": b"\x89PNG\x00", "nested": {"list": list(range(20)), "empty": {}},
+}
+
+class TestPureMsgpack(unittest.TestCase):
+    def test_round_trip(self):
+        self.assertEqual(unpack(pack(SAMPLE)), SAMPLE)
+        # Tuples come back as lists, like with the msgpack package
+        self.assertEqual(unpack(pack((1, 2))), [1, 2])
+
+    def test_compact_encodings(self):
+        self.assertEqual(pack(5), b"\x05")
+        self.assertEqual(pack(-1), b"\xff")
+        self.assertEqual(pack(200), b"\xcc\xc8")
+        self.assertEqual(pack("ab"), b"\xa2ab")
+        self.assertEqual(pack({"a": [None]}), b"\x81\xa1a\x91\xc0")
+
+    def test_bad_data(self):
+        with self.assertRaises(ValueError):
+            unpack(pack("truncated")[:-1])
+        with self.assertRaises(ValueError):
+            unpack(pack(1) + b"\x00")
+        with self.assertRaises(TypeError):
+            pack({1, 2})
+
+    @unittest.skipUnless(HAS_MSGPACK, "msgpack not installed")
+    def test_matches_msgpack_package(self):
+        fast = MsgpackSerializer()
+        self.assertEqual(fast.loads(pack(SAMPLE)), SAMPLE)
+        self.assertEqual(unpack(fast.dumps(SAMPLE)), SAMPLE)
+
+    def test_int_map_keys_round_trip_with_both_backends(self):
+        data = {"previews": {0: b"png", 12: b"png"}, "page_order": [12, 0]}
+        backends = [MsgpackSerializer(pure=True)]
+        if HAS_MSGPACK:
+            backends.append(MsgpackSerializer())
+        for writer in backends:
+            for reader in backends:
+                self.assertEqual(reader.loads(writer.dumps(data)), data)
+
+    def test_unknown_serializer(self):
+        with self.assertRaises(ValueError):
+            get_serializer("yaml")
+
+class TestContainerCodecs(unittest.TestCase):
+    def test_mixed_codecs_in_one_project(self):
+        project = {"version": "2.0", "app": "PDF Visual Editor", "source_pdf": {},
+                   "settings": {}, "page_order": [], "pages": [
+                       {"page_num": 0, "elements": [{"type": "text", "text": "json"}]},
+                       {"page_num": 1, "elements": []}]}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "p.omar")
+            write_project(path, project, get_serializer("json"))
+            update_project(path, project, [{"page_num": 1, "elements": [
+                {"type": "text", "text": "msgpack"}]}], MsgpackSerializer(pure=True))
+
+            reader = ContainerReader(path)
+            pages = {page["page_num"]: page["entry"] for page in reader.manifest["pages"]}
+            self.assertFalse(reader.members[pages[0]][2] & FLAG_MSGPACK)
+            self.assertTrue(reader.members[pages[1]][2] & FLAG_MSGPACK)
+            self.assertEqual(reader.read_entry(pages[0])["elements"][0]["text"], "json")
+            self.assertEqual(reader.read_entry(pages[1])["elements"][0]["text"], "msgpack")
+            reader.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.page_layout import PageLayout
+
+class TestPageLayout(unittest.TestCase):
+    def setUp(self):
+        # Two portrait pages and a landscape one, at scale 1 with a gap of 10
+        self.layout = PageLayout([(100, 200), (100, 200), (200, 100)], scale=1, gap=10)
+
+    def test_stacks_and_centres_pages(self):
+        self.assertEqual(self.layout.width, 200)
+        self.assertEqual(self.layout.height, 520)
+        self.assertEqual(self.layout.rect(0), (50, 0, 100, 200))
+        self.assertEqual(self.layout.rect(1), (50, 210, 100, 200))
+        self.assertEqual(self.layout.rect(2), (0, 420, 200, 100))
+
+    def test_pages_between(self):
+        self.assertEqual(self.layout.pages_between(0, 100), [0])
+        self.assertEqual(self.layout.pages_between(150, 300), [0, 1])
+        # A band inside the gap touches no page
+        self.assertEqual(self.layout.pages_between(202, 208), [])
+        self.assertEqual(self.layout.pages_between(-50, 1000), [0, 1, 2])
+
+    def test_page_at(self):
+        self.assertEqual(self.layout.page_at(-5), 0)
+        self.assertEqual(self.layout.page_at(205), 0)
+        self.assertEqual(self.layout.page_at(215), 1)
+        self.assertEqual(self.layout.page_at(9999), 2)
+
+    def test_follows_page_order(self):
+        layout = PageLayout([(100, 200), (100, 200), (200, 100)], page_order=[2, 0], scale=1, gap=10)
+        self.assertNotIn(1, layout)
+        self.assertEqual(layout.rect(2), (0, 0, 200, 100))
+        self.assertEqual(layout.pages_between(0, 150), [2, 0])
+        self.assertEqual(layout.position(0), 1)
+
+    def test_sizes_by_page_id(self):
+        layout = PageLayout({7: (100, 200), 3: (200, 100)}, page_order=[7, 3], scale=1, gap=10)
+        self.assertEqual(layout.rect(3), (0, 210, 200, 100))
+        self.assertEqual(layout.position(3), 1)
+
+    def test_long_document_lookup(self):
+        layout = PageLayout([(612, 792)] * 2000, scale=1.5)
+        _, y, _, _ = layout.rect(1500)
+        self.assertEqual(layout.page_at(y + 1), 1500)
+        self.assertEqual(layout.pages_between(y, y + 100), [1500])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.page_order import PageOrder, PageRef, normalize_refs
+
+class TestPageOrder(unittest.TestCase):
+    def setUp(self):
+        self.order = PageOrder(4)
+
+    def test_pages_of_the_opened_pdf_keep_their_index_as_id(self):
+        self.assertEqual(self.order.ids(), [0, 1, 2, 3])
+        self.assertEqual(self.order.ref(2), PageRef(2, 0, 2, 0))
+        self.assertTrue(self.order.is_identity())
+
+    def test_insert_from_another_source(self):
+        source = self.order.add_source("/tmp/other.pdf")
+        self.assertEqual(self.order.add_source("/tmp/other.pdf"), source)
+        ids = self.order.insert(1, source, range(3))
+        self.assertEqual(ids, [4, 5, 6])
+        self.assertEqual(self.order.ids(), [0, 4, 5, 6, 1, 2, 3])
+        self.assertEqual(self.order.resolve(5), PageRef(5, source, 1, 0))
+        self.assertEqual(self.order.index_of(1), 4)
+        self.assertFalse(self.order.is_identity())
+
+    def test_delete_keeps_deleted_pages_resolvable(self):
+        self.order.delete([1, 3])
+        self.assertEqual(self.order.ids(), [0, 2])
+        self.assertNotIn(1, self.order)
+        self.assertEqual(self.order.resolve(1).index, 1)
+        with self.assertRaises(ValueError):
+            self.order.index_of(1)
+
+    def test_duplicate_places_copies_after_their_page(self):
+        self.order.rotate([2], 90)
+        copies = self.order.duplicate([2, 0])
+        self.assertEqual(copies, [4, 5])
+        self.assertEqual(self.order.ids(), [0, 4, 1, 2, 5, 3])
+        self.assertEqual(self.order.resolve(5), PageRef(5, 0, 2, 90))
+
+    def test_rotate(self):
+        self.order.rotate([1], -90)
+        self.assertEqual(self.order.resolve(1).rotation, 270)
+        self.order.rotate([1], 180)
+        self.assertEqual(self.order.ref(1).rotation, 90)
+        with self.assertRaises(ValueError):
+            self.order.rotate([1], 45)
+
+    def test_set_ids_and_extract(self):
+        self.order.set_ids([3, 2, 1, 0])
+        self.assertEqual([ref.index for ref in self.order.extract(1, 2)], [2, 1])
+        with self.assertRaises(ValueError):
+            self.order.set_ids([3, 2, 1])
+
+    def test_snapshot_restore(self):
+        before = self.order.snapshot()
+        self.order.delete([0])
+        self.order.rotate([1], 90)
+        after = self.order.snapshot()
+        self.order.restore(before)
+        self.assertEqual(self.order.refs(), [PageRef(i, 0, i) for i in range(4)])
+        self.order.restore(after)
+        self.assertEqual(self.order.ids(), [1, 2, 3])
+        self.assertEqual(self.order.resolve(1).rotation, 90)
+
+    def test_table_round_trip(self):
+        source = self.order.add_source("/tmp/other.pdf")
+        self.order.insert(4, source, [0])
+        self.order.duplicate([0])
+        self.order.rotate([2], 90)
+        self.order.delete([3])
+        table = self.order.to_table()
+        # Untouched pages of the opened PDF need no table entry
+        self.assertEqual(len(table["page_table"]), 3)
+
+        restored = PageOrder.from_table(table, 4)
+        self.assertEqual(restored.refs(), self.order.refs())
+        self.assertEqual(restored.sources, [None, "/tmp/other.pdf"])
+        # New ids don't collide with stored ones
+        self.assertEqual(restored.duplicate([1]), [6])
+
+    def test_table_of_older_projects(self):
+        self.assertEqual(PageOrder.from_table({}, 3).ids(), [0, 1, 2])
+        self.assertEqual(PageOrder.from_table({"page_order": [2, 0, 7]}, 3).ids(), [2, 0])
+
+    def test_normalize_refs(self):
+        self.assertEqual(normalize_refs(None, 2), [PageRef(0, 0, 0), PageRef(1, 0, 1)])
+        ref = PageRef(9, 1, 0, 90)
+        self.assertEqual(normalize_refs([1, ref], 2), [PageRef(1, 0, 1), ref])
+
+if __name__ == '__main__':
+    unittest.main()
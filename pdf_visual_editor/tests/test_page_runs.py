@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from export.page_runs import plan_ref_runs, dirty_pages_from_data
+from utils.page_order import PageOrder, PageRef
+from utils.edit_tracker import EditTracker
+
+class TestPageRuns(unittest.TestCase):
+    def test_merged_documents_are_one_copy_run_each(self):
+        order = PageOrder(500)
+        for path in ("b.pdf", "c.pdf"):
+            order.insert(len(order), order.add_source(path), range(500))
+        runs = list(plan_ref_runs(order, set(), {0: 500, 1: 500, 2: 500}))
+        self.assertEqual(runs, [("copy", 0, 0, 499, 0), ("copy", 1, 0, 499, 0),
+                                ("copy", 2, 0, 499, 0)])
+
+    def test_ref_runs_split_on_rotation_and_edits(self):
+        order = PageOrder(6)
+        order.rotate([2, 3], 90)
+        runs = list(plan_ref_runs(order, {4}, {0: 6}))
+        self.assertEqual(runs, [
+            ("copy", 0, 0, 1, 0),
+            ("copy", 0, 2, 3, 90),
+            ("edit", PageRef(4, 0, 4, 0)),
+            ("copy", 0, 5, 5, 0),
+        ])
+
+    def test_ref_runs_skip_unknown_pages(self):
+        refs = [PageRef(0, 0, 0), PageRef(1, 0, 7), PageRef(2, 3, 0)]
+        self.assertEqual(list(plan_ref_runs(refs, set(), {0: 2})), [("copy", 0, 0, 0, 0)])
+
+    def test_dirty_pages_from_data_ignores_empty_pages(self):
+        pages_data = {0: [], 1: [{'type': 'text'}]}
+        self.assertEqual(dirty_pages_from_data(pages_data), {1})
+
+class TestEditTracker(unittest.TestCase):
+    def test_generations(self):
+        tracker = EditTracker()
+        self.assertFalse(tracker.is_dirty(4))
+        tracker.mark_dirty(4)
+        self.assertEqual(tracker.mark_dirty(4), 2)
+        self.assertTrue(tracker.is_dirty(4))
+        self.assertEqual(tracker.dirty_pages(), {4})
+
+        tracker.clear()
+        self.assertEqual(tracker.dirty_pages(), set())
+
+    def test_unsaved_pages_follow_saved_baseline(self):
+        tracker = EditTracker()
+        tracker.mark_dirty(1)
+        tracker.mark_dirty(2)
+        self.assertEqual(tracker.unsaved_pages(), {1, 2})
+
+        tracker.mark_saved()
+        self.assertEqual(tracker.unsaved_pages(), set())
+        tracker.mark_dirty(2)
+        self.assertEqual(tracker.unsaved_pages(), {2})
+        # Still differs from the source PDF
+        self.assertEqual(tracker.dirty_pages(), {1, 2})
+
+    def test_edits_during_a_background_save_stay_unsaved(self):
+        tracker = EditTracker()
+        tracker.mark_dirty(1)
+        tracker.mark_dirty(2)
+        saving = tracker.snapshot()
+        tracker.mark_dirty(2)
+        tracker.mark_dirty(3)
+
+        tracker.mark_saved(saving)
+        self.assertEqual(tracker.unsaved_pages(), {2, 3})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import fitz
+    from export.pdf_writer import PDFWriter
+    HAS_FITZ = True
+except ImportError:
+    HAS_FITZ = False
+
+def make_pdf(path, page_count):
+    doc = fitz.open()
+    for page_num in range(page_count):
+        doc.new_page().insert_text((72, 72), f"Page {page_num}")
+    doc.save(path)
+    doc.close()
+
+def text_element(text):
+    return {"type": "text", "text": text, "x": 10, "y": 10, "font_size": 12}
+
+@unittest.skipUnless(HAS_FITZ, "PyMuPDF not installed")
+class TestIncrementalSave(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "doc.pdf")
+        make_pdf(self.path, 3)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def save_edit(self, text):
+        """Bytes appended by an incremental save of one text edit."""
+        before = os.path.getsize(self.path)
+        report = PDFWriter(self.path, self.path).save({0: [text_element(text)]}, None)
+        self.assertTrue(report.incremental)
+        return os.path.getsize(self.path) - before
+
+    def page_text(self, page_num):
+        with fitz.open(self.path) as doc:
+            return doc[page_num].get_text()
+
+    def test_ascii_edit_embeds_no_font(self):
+        # Standard fonts are referenced, not embedded
+        self.assertLess(self.save_edit("Hello"), 4096)
+        self.assertIn("Hello", self.page_text(0))
+
+    def test_unicode_edit_embeds_only_used_glyphs(self):
+        # The fallback font is several megabytes in full
+        self.assertLess(self.save_edit("Hello Мир 你好"), 64 * 1024)
+        self.assertIn("Мир 你好", self.page_text(0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import tempfile
+import types
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import fitz
+    import pikepdf
+    from export.pikepdf_writer import PikePDFWriter
+    from utils.page_order import PageOrder
+    # Some GUI tests put a mock in place of pikepdf for the whole session
+    HAS_PIKEPDF = isinstance(pikepdf, types.ModuleType)
+except ImportError:
+    HAS_PIKEPDF = False
+
+def make_pdf(path, page_count):
+    doc = fitz.open()
+    for page_num in range(page_count):
+        doc.new_page().insert_text((72, 72), f"Page {page_num}")
+    doc.save(path)
+    doc.close()
+
+def text_element(text):
+    return {"type": "text", "text": text, "x": 10, "y": 10, "font_size": 12}
+
+@unittest.skipUnless(HAS_PIKEPDF, "pikepdf or PyMuPDF not installed")
+class TestPageOperations(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "source.pdf")
+        self.output = os.path.join(self.tmp.name, "output.pdf")
+        make_pdf(self.source, 2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def export(self, pages_data, order):
+        writer = PikePDFWriter(self.source)
+        writer.save(self.output, pages_data, order.refs())
+        writer.close()
+        with fitz.open(self.output) as doc:
+            return [(page.rotation, page.get_text().split()) for page in doc]
+
+    def test_duplicate_is_rotated_and_edited_alone(self):
+        order = PageOrder(2)
+        copy = order.duplicate([0])[0]
+        order.rotate([copy], 90)
+        pages = self.export({copy: [text_element("Edited")]}, order)
+        self.assertEqual(pages, [
+            (0, ["Page", "0"]),
+            (90, ["Page", "0", "Edited"]),
+            (0, ["Page", "1"]),
+        ])
+
+        # The overlay's font is only added to the edited copy
+        with pikepdf.open(self.output) as pdf:
+            fonts = [set(page.Resources.Font.keys()) for page in pdf.pages]
+        self.assertEqual(len(fonts[1] - fonts[0]), 1)
+
+    def test_repeated_run_is_copied_per_occurrence(self):
+        # The document twice, the second time upside down
+        order = PageOrder(2)
+        copies = order.duplicate([0, 1])
+        order.set_ids([0, 1] + copies)
+        order.rotate(copies, 180)
+        pages = self.export({}, order)
+        self.assertEqual(pages, [
+            (0, ["Page", "0"]),
+            (0, ["Page", "1"]),
+            (180, ["Page", "0"]),
+            (180, ["Page", "1"]),
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.prefetch import Prefetcher
+from utils.task_runner import TaskRunner
+
+class TestPrefetcher(unittest.TestCase):
+    def setUp(self):
+        self.runner = TaskRunner()
+        self.prepared = []
+        self.prefetcher = Prefetcher(self.runner, self.prepare, capacity=2)
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def prepare(self, page_num, label):
+        self.prepared.append(page_num)
+        return f"{label}-{page_num}"
+
+    def test_prepared_pages_are_taken_once(self):
+        self.prefetcher.request([(1, ("page",)), (0, ("page",))])
+        self.runner.wait()
+        self.assertEqual(self.prefetcher.take(1), "page-1")
+        self.assertIsNone(self.prefetcher.take(1))
+        self.assertEqual(self.prefetcher.take(0), "page-0")
+        self.assertEqual((self.prefetcher.hits, self.prefetcher.misses), (2, 1))
+
+    def test_take_waits_for_a_running_job(self):
+        started, release = threading.Event(), threading.Event()
+        def slow(page_num):
+            started.set()
+            release.wait()
+            return page_num * 10
+        prefetcher = Prefetcher(self.runner, slow)
+        prefetcher.request([(3, ())])
+        started.wait()
+        threading.Timer(0.05, release.set).start()
+        self.assertEqual(prefetcher.take(3), 30)
+        # The late callback doesn't store the taken result again
+        self.runner.wait()
+        self.assertIsNone(prefetcher.take(3))
+
+    def test_queued_jobs_of_pages_moved_away_from_are_cancelled(self):
+        release = threading.Event()
+        self.runner.submit(release.wait)  # Keeps the worker busy
+        self.prefetcher.request([(1, ("a",)), (2, ("a",))])
+        self.prefetcher.request([(5, ("b",))])
+        release.set()
+        self.runner.wait()
+        self.assertEqual(self.prepared, [5])
+
+    def test_capacity_and_reset(self):
+        self.prefetcher.request([(page_num, ("p",)) for page_num in range(3)])
+        self.runner.wait()
+        # The oldest result is dropped
+        self.assertIsNone(self.prefetcher.take(0))
+        self.prefetcher.reset()
+        self.assertIsNone(self.prefetcher.take(2))
+
+if __name__ == '__main__':
+    unittest.main()
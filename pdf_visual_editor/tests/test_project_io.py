@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import fitz
+    from PyQt6.QtWidgets import QApplication
+    HAS_GUI = True
+except ImportError:
+    HAS_GUI = False
+
+if HAS_GUI:
+    if not QApplication.instance():
+        app = QApplication(sys.argv)
+    from gui.main_window import MainWindow
+    from gui.editor_canvas import EditableTextItem
+
+# Analysis of every page, independent of the pdfminer build
+ANALYSIS = [{"type": "text", "bbox": (72, 700, 200, 720), "text": "Analyzed", "font_size": 12}]
+
+def make_pdf(path, page_count):
+    doc = fitz.open()
+    for page_num in range(page_count):
+        doc.new_page().insert_text((72, 72), f"Page {page_num}")
+    doc.save(path)
+    doc.close()
+
+@unittest.skipUnless(HAS_GUI, "PyMuPDF or PyQt6 not installed")
+class TestLoadProject(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, "doc.pdf")
+        self.project_path = os.path.join(self.tmp.name, "doc.omar")
+        make_pdf(self.pdf_path, 2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @patch("layout_analyzer.LayoutAnalyzer.analyze_page", return_value=ANALYSIS)
+    def test_unedited_first_page_is_analyzed(self, analyze_page):
+        # Only the second page carries edits in the project
+        window = MainWindow()
+        window.load_pdf(self.pdf_path)
+        window.load_page(1)
+        window.mark_page_dirty(1)
+        window.save_project_to_path(self.project_path)
+        window.finish_background_tasks()
+
+        reopened = MainWindow()
+        reopened.load_project(self.project_path)
+        scene = reopened.canvas.scene
+        self.assertEqual(scene.page_num, 0)
+        texts = [item.toPlainText() for item in scene.items()
+                 if isinstance(item, EditableTextItem)]
+        self.assertEqual(texts, ["Analyzed"])
+
+    def save(self, window):
+        window.save_project_to_path(self.project_path)
+        window.finish_background_tasks()
+
+    @patch("layout_analyzer.LayoutAnalyzer.analyze_page", return_value=ANALYSIS)
+    def test_undone_page_delete_keeps_saved_edits(self, analyze_page):
+        window = MainWindow()
+        window.load_pdf(self.pdf_path)
+        for page_num in (0, 1):
+            window.load_page(page_num)
+            window.mark_page_dirty(page_num)
+        self.save(window)
+        window.project_reader.close()
+
+        # Page 1 of the reopened project is only read from the file.
+        # Saving drops the deleted page from it; undo brings it back
+        window = MainWindow()
+        window.load_project(self.project_path)
+        window.change_page_order("Delete Pages", lambda order: order.delete([1]))
+        self.save(window)
+        window.undo_stack.undo()
+        self.save(window)
+        window.project_reader.close()
+
+        reopened = MainWindow()
+        reopened.load_project(self.project_path)
+        self.assertEqual(reopened.page_order.ids(), [0, 1])
+        model = reopened.page_model(1)
+        self.assertIsNotNone(model)
+        self.assertEqual([element["text"] for element in model.to_dicts()], ["Analyzed"])
+        reopened.project_reader.close()
+
+    def test_closing_completes_a_running_save(self):
+        window = MainWindow()
+        window.load_pdf(self.pdf_path)
+        window.mark_page_dirty(0)
+        window.save_project_to_path(self.project_path)
+        window.close()
+        self.assertFalse(window.is_modified)
+        self.assertEqual(window.edit_tracker.unsaved_pages(), set())
+        window.project_reader.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.scene_cache import SceneCache, SharedBudget
+
+class FakeScene:
+    def __init__(self, size):
+        self.size = size
+
+class TestSceneCache(unittest.TestCase):
+    def setUp(self):
+        self.evicted = []
+        self.cache = SceneCache(100, lambda scene: scene.size,
+                                on_evict=self.on_evict)
+
+    def on_evict(self, page_num, scene):
+        # The scene is still reachable while its data is saved
+        self.assertIs(self.cache[page_num], scene)
+        self.evicted.append(page_num)
+
+    def test_evicts_least_recently_used_by_size(self):
+        for page_num in range(4):
+            self.cache.add(page_num, FakeScene(30))
+        self.assertEqual(self.evicted, [0])
+
+        self.cache.touch(1)
+        self.cache.add(4, FakeScene(50))
+        # Page 1 was used more recently than 2 and 3
+        self.assertEqual(self.evicted, [0, 2, 3])
+        self.assertEqual(list(self.cache), [1, 4])
+        self.assertEqual(self.cache.total_bytes, 80)
+
+    def test_large_scene_stays_when_alone(self):
+        self.cache.add(0, FakeScene(10))
+        self.cache.add(1, FakeScene(500))
+        self.assertEqual(self.evicted, [0])
+        self.assertIn(1, self.cache)
+
+    def test_refresh_weighs_grown_scene_again(self):
+        scene = FakeScene(10)
+        self.cache.add(0, scene)
+        self.cache.add(1, FakeScene(10))
+        scene.size = 95
+        self.cache.refresh(0)
+        # Page 0 is the least recently used one
+        self.assertEqual(self.evicted, [0])
+        self.assertEqual(self.cache.total_bytes, 10)
+
+    def test_stats_and_clear(self):
+        self.cache.add(0, FakeScene(10))
+        self.cache.touch(0)
+        self.cache.set_budget(5)
+        self.cache.add(1, FakeScene(1))
+        self.assertEqual(self.cache.stats(), {
+            "entries": 1, "bytes": 1, "budget_bytes": 5,
+            "hits": 1, "misses": 2, "evictions": 1})
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.total_bytes, 0)
+        self.assertIsNone(self.cache.get(1))
+
+class TestSharedBudget(unittest.TestCase):
+    def setUp(self):
+        self.budget = SharedBudget(100)
+        self.first = SceneCache(None, lambda scene: scene.size, shared_budget=self.budget)
+        self.second = SceneCache(None, lambda scene: scene.size, shared_budget=self.budget)
+
+    def test_evicts_least_recently_used_of_any_cache(self):
+        self.first.add(0, FakeScene(30))
+        self.second.add(0, FakeScene(30))
+        self.first.add(1, FakeScene(30))
+        self.second.touch(0)
+        self.second.add(1, FakeScene(30))
+        # Page 0 of the first cache is the oldest scene of both
+        self.assertEqual(list(self.first), [1])
+        self.assertEqual(list(self.second), [0, 1])
+        self.assertEqual(self.budget.total_bytes, 90)
+        self.assertEqual(self.first.stats()["evictions"], 1)
+
+    def test_most_recent_scene_stays_when_alone(self):
+        self.first.add(0, FakeScene(10))
+        self.second.add(0, FakeScene(500))
+        self.assertEqual(len(self.first), 0)
+        self.assertIn(0, self.second)
+
+    def test_unregistered_cache_no_longer_counts(self):
+        self.first.add(0, FakeScene(60))
+        self.budget.unregister(self.first)
+        self.second.add(0, FakeScene(60))
+        self.assertIn(0, self.first)
+        self.assertEqual(self.budget.total_bytes, 60)
+
+    def test_budget_set_for_all_caches(self):
+        self.first.add(0, FakeScene(30))
+        self.second.add(0, FakeScene(30))
+        self.second.set_budget(40)
+        self.assertEqual(self.first.budget_bytes, 40)
+        self.assertEqual(len(self.first), 0)
+
+if __name__ == '__main__':
+    unittest.main()
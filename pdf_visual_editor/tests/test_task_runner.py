@@ -0,0 +1,50 @@
+import unittest
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.task_runner import TaskRunner
+
+class TestTaskRunner(unittest.TestCase):
+    def setUp(self):
+        self.runner = TaskRunner()
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def test_callbacks_run_on_poll_in_submit_order(self):
+        release = threading.Event()
+        results = []
+        self.runner.submit(release.wait, on_done=lambda _: results.append("first"))
+        self.runner.submit(lambda: "second", on_done=results.append)
+
+        # Nothing is delivered while the first task is still running
+        self.assertEqual(self.runner.poll(), 2)
+        self.assertEqual(results, [])
+
+        release.set()
+        self.runner.wait()
+        self.assertEqual(results, ["first", "second"])
+        self.assertFalse(self.runner.busy)
+
+    def test_callbacks_run_on_the_polling_thread(self):
+        threads = []
+        self.runner.submit(threading.get_ident, on_done=lambda worker: threads.append(worker))
+        self.runner.wait()
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+        self.runner.submit(lambda: None, on_done=lambda _: threads.append(threading.get_ident()))
+        self.runner.wait()
+        self.assertEqual(threads[1], threading.get_ident())
+
+    def test_errors_go_to_on_error(self):
+        errors = []
+        def fail():
+            raise OSError("disk full")
+        self.runner.submit(fail, on_done=errors.append, on_error=errors.append)
+        self.runner.wait()
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], OSError)
+
+if __name__ == '__main__':
+    unittest.main()
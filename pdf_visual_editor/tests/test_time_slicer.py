@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.time_slicer import TimeSlicedJob, order_visible_first
+
+class FakeClock:
+    """Time source advanced by the process() of the test."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestTimeSlicedJob(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.batches = []
+        self.finished = []
+
+    def process(self, unit):
+        self.clock.now += 1.0
+        return unit if unit % 2 == 0 else None
+
+    def make_job(self, units, budget):
+        return TimeSlicedJob(units, self.process, budget=budget,
+                             on_batch=self.batches.append,
+                             on_done=lambda: self.finished.append(True), clock=self.clock)
+
+    def test_slices_respect_budget_and_batch_results(self):
+        job = self.make_job(range(7), budget=3.0)
+        self.assertFalse(job.run_slice())
+        self.assertEqual(job.progress, (3, 7))
+        self.assertFalse(job.run_slice())
+        self.assertTrue(job.run_slice())
+        # Units returning None are not reported
+        self.assertEqual(self.batches, [[0, 2], [4], [6]])
+        self.assertEqual(self.finished, [True])
+        self.assertTrue(job.run_slice())
+        self.assertEqual(self.finished, [True])
+
+    def test_each_slice_makes_progress(self):
+        job = self.make_job(range(3), budget=0.0)
+        job.run_slice()
+        self.assertEqual(job.progress, (1, 3))
+
+    def test_run_all_and_cancel(self):
+        job = self.make_job(range(5), budget=1.0)
+        job.run_all()
+        self.assertTrue(job.done)
+        self.assertEqual(self.finished, [True])
+
+        job = self.make_job(range(5), budget=1.0)
+        job.run_slice()
+        job.cancel()
+        self.assertTrue(job.run_slice())
+        self.assertEqual(job.progress, (1, 5))
+        self.assertEqual(self.finished, [True])
+
+    def test_empty_job_finishes_on_first_slice(self):
+        job = self.make_job([], budget=1.0)
+        self.assertTrue(job.run_slice())
+        self.assertEqual(self.finished, [True])
+
+class TestOrderVisibleFirst(unittest.TestCase):
+    def test_visible_units_first_in_original_order(self):
+        rects = {"a": (0, 900, 10, 10), "b": (5, 5, 10, 10), "c": None, "d": (95, 95, 50, 50)}
+        ordered = order_visible_first(["a", "b", "c", "d"], rects.get, (0, 0, 100, 100))
+        self.assertEqual(ordered, ["b", "d", "a", "c"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Level-of-detail bookkeeping for items painted through a cached bitmap.
+
+Laying out and drawing text is the most expensive part of repainting a
+page with thousands of text blocks. An item can instead draw a bitmap of
+itself rendered once at the current zoom level. Zoom levels are powers of
+LOD_STEP, and the bitmap is rendered at the level at or above the device
+scale (so it's only ever scaled down), so zooming re-renders it only when
+the scale crosses a level.
+"""
+
+import math
+from typing import Optional
+
+# Ratio between two zoom levels a bitmap is rendered at
+LOD_STEP = math.sqrt(2)
+
+# Bitmaps larger than this (in pixels) aren't cached; the item paints live
+MAX_BITMAP_PIXELS = 2048 * 2048
+
+
+def device_scale(m11: float, m12: float, m21: float, m22: float) -> float:
+    """Largest scale factor of a transform (item to device pixels)."""
+    return max(math.hypot(m11, m12), math.hypot(m21, m22))
+
+
+class BitmapLodCache:
+    """
+    The cached bitmap of one item, its zoom level and the paint state
+    (e.g. selection) it was rendered with. Rendering the bitmap is left to
+    the item.
+    """
+    def __init__(self, step: float = LOD_STEP, max_pixels: int = MAX_BITMAP_PIXELS):
+        self.step = step
+        self.max_pixels = max_pixels
+        self.bitmap = None
+        self.scale = None
+        self.key = None
+        self.nbytes = 0
+
+    def scale_for(self, scale: float, width: float, height: float) -> Optional[float]:
+        """
+        Scale to render the bitmap at for a device scale, or None if the
+        item should be painted live (degenerate or too large a bitmap).
+        """
+        if scale <= 0 or width <= 0 or height <= 0:
+            return None
+        # Small epsilon so an exact level isn't rounded up to the next one
+        level = math.ceil(math.log(scale, self.step) - 1e-9)
+        scale = self.step ** level
+        if width * scale * height * scale > self.max_pixels:
+            return None
+        return scale
+
+    def get(self, scale: float, key=None):
+        """The cached bitmap if it was rendered at scale with key, else None."""
+        if self.bitmap is not None and self.scale == scale and self.key == key:
+            return self.bitmap
+        return None
+
+    def put(self, bitmap, scale: float, key=None, nbytes: int = 0):
+        """Keep a newly rendered bitmap (replacing the previous one)."""
+        self.bitmap = bitmap
+        self.scale = scale
+        self.key = key
+        self.nbytes = nbytes
+
+    def invalidate(self):
+        """Drop the bitmap (the item's content, font or transform changed)."""
+        self.bitmap = None
+        self.scale = None
+        self.key = None
+        self.nbytes = 0
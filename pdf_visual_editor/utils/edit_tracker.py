@@ -0,0 +1,52 @@
+class EditTracker:
+    """
+    Tracks which pages have been edited using a per-page generation counter.
+
+    Every edit on a page bumps its generation. A page whose generation is
+    still 0 has never been touched, so exporters can copy it verbatim from
+    the source PDF without looking at its elements.
+
+    The generations at the last project save are kept as a baseline, so
+    saves can rewrite only the pages edited since.
+    """
+    def __init__(self):
+        self._generations = {}
+        self._saved = {}
+
+    def mark_dirty(self, page_num: int) -> int:
+        """Bump the generation of a page and return the new value."""
+        generation = self._generations.get(page_num, 0) + 1
+        self._generations[page_num] = generation
+        return generation
+
+    def generation(self, page_num: int) -> int:
+        return self._generations.get(page_num, 0)
+
+    def is_dirty(self, page_num: int) -> bool:
+        return self._generations.get(page_num, 0) > 0
+
+    def dirty_pages(self) -> set:
+        """Returns the set of pages that differ from the source PDF."""
+        return {page_num for page_num, gen in self._generations.items() if gen > 0}
+
+    def unsaved_pages(self) -> set:
+        """Returns the set of pages edited since the last mark_saved()."""
+        return {page_num for page_num, gen in self._generations.items()
+                if gen != self._saved.get(page_num, 0)}
+
+    def snapshot(self) -> dict:
+        """The current generations, to pass to mark_saved() once a save ends."""
+        return dict(self._generations)
+
+    def mark_saved(self, generations: dict = None):
+        """
+        Record the current state as saved.
+
+        A background save passes the snapshot() taken when its data was
+        gathered, so pages edited while it was writing stay unsaved.
+        """
+        self._saved = dict(self._generations if generations is None else generations)
+
+    def clear(self):
+        self._generations.clear()
+        self._saved.clear()
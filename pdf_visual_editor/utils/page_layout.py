@@ -0,0 +1,83 @@
+"""
+Layout of the pages in the continuous (scrolling) document view.
+
+Pages are stacked top to bottom, centred horizontally, from their sizes
+alone, so a long document is laid out without rendering or even opening
+its pages. Lookups by vertical position are binary searches over the page
+offsets.
+"""
+
+from bisect import bisect_right
+from typing import List, Optional, Sequence, Tuple
+
+# Gap between two pages, in scene units
+PAGE_GAP = 16.0
+
+
+class PageLayout:
+    """
+    Scene rectangles of the pages of a document.
+
+    Scene units are those of the page editor (PDF points times scale), so
+    the items of a page keep their coordinates, offset by the page origin.
+    """
+    def __init__(self, page_sizes: Sequence[Tuple[float, float]],
+                 page_order: Optional[Sequence[int]] = None,
+                 scale: float = 1.5, gap: float = PAGE_GAP):
+        """
+        Args:
+            page_sizes: (width, height) in PDF points, by page number (or
+                a dict by page id, see utils/page_order.py)
+            page_order: Page numbers top to bottom (defaults to source order)
+            scale: Scene units per PDF point
+            gap: Space between two pages
+        """
+        if page_order is None:
+            page_order = range(len(page_sizes))
+        self.order = list(page_order)
+        self.gap = gap
+        self.width = max((page_sizes[page_num][0] * scale for page_num in self.order), default=0.0)
+
+        self._tops = []
+        self._rects = {}
+        y = 0.0
+        for page_num in self.order:
+            width, height = page_sizes[page_num][0] * scale, page_sizes[page_num][1] * scale
+            self._tops.append(y)
+            self._rects[page_num] = ((self.width - width) / 2, y, width, height)
+            y += height + gap
+        self.height = max(y - gap, 0.0)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __contains__(self, page_num) -> bool:
+        return page_num in self._rects
+
+    def rect(self, page_num: int) -> Tuple[float, float, float, float]:
+        """(x, y, width, height) of a page in the scene."""
+        return self._rects[page_num]
+
+    def position(self, page_num: int) -> int:
+        """Position of a page, top to bottom (from 0)."""
+        return bisect_right(self._tops, self._rects[page_num][1]) - 1
+
+    def page_at(self, y: float) -> Optional[int]:
+        """Page at a vertical position (the page above for a position in a gap)."""
+        index = bisect_right(self._tops, y) - 1
+        if index < 0:
+            return self.order[0] if self.order else None
+        return self.order[index]
+
+    def pages_between(self, top: float, bottom: float) -> List[int]:
+        """Pages intersecting the band top..bottom, top to bottom."""
+        first = max(bisect_right(self._tops, top) - 1, 0)
+        pages = []
+        for index in range(first, len(self.order)):
+            if self._tops[index] > bottom:
+                break
+            page_num = self.order[index]
+            _, y, _, height = self._rects[page_num]
+            if y + height >= top:
+                pages.append(page_num)
+        return pages
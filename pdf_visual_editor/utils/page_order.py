@@ -0,0 +1,239 @@
+"""
+Page order of a document: which pages it has, in which order and from
+which PDF.
+
+Every page carries a stable id. Scenes, element models, edit tracking and
+the writers' pages_data are keyed by page id, so inserting, deleting or
+moving pages never renumbers the edits of other pages. The pages of the
+opened PDF keep their index as id (documents whose pages were never
+inserted or duplicated look exactly as before); inserted and duplicated
+pages get new ids after them.
+
+Pages are PageRefs into a source PDF: source 0 is the opened document,
+others are PDFs pages were inserted from (see add_source()). Writers copy
+runs of consecutive refs of one source in bulk (export/page_runs.py).
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+
+class PageRef(NamedTuple):
+    """A page of the document: page `index` of PDF `source`, turned by `rotation` degrees."""
+    id: int
+    source: int
+    index: int
+    rotation: int = 0
+
+
+class PageOrder:
+    """
+    The pages of a document in order.
+
+    The order is a plain list of immutable PageRefs, so appending pages is
+    amortized O(1) and a snapshot (for undo) is a tuple copy. Positions of
+    ids are indexed lazily after a change.
+    """
+    def __init__(self, page_count: int = 0, main_source=None):
+        """
+        Args:
+            page_count: Pages of the opened PDF, listed in their order
+            main_source: Source 0 (the opened PDF); consumers use their own
+        """
+        self._refs = [PageRef(i, 0, i) for i in range(page_count)]
+        # Refs by id; pages leave the order but their refs stay resolvable
+        # (a deleted page comes back on undo)
+        self._by_id = {ref.id: ref for ref in self._refs}
+        self._next_id = page_count
+        self._positions = None
+        self.sources = [main_source]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def __iter__(self):
+        return iter(self._refs)
+
+    def __contains__(self, page_id) -> bool:
+        return page_id in self._index()
+
+    def ids(self) -> List[int]:
+        """Page ids in order."""
+        return [ref.id for ref in self._refs]
+
+    def refs(self) -> List[PageRef]:
+        return list(self._refs)
+
+    def ref(self, position: int) -> PageRef:
+        """PageRef at a position of the order."""
+        return self._refs[position]
+
+    def index_of(self, page_id: int) -> int:
+        """Position of a page in the order (ValueError if it isn't listed)."""
+        try:
+            return self._index()[page_id]
+        except KeyError:
+            raise ValueError(f"Page {page_id} is not in the document") from None
+
+    def resolve(self, page_id: int) -> PageRef:
+        """PageRef of a page id, also of pages no longer listed (KeyError if never known)."""
+        return self._by_id[page_id]
+
+    def is_identity(self) -> bool:
+        """True if the order is the opened PDF's own pages, in order and unrotated."""
+        return all(ref == (position, 0, position, 0) for position, ref in enumerate(self._refs))
+
+    def _index(self) -> Dict[int, int]:
+        if self._positions is None:
+            self._positions = {ref.id: position for position, ref in enumerate(self._refs)}
+        return self._positions
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+
+    def add_source(self, source) -> int:
+        """Source number of a PDF to insert pages from (an already added one is reused)."""
+        if source in self.sources[1:]:
+            return self.sources.index(source, 1)
+        self.sources.append(source)
+        return len(self.sources) - 1
+
+    def insert(self, position: int, source: int, indices: Iterable[int]) -> List[int]:
+        """Insert pages of a source at position; returns their new ids."""
+        refs = [self._new_ref(source, index) for index in indices]
+        self._refs[position:position] = refs
+        self._changed()
+        return [ref.id for ref in refs]
+
+    def delete(self, page_ids: Iterable[int]):
+        """Remove pages from the order."""
+        page_ids = set(page_ids)
+        self._refs = [ref for ref in self._refs if ref.id not in page_ids]
+        self._changed()
+
+    def duplicate(self, page_ids: Iterable[int]) -> List[int]:
+        """Copy pages, each copy right after its page; returns the ids of the copies."""
+        page_ids = set(page_ids)
+        refs = []
+        copies = []
+        for ref in self._refs:
+            refs.append(ref)
+            if ref.id in page_ids:
+                copy = self._new_ref(ref.source, ref.index, ref.rotation)
+                refs.append(copy)
+                copies.append(copy.id)
+        self._refs = refs
+        self._changed()
+        return copies
+
+    def rotate(self, page_ids: Iterable[int], degrees: int):
+        """Turn pages clockwise by a multiple of 90 degrees."""
+        if degrees % 90:
+            raise ValueError(f"Pages can only be rotated by multiples of 90 degrees, not {degrees}")
+        page_ids = set(page_ids)
+        for position, ref in enumerate(self._refs):
+            if ref.id in page_ids:
+                ref = self._refs[position] = ref._replace(rotation=(ref.rotation + degrees) % 360)
+                self._by_id[ref.id] = ref
+
+    def set_ids(self, page_ids: Iterable[int]):
+        """Reorder the pages (page_ids must be the listed ids, in their new order)."""
+        page_ids = list(page_ids)
+        if sorted(page_ids) != sorted(self.ids()):
+            raise ValueError("A new page order must list the same pages")
+        self._refs = [self._by_id[page_id] for page_id in page_ids]
+        self._changed()
+
+    def extract(self, first: int, last: int) -> List[PageRef]:
+        """Refs of the pages at positions first to last (inclusive)."""
+        return self._refs[first:last + 1]
+
+    def _new_ref(self, source: int, index: int, rotation: int = 0) -> PageRef:
+        ref = PageRef(self._next_id, source, index, rotation)
+        self._next_id += 1
+        self._by_id[ref.id] = ref
+        return ref
+
+    def _changed(self):
+        self._positions = None
+
+    # ------------------------------------------------------------------
+    # Undo snapshots
+    # ------------------------------------------------------------------
+
+    def snapshot(self):
+        """
+        Immutable copy of the order (for restore()). Sources are not part
+        of it: they are only ever added, so a source number always names
+        the same PDF.
+        """
+        return tuple(self._refs)
+
+    def restore(self, snapshot):
+        """Return to a snapshot() of this order."""
+        self._refs = list(snapshot)
+        for ref in self._refs:
+            self._by_id[ref.id] = ref
+        self._changed()
+
+    # ------------------------------------------------------------------
+    # Project storage
+    # ------------------------------------------------------------------
+
+    def to_table(self) -> Dict[str, object]:
+        """
+        Project fields of the order: "page_order" (ids, as before pages
+        could be inserted), "page_table" ([id, source, index, rotation] of
+        every page that isn't a page of the opened PDF under its own index)
+        and "page_sources" (paths of the other PDFs, null for the opened one).
+        """
+        table = [list(ref) for ref in self._refs if ref != (ref.id, 0, ref.id, 0)]
+        return {
+            "page_order": self.ids(),
+            "page_table": table,
+            "page_sources": [None] + list(self.sources[1:]),
+        }
+
+    @classmethod
+    def from_table(cls, project_data: Dict[str, object], page_count: int,
+                   main_source=None) -> "PageOrder":
+        """
+        Order stored with to_table() in a project (the opened PDF's order
+        if it has none). Pages of the opened PDF past page_count are
+        dropped; page ids listed without a table entry are pages of the
+        opened PDF (projects saved before the table existed).
+        """
+        order = cls(0, main_source)
+        order.sources.extend((project_data.get("page_sources") or [None])[1:])
+        table = {entry[0]: PageRef(*entry) for entry in project_data.get("page_table") or []}
+
+        page_ids = project_data.get("page_order") or range(page_count)
+        for page_id in page_ids:
+            ref = table.get(page_id) or PageRef(page_id, 0, page_id)
+            if ref.id in order._by_id:
+                continue
+            if ref.source == 0 and not 0 <= ref.index < page_count:
+                continue
+            if not 0 <= ref.source < len(order.sources):
+                continue
+            order._refs.append(ref)
+            order._by_id[ref.id] = ref
+
+        # New ids never reuse the ids of the opened PDF's pages
+        order._next_id = max([page_count] + [page_id + 1 for page_id in order._by_id])
+        return order
+
+
+def normalize_refs(page_order: Optional[Iterable], page_count: int) -> List[PageRef]:
+    """
+    Writer page orders as PageRefs: plain page numbers (the order before
+    page ids existed) are pages of the source PDF. None is every page in order.
+    """
+    if page_order is None:
+        return [PageRef(i, 0, i) for i in range(page_count)]
+    return [entry if isinstance(entry, PageRef) else PageRef(entry, 0, entry)
+            for entry in page_order]
@@ -0,0 +1,81 @@
+"""
+Source PDFs are passed around as a file path or, for projects that embed
+their PDF, as a seekable binary file object (omar_container.MemberStream,
+or io.BytesIO for v1 projects). These helpers open either kind.
+"""
+
+import hashlib
+import io
+import os
+
+
+def is_pdf_path(source) -> bool:
+    """True if source is a path rather than a file object."""
+    return isinstance(source, (str, os.PathLike))
+
+
+def read_pdf_bytes(source) -> bytes:
+    """The whole PDF of a file object (from its memory map when it has one)."""
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+def source_size(source) -> int:
+    """Size in bytes of a PDF path or file object."""
+    if is_pdf_path(source):
+        return os.path.getsize(source)
+    position = source.tell()
+    try:
+        return source.seek(0, io.SEEK_END)
+    finally:
+        source.seek(position)
+
+
+def open_fitz_document(source):
+    """
+    Opens a source PDF with PyMuPDF.
+
+    File objects are handed over as one in-memory buffer
+    (fitz.open(stream=...)), without a temporary file.
+    """
+    import fitz
+
+    if is_pdf_path(source):
+        return fitz.open(source)
+    return fitz.open(stream=read_pdf_bytes(source), filetype="pdf")
+
+
+# Bytes hashed from each sampled region of a PDF
+_FINGERPRINT_SAMPLE = 64 * 1024
+
+
+def pdf_fingerprint(source) -> str:
+    """
+    Cheap identity of a PDF's content, used to validate previews cached in
+    project files.
+
+    Hashes the size and samples from the start, middle and end of the file
+    (incremental updates land at the end), so it costs a few reads even
+    for very large PDFs.
+    """
+    size = source_size(source)
+    digest = hashlib.sha256(str(size).encode('ascii'))
+    offsets = sorted({0, max(0, size // 2 - _FINGERPRINT_SAMPLE // 2),
+                      max(0, size - _FINGERPRINT_SAMPLE)})
+
+    if is_pdf_path(source):
+        with open(source, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                digest.update(f.read(_FINGERPRINT_SAMPLE))
+    else:
+        position = source.tell()
+        try:
+            for offset in offsets:
+                source.seek(offset)
+                digest.update(source.read(_FINGERPRINT_SAMPLE))
+        finally:
+            source.seek(position)
+    return digest.hexdigest()
@@ -0,0 +1,106 @@
+"""
+Prepares data for pages likely to be shown next, on a background worker.
+
+The GUI asks for the neighbours of the page it just showed; when one of
+them is opened, its prepared data (render, layout analysis, extracted
+images) is taken from here and only the cheap scene construction is left
+for the UI thread.
+"""
+
+from collections import OrderedDict
+
+
+class Prefetcher:
+    """
+    Runs prepare(key, *args) on a TaskRunner for requested keys and keeps
+    the results until they're taken (at most capacity of them, oldest
+    dropped first).
+    """
+    def __init__(self, runner, prepare, capacity: int = 4):
+        """
+        Args:
+            runner: utils.task_runner.TaskRunner whose poll() delivers results
+            prepare: Function run on the worker thread
+            capacity: Prepared results kept at most
+        """
+        self.runner = runner
+        self._prepare = prepare
+        self.capacity = capacity
+        self._ready = OrderedDict()  # key -> result
+        self._pending = {}  # key -> (job id, Future)
+        self._job_ids = 0
+        self.hits = 0
+        self.misses = 0
+
+    def request(self, jobs):
+        """
+        Prepare the given keys, in order. Queued jobs for other keys are
+        cancelled, as the user has moved on.
+
+        Args:
+            jobs: (key, args) pairs; args are passed to prepare after key
+        """
+        keys = [key for key, _ in jobs]
+        for key, (_, future) in list(self._pending.items()):
+            if key not in keys and future.cancel():
+                del self._pending[key]
+
+        for key, args in jobs:
+            if key in self._ready or key in self._pending:
+                continue
+            self._job_ids += 1
+            job_id = self._job_ids
+            future = self.runner.submit(
+                self._prepare, key, *args,
+                on_done=lambda result, key=key, job_id=job_id: self._store(key, job_id, result),
+                on_error=lambda error, key=key, job_id=job_id: self._failed(key, job_id, error))
+            self._pending[key] = (job_id, future)
+
+    def take(self, key):
+        """
+        Prepared result for key, or None. A job still running is waited
+        for, which is cheaper than doing its work again.
+        """
+        if key in self._ready:
+            self.hits += 1
+            return self._ready.pop(key)
+
+        _, future = self._pending.pop(key, (None, None))
+        if future is not None and future.cancel():
+            future = None
+        if future is None:
+            self.misses += 1
+            return None
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Failed to prefetch page {key}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def reset(self):
+        """Drop prepared data and cancel queued jobs (e.g. another document was opened)."""
+        for _, future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._ready.clear()
+
+    def _finish(self, key, job_id) -> bool:
+        """True if job_id is still the pending job of key (not taken or reset)."""
+        if self._pending.get(key, (None,))[0] != job_id:
+            return False
+        del self._pending[key]
+        return True
+
+    def _store(self, key, job_id, result):
+        if not self._finish(key, job_id):
+            return
+        self._ready[key] = result
+        while len(self._ready) > self.capacity:
+            self._ready.popitem(last=False)
+
+    def _failed(self, key, job_id, error):
+        if self._finish(key, job_id):
+            print(f"Failed to prefetch page {key}: {error}")
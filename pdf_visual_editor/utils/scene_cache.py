@@ -0,0 +1,194 @@
+"""
+Memory-budgeted LRU cache of page scenes.
+
+Scenes are weighed by an estimate of the memory they hold (see
+estimate_scene_bytes in gui/page_manager.py) instead of being counted, so a
+page with a large background and many images pushes out more of the other
+pages than a text page does.
+
+The caches of several open documents can draw on one SharedBudget, so the
+budget holds for all documents together and the scenes evicted are the
+least recently used ones of any document.
+"""
+
+from collections import OrderedDict
+
+# Default budget for all cached scenes together
+DEFAULT_BUDGET_MB = 256
+
+
+class SharedBudget:
+    """
+    Memory budget shared by SceneCaches. Uses are numbered across the
+    caches, so eviction can find the least recently used scene of all of
+    them; the most recently used scene of all is never evicted.
+    """
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.caches = []
+        self._uses = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(cache.total_bytes for cache in self.caches)
+
+    def register(self, cache):
+        if cache not in self.caches:
+            self.caches.append(cache)
+
+    def unregister(self, cache):
+        """Stop counting a cache (its document was closed)."""
+        if cache in self.caches:
+            self.caches.remove(cache)
+
+    def next_use(self) -> int:
+        self._uses += 1
+        return self._uses
+
+    def set_budget(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.evict()
+
+    def evict(self):
+        """Evict least recently used scenes of any cache until the total fits the budget."""
+        total = self.total_bytes
+        while total > self.budget_bytes:
+            caches = [cache for cache in self.caches if len(cache)]
+            if sum(len(cache) for cache in caches) <= 1:
+                return
+            # Each cache is in use order, so the oldest scene is the
+            # oldest of their first entries
+            cache = min(caches, key=lambda cache: cache.oldest_use())
+            total -= cache.evict_oldest()
+
+
+class SceneCache:
+    """
+    Dict-like map of page number -> scene, least recently used first.
+
+    Reads (in, [], get, iteration) don't change the order; touch() marks a
+    page as used. When the estimated total exceeds the budget the least
+    recently used pages are evicted, after on_evict(page_num, scene) let
+    the caller keep their data. The most recently used page is never
+    evicted, even if it alone exceeds the budget.
+    """
+    def __init__(self, budget_bytes: int, estimate, on_evict=None, shared_budget=None):
+        """
+        Args:
+            budget_bytes: Budget for all cached scenes together
+            estimate: Function returning the estimated bytes of a scene
+            on_evict: Called with (page_num, scene) before a scene is evicted
+            shared_budget: SharedBudget to draw on instead (budget_bytes is
+                then ignored)
+        """
+        self.budget = shared_budget if shared_budget is not None else SharedBudget(budget_bytes)
+        self.budget.register(self)
+        self._estimate = estimate
+        self._on_evict = on_evict
+        self._entries = OrderedDict()  # page_num -> [scene, estimated bytes, last use]
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, page_num) -> bool:
+        return page_num in self._entries
+
+    def __getitem__(self, page_num):
+        return self._entries[page_num][0]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def get(self, page_num, default=None):
+        entry = self._entries.get(page_num)
+        return entry[0] if entry is not None else default
+
+    def keys(self):
+        return self._entries.keys()
+
+    def values(self):
+        return [entry[0] for entry in self._entries.values()]
+
+    def items(self):
+        return [(page_num, entry[0]) for page_num, entry in self._entries.items()]
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    @property
+    def budget_bytes(self) -> int:
+        return self.budget.budget_bytes
+
+    def touch(self, page_num):
+        """Mark a cached page as most recently used and return its scene."""
+        self._entries.move_to_end(page_num)
+        entry = self._entries[page_num]
+        entry[2] = self.budget.next_use()
+        self.hits += 1
+        return entry[0]
+
+    def add(self, page_num, scene):
+        """Cache a newly built scene as the most recently used page."""
+        self.pop(page_num)
+        self.misses += 1
+        cost = self._estimate(scene)
+        self._entries[page_num] = [scene, cost, self.budget.next_use()]
+        self._total += cost
+        self.budget.evict()
+
+    def refresh(self, page_num):
+        """Estimate a scene again (after it was populated or edited)."""
+        entry = self._entries.get(page_num)
+        if entry is None:
+            return
+        cost = self._estimate(entry[0])
+        self._total += cost - entry[1]
+        entry[1] = cost
+        self.budget.evict()
+
+    def pop(self, page_num, default=None):
+        """Drop a page without calling on_evict."""
+        entry = self._entries.pop(page_num, None)
+        if entry is None:
+            return default
+        self._total -= entry[1]
+        return entry[0]
+
+    def clear(self):
+        """Drop every page (e.g. when another document is opened)."""
+        self._entries.clear()
+        self._total = 0
+
+    def set_budget(self, budget_bytes: int):
+        """Change the budget (of every cache sharing it)."""
+        self.budget.set_budget(budget_bytes)
+
+    def stats(self) -> dict:
+        """Entries, estimated bytes, budget and hit/miss/eviction counters."""
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total,
+            "budget_bytes": self.budget_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def oldest_use(self) -> int:
+        """Use number of the least recently used page (SharedBudget eviction)."""
+        return next(iter(self._entries.values()))[2]
+
+    def evict_oldest(self) -> int:
+        """Evict the least recently used page; returns the bytes freed."""
+        page_num, (scene, cost, _) = next(iter(self._entries.items()))
+        if self._on_evict is not None:
+            # The scene is still cached while the callback saves its data
+            self._on_evict(page_num, scene)
+        self.pop(page_num)
+        self.evictions += 1
+        return cost
@@ -0,0 +1,78 @@
+"""
+Runs slow work (image encoding, file I/O) on a worker thread.
+
+Qt widgets and pixmaps may only be used on the UI thread, so the worker
+never calls back into the GUI itself: poll() runs on the UI thread (from a
+QTimer in the GUI) and delivers the results of the finished tasks, in the
+order they were submitted.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskRunner:
+    """
+    Background tasks with callbacks delivered by poll().
+
+    With one worker (the default) tasks run one after the other, so a task
+    never overlaps the one submitted before it.
+    """
+    def __init__(self, max_workers: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="background-task")
+        self._pending = []
+
+    @property
+    def busy(self) -> bool:
+        """True while a task or its callback is still pending."""
+        return bool(self._pending)
+
+    def submit(self, fn, *args, on_done=None, on_error=None):
+        """
+        Runs fn(*args) on the worker thread.
+
+        Args:
+            fn: Function to run; it must not touch Qt widgets or pixmaps
+            on_done: Called by poll() with the result of fn
+            on_error: Called by poll() with the exception raised by fn
+                (without one the error is printed)
+
+        Returns:
+            The concurrent.futures.Future of the task
+        """
+        future = self._executor.submit(fn, *args)
+        self._pending.append((future, on_done, on_error))
+        return future
+
+    def poll(self) -> int:
+        """
+        Runs the callbacks of the tasks that have finished (on the calling
+        thread) and returns how many tasks are still pending. Cancelled
+        tasks have no callbacks.
+        """
+        while self._pending and self._pending[0][0].done():
+            future, on_done, on_error = self._pending.pop(0)
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is None:
+                if on_done is not None:
+                    on_done(future.result())
+            elif on_error is not None:
+                on_error(error)
+            else:
+                print(f"Background task failed: {error}")
+        return len(self._pending)
+
+    def wait(self):
+        """Blocks until every pending task has finished and ran its callback."""
+        while self._pending:
+            future = self._pending[0][0]
+            if not future.cancelled():
+                future.exception()  # waits for the task
+            self.poll()
+
+    def shutdown(self):
+        """Finishes the pending tasks and stops the worker thread."""
+        self.wait()
+        self._executor.shutdown()
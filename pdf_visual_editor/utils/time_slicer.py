@@ -0,0 +1,108 @@
+"""
+Runs a long sequence of small UI-thread jobs in time slices.
+
+Building the items of a dense page (thousands of text blocks) takes longer
+than a frame. A TimeSlicedJob processes as many units as fit in its time
+budget per call of run_slice(), which the GUI calls from a zero-interval
+timer, so the event loop repaints and handles input between slices.
+"""
+
+import time
+
+# Time given to a job per slice (half a frame at 60 Hz)
+SLICE_SECONDS = 0.008
+
+
+def order_visible_first(units, bounds, viewport):
+    """
+    Units whose bounds intersect the viewport first, each group in its
+    original order.
+
+    Args:
+        units: Work units
+        bounds: unit -> (x, y, width, height), or None if unknown (sorted last)
+        viewport: (left, top, right, bottom)
+    """
+    left, top, right, bottom = viewport
+    visible = []
+    rest = []
+    for unit in units:
+        rect = bounds(unit)
+        if rect is not None:
+            x, y, width, height = rect
+            if x <= right and x + width >= left and y <= bottom and y + height >= top:
+                visible.append(unit)
+                continue
+        rest.append(unit)
+    return visible + rest
+
+
+class TimeSlicedJob:
+    """
+    Calls process(unit) for every unit, a time-budgeted slice at a time.
+
+    Each slice processes at least one unit. The non-None results of a
+    slice are passed to on_batch; on_done is called once every unit is
+    processed.
+    """
+    def __init__(self, units, process, budget: float = SLICE_SECONDS,
+                 on_batch=None, on_done=None, clock=time.perf_counter):
+        """
+        Args:
+            units: Work units, in processing order
+            process: Function called with each unit
+            budget: Seconds a slice may take (checked after each unit)
+            on_batch: Called with the results of a slice
+            on_done: Called once all units are processed
+            clock: Time source (seconds)
+        """
+        self._units = list(units)
+        self._process = process
+        self.budget = budget
+        self._on_batch = on_batch
+        self._on_done = on_done
+        self._clock = clock
+        self._index = 0
+        self.finished = False
+        self.cancelled = False
+
+    @property
+    def done(self) -> bool:
+        return self.finished or self.cancelled
+
+    @property
+    def progress(self):
+        """(units processed, total units)."""
+        return self._index, len(self._units)
+
+    def run_slice(self) -> bool:
+        """Process units until the budget is spent; True once the job is done."""
+        if self.done:
+            return True
+        start = self._clock()
+        results = []
+        while self._index < len(self._units):
+            result = self._process(self._units[self._index])
+            self._index += 1
+            if result is not None:
+                results.append(result)
+            if self._clock() - start >= self.budget:
+                break
+
+        if results and self._on_batch is not None:
+            self._on_batch(results)
+        if self._index >= len(self._units):
+            self.finished = True
+            if self._on_done is not None:
+                self._on_done()
+            return True
+        return False
+
+    def run_all(self):
+        """Process the remaining units now (e.g. before the result is read)."""
+        while not self.run_slice():
+            pass
+
+    def cancel(self):
+        """Stop without processing the remaining units (on_done is not called)."""
+        self.cancelled = True